@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the scene compositor.
+
+Composites a typical streaming layout from synthetic sources: a full-size
+screen that changes now and then, a webcam in a corner that changes every
+frame, a logo with alpha and a translucent lower third. Reports time per
+frame and the share of the output recomposited, with dirty regions and
+with every frame recomposited in full.
+
+    python benchmarks/bench_compositor.py --resolutions 1080p 4k --frames 120
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+from capture.compositor import SceneCompositor, SourceLayer, ImageLayer  # noqa: E402
+from capture.frame_sources import SyntheticSource  # noqa: E402
+
+RESOLUTIONS = {
+    '720p': (1280, 720),
+    '1080p': (1920, 1080),
+    '4k': (3840, 2160),
+}
+
+
+def logo(width, height):
+    """A white disc on transparency."""
+    image = np.zeros((height, width, 4), dtype=np.uint8)
+    yy, xx = np.mgrid[:height, :width]
+    inside = (xx - width / 2) ** 2 + (yy - height / 2) ** 2 <= (min(width, height) / 2) ** 2
+    image[inside] = (255, 255, 255, 220)
+    return image
+
+
+def scene(width, height, screen_every, tile_size, dirty_regions):
+    cam_w, cam_h = width // 4 // 2 * 2, height // 4 // 2 * 2
+    margin = height // 40
+    bar = np.empty((height // 8, width, 4), dtype=np.uint8)
+    bar[:] = (60, 30, 10, 255)
+    layers = [
+        SourceLayer(SyntheticSource(width, height, change_every=screen_every),
+                    (0, 0, width, height), tile_size=tile_size),
+        ImageLayer(bar, (0, height - bar.shape[0], width, bar.shape[0]), opacity=0.7),
+        SourceLayer(SyntheticSource(cam_w, cam_h, seed=1),
+                    (width - cam_w - margin, height - cam_h - margin, cam_w, cam_h),
+                    tile_size=tile_size),
+        ImageLayer(logo(height // 8, height // 8), (margin, margin, height // 8, height // 8)),
+    ]
+    return SceneCompositor(width, height, layers, tile_size=tile_size,
+                           dirty_regions=dirty_regions)
+
+
+def run(resolutions, frames, screen_every, tile_size):
+    results = []
+    for name in resolutions:
+        width, height = RESOLUTIONS[name]
+        for dirty_regions in (True, False):
+            compositor = scene(width, height, screen_every, tile_size, dirty_regions)
+            compositor.open()
+            compositor.compose()  # The first frame is always full
+            dirty = 0
+            start = time.perf_counter()
+            for _ in range(frames):
+                compositor.compose()
+                dirty += compositor.dirty_pixels
+            elapsed = time.perf_counter() - start
+            compositor.close()
+            results.append({
+                'resolution': name,
+                'mode': 'dirty' if dirty_regions else 'full',
+                'frames': frames,
+                'ms_per_frame': elapsed / frames * 1000,
+                'fps': frames / elapsed,
+                'dirty_share': dirty / (frames * width * height),
+            })
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--resolutions', nargs='+', default=['1080p', '4k'],
+                        choices=sorted(RESOLUTIONS))
+    parser.add_argument('--frames', type=int, default=120)
+    parser.add_argument('--screen-every', type=int, default=30,
+                        help="Frames between changes of the screen layer")
+    parser.add_argument('--tile-size', type=int, default=64)
+    parser.add_argument('--json', help="Also write results to this JSON file")
+    args = parser.parse_args(argv)
+
+    results = run(args.resolutions, args.frames, args.screen_every, args.tile_size)
+    print(f"{'resolution':>10} {'mode':>6} {'ms/frame':>9} {'fps':>8} {'dirty':>7}")
+    for row in results:
+        print(f"{row['resolution']:>10} {row['mode']:>6} {row['ms_per_frame']:>9.2f} "
+              f"{row['fps']:>8.1f} {row['dirty_share']:>6.1%}")
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
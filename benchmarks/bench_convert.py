@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for the QImage to NumPy conversion path.
+
+Compares the original RGB888 round trip with the strided BGRA view, and
+the direct BGRA to I420/NV12 conversion (1.5 bytes per pixel for the
+encoder instead of 3), reporting time per pixel, output bytes per pixel
+and the number of full-frame copies each path makes.
+Copies are counted from Python/NumPy allocations traced by tracemalloc,
+plus one for every QImage format conversion (Qt allocates outside Python).
+
+    python benchmarks/bench_convert.py --resolutions 1080p 4k --yuv-threads 4
+"""
+import argparse
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+import cv2
+from PySide6.QtGui import QImage
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+from capture.frame_convert import qimage_to_bgr, qimage_to_bgra  # noqa: E402
+from capture.yuv_convert import YuvConverter, I420, NV12  # noqa: E402
+
+RESOLUTIONS = {
+    '720p': (1280, 720),
+    '1080p': (1920, 1080),
+    '1440p': (2560, 1440),
+    '4k': (3840, 2160),
+}
+
+
+def legacy_qimage_to_numpy(qimage):
+    """The conversion CaptureManager used before the strided view."""
+    img_rgb = qimage.convertToFormat(QImage.Format_RGB888)
+    width = img_rgb.width()
+    height = img_rgb.height()
+    view = memoryview(img_rgb.constBits()).tobytes()
+    arr = np.frombuffer(view, dtype=np.uint8).reshape((height, width, 3))
+    return cv2.cvtColor(arr, cv2.COLOR_RGB2BGR)
+
+
+def strided_qimage_to_numpy(qimage):
+    return qimage_to_bgr(qimage)
+
+
+_converters = {}
+
+
+def yuv_path(pixel_format, threads):
+    """QImage to I420/NV12 through the strided view, converters cached per size."""
+    def convert(qimage):
+        key = (qimage.width(), qimage.height())
+        if key not in _converters:
+            _converters[key] = YuvConverter(*key, pixel_format, threads)
+        return _converters[key].convert(qimage_to_bgra(qimage))
+    return convert
+
+
+def make_paths(yuv_threads=1):
+    return {
+        'legacy': (legacy_qimage_to_numpy, 1),  # convertToFormat(RGB888)
+        'strided': (strided_qimage_to_numpy, 0),
+        'i420': (yuv_path(I420, yuv_threads), 0),
+        'nv12': (yuv_path(NV12, yuv_threads), 0),
+    }
+
+
+def make_image(width, height):
+    """A grabbed-screen stand-in: random Format_RGB32 pixels."""
+    rng = np.random.default_rng(0)
+    pixels = rng.integers(0, 256, (height, width, 4), dtype=np.uint8)
+    pixels[:, :, 3] = 255
+    image = QImage(pixels.data, width, height, width * 4, QImage.Format_RGB32)
+    return image.copy()  # Detach from the NumPy buffer like a real grab
+
+
+def count_copies(convert, qt_copies, image, frame_bytes):
+    tracemalloc.start()
+    try:
+        convert(image)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return qt_copies + round(peak / frame_bytes)
+
+
+def bench(convert, image, iterations):
+    convert(image)  # Warm up caches and lazy allocations
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter_ns()
+        convert(image)
+        timings.append(time.perf_counter_ns() - start)
+    return float(np.median(timings))
+
+
+def run(resolutions, iterations, yuv_threads=1):
+    results = []
+    for name in resolutions:
+        width, height = RESOLUTIONS[name]
+        image = make_image(width, height)
+        pixels = width * height
+        for path, (convert, qt_copies) in make_paths(yuv_threads).items():
+            _converters.clear()
+            median_ns = bench(convert, image, iterations)
+            out_bytes = convert(image).nbytes
+            results.append({
+                'resolution': name,
+                'path': path,
+                'copies': count_copies(convert, qt_copies, image, out_bytes),
+                'bytes_per_pixel': out_bytes / pixels,
+                'ms_per_frame': median_ns / 1e6,
+                'ns_per_pixel': median_ns / pixels,
+            })
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--resolutions', nargs='+', default=['720p', '1080p', '4k'],
+                        choices=sorted(RESOLUTIONS))
+    parser.add_argument('--iterations', type=int, default=50)
+    parser.add_argument('--yuv-threads', type=int, default=1,
+                        help="Row bands converted in parallel for i420/nv12")
+    args = parser.parse_args(argv)
+
+    print(f"{'resolution':>10} {'path':>8} {'copies':>6} {'B/pixel':>8} {'ms/frame':>9} {'ns/pixel':>9}")
+    for row in run(args.resolutions, args.iterations, args.yuv_threads):
+        print(f"{row['resolution']:>10} {row['path']:>8} {row['copies']:>6} "
+              f"{row['bytes_per_pixel']:>8.2f} {row['ms_per_frame']:>9.2f} {row['ns_per_pixel']:>9.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
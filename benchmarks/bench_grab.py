@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Benchmark for screen grab paths on Linux.
+
+Times one grab plus conversion to a BGRA array for the Qt path
+(grabWindow, toImage) and the native XShm path, per resolution. Regions
+larger than the screen are clipped. Needs a running X server; the XShm
+rows are reported as skipped when the extension is not available.
+
+    python benchmarks/bench_grab.py --resolutions 720p 1080p --frames 60
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+from loguru import logger
+from PySide6.QtCore import QRect
+from PySide6.QtGui import QGuiApplication
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+from capture.frame_sources import QtScreenSource, XShmSource  # noqa: E402
+from capture.xshm import XShmUnavailable  # noqa: E402
+
+RESOLUTIONS = {
+    '720p': (1280, 720),
+    '1080p': (1920, 1080),
+    '1440p': (2560, 1440),
+    '4k': (3840, 2160),
+}
+PATHS = {'qt': QtScreenSource, 'xshm': XShmSource}
+
+
+def time_source(source, frames):
+    source.open()
+    try:
+        source.to_bgra(source.grab())  # Warm up allocations
+        latencies = []
+        for _ in range(frames):
+            start = time.perf_counter()
+            source.to_bgra(source.grab())
+            latencies.append(time.perf_counter() - start)
+    finally:
+        source.close()
+    return np.asarray(latencies) * 1000.0
+
+
+def run(resolutions, paths, frames):
+    geometry = QGuiApplication.primaryScreen().geometry()
+    results = []
+    for name in resolutions:
+        width, height = RESOLUTIONS[name]
+        area = QRect(0, 0, min(width, geometry.width()), min(height, geometry.height()))
+        for path in paths:
+            row = {'resolution': name, 'path': path, 'width': area.width(), 'height': area.height()}
+            try:
+                latencies = time_source(PATHS[path](area), frames)
+            except XShmUnavailable as e:
+                row['skipped'] = str(e)
+                results.append(row)
+                continue
+            row.update({
+                'frames': frames,
+                'mean_ms': float(latencies.mean()),
+                'p50_ms': float(np.percentile(latencies, 50)),
+                'p95_ms': float(np.percentile(latencies, 95)),
+                'max_fps': 1000.0 / float(latencies.mean()),
+            })
+            results.append(row)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--resolutions', nargs='+', default=['720p', '1080p', '4k'],
+                        choices=sorted(RESOLUTIONS))
+    parser.add_argument('--paths', nargs='+', default=sorted(PATHS), choices=sorted(PATHS))
+    parser.add_argument('--frames', type=int, default=60)
+    parser.add_argument('--json', help="Also write results to this JSON file")
+    args = parser.parse_args(argv)
+
+    logger.remove()
+    logger.add(sys.stderr, level='WARNING')
+    app = QGuiApplication.instance() or QGuiApplication(sys.argv)  # noqa: F841
+
+    results = run(args.resolutions, args.paths, args.frames)
+    print(f"{'resolution':>10} {'path':>5} {'size':>10} {'mean ms':>8} {'p50 ms':>8} "
+          f"{'p95 ms':>8} {'max fps':>8}")
+    for row in results:
+        size = f"{row['width']}x{row['height']}"
+        if 'skipped' in row:
+            print(f"{row['resolution']:>10} {row['path']:>5} {size:>10}  skipped: {row['skipped']}")
+            continue
+        print(f"{row['resolution']:>10} {row['path']:>5} {size:>10} {row['mean_ms']:>8.2f} "
+              f"{row['p50_ms']:>8.2f} {row['p95_ms']:>8.2f} {row['max_fps']:>8.1f}")
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
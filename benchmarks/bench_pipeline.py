@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+"""
+Offline benchmark suite for the capture, convert and encode pipeline.
+
+Runs without a display: Qt uses the offscreen platform and frames are
+generated with NumPy. Sections:
+
+    convert    CaptureManager._qimage_to_numpy on a grabbed-screen stand-in
+    codecs     every OpenCV codec of the VIDEO_CODECS fallback list
+    gstreamer  ScreenRecorder's encoder chains, fed by videotestsrc
+    pipeline   CaptureManager end to end with a SyntheticSource, encoding
+               directly and spooling raw frames to encode afterwards
+
+Every result has a throughput (fps) and per-frame latency percentiles.
+Results can be saved as JSON and compared against an earlier run; the
+exit status is 1 if any result got slower than the threshold allows.
+
+    python benchmarks/bench_pipeline.py --json current.json
+    python benchmarks/bench_pipeline.py --compare baseline.json --threshold 0.15
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+import numpy as np  # noqa: E402
+import cv2  # noqa: E402
+from loguru import logger  # noqa: E402
+from PySide6.QtGui import QGuiApplication, QImage  # noqa: E402
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+from capture.video_writers import VIDEO_CODECS, open_opencv_writer  # noqa: E402
+
+RESOLUTIONS = {
+    '720p': (1280, 720),
+    '1080p': (1920, 1080),
+    '4k': (3840, 2160),
+}
+SECTIONS = ('convert', 'codecs', 'gstreamer', 'pipeline')
+PIPELINE_BACKENDS = ('opencv', 'spool')
+FPS = 30
+
+
+def make_frames(width, height, count=4, seed=0):
+    """Screen-like BGRA frames: flat background, text-like blocks, a moving box."""
+    rng = np.random.default_rng(seed)
+    base = np.full((height, width, 4), 48, dtype=np.uint8)
+    base[:, :, 3] = 255
+    for _ in range(24):
+        x, y = rng.integers(0, width - 300), rng.integers(0, height - 40)
+        base[y:y + 20, x:x + 280, :3] = rng.integers(0, 256, 3)
+    frames = []
+    for index in range(count):
+        frame = base.copy()
+        x = (index * width // count) % (width - 64)
+        frame[height // 2:height // 2 + 64, x:x + 64, :3] = 255
+        frames.append(frame)
+    return frames
+
+
+def to_qimage(frame):
+    height, width = frame.shape[:2]
+    image = QImage(frame.data, width, height, width * 4, QImage.Format_RGB32)
+    return image.copy()  # Own the pixels like a real grab
+
+
+def summarize(section, name, resolution, latencies, elapsed, frames, **extra):
+    latencies_ms = np.asarray(latencies) * 1000.0
+    result = {
+        'section': section,
+        'name': name,
+        'resolution': resolution,
+        'frames': frames,
+        'fps': frames / elapsed if elapsed > 0 else 0.0,
+    }
+    if len(latencies_ms):
+        result.update({
+            'p50_ms': float(np.percentile(latencies_ms, 50)),
+            'p95_ms': float(np.percentile(latencies_ms, 95)),
+            'p99_ms': float(np.percentile(latencies_ms, 99)),
+        })
+    result.update(extra)
+    return result
+
+
+def bench_convert(resolution, frames):
+    from capture.capture_manager import CaptureManager
+    width, height = RESOLUTIONS[resolution]
+    images = [to_qimage(frame) for frame in make_frames(width, height)]
+    manager = CaptureManager()
+    out = np.empty((height, width, 3), dtype=np.uint8)
+    latencies = []
+    start = time.perf_counter()
+    for index in range(frames):
+        begin = time.perf_counter()
+        manager._qimage_to_numpy(images[index % len(images)], out)
+        latencies.append(time.perf_counter() - begin)
+    elapsed = time.perf_counter() - start
+    return [summarize('convert', '_qimage_to_numpy', resolution, latencies, elapsed, frames,
+                      mb_per_s=frames * width * height * 4 / elapsed / 1e6)]
+
+
+def bench_codecs(resolution, frames, tmp):
+    width, height = RESOLUTIONS[resolution]
+    source = [np.ascontiguousarray(frame[:, :, :3]) for frame in make_frames(width, height)]
+    results = []
+    for codec in VIDEO_CODECS:
+        try:
+            writer, path = open_opencv_writer(
+                str(Path(tmp) / f"{codec}-{resolution}"), FPS, width, height, [codec]
+            )
+        except Exception as e:
+            results.append({'section': 'codecs', 'name': codec, 'resolution': resolution,
+                            'skipped': str(e)})
+            continue
+        latencies = []
+        start = time.perf_counter()
+        for index in range(frames):
+            begin = time.perf_counter()
+            writer.write(source[index % len(source)])
+            latencies.append(time.perf_counter() - begin)
+        writer.release()
+        elapsed = time.perf_counter() - start
+        results.append(summarize('codecs', codec, resolution, latencies, elapsed, frames,
+                                 output_mb=Path(path).stat().st_size / 1e6))
+        Path(path).unlink(missing_ok=True)
+    return results
+
+
+def bench_gstreamer(resolution, frames, tmp):
+    """Time ScreenRecorder's encoder chain for every usable encoder.
+
+    The screen source is replaced by videotestsrc so the numbers only
+    depend on conversion and encoding, not on the display server.
+    """
+    try:
+        import gi
+        gi.require_version('Gst', '1.0')
+        from gi.repository import Gst
+        from capture.encoder_select import (
+            ENCODERS, EncoderProfile, probe_encoders, make_element,
+            make_encoder_chain, link_elements
+        )
+    except (ImportError, ValueError) as e:
+        return [{'section': 'gstreamer', 'name': 'all', 'resolution': resolution,
+                 'skipped': f"GStreamer unavailable: {e}"}]
+    Gst.init(None)
+    width, height = RESOLUTIONS[resolution]
+    profile = EncoderProfile(width=width, height=height, fps=FPS)
+    usable = probe_encoders()
+    results = []
+    for spec in ENCODERS:
+        if spec.element not in usable:
+            continue
+        path = str(Path(tmp) / f"{spec.element}-{resolution}{spec.extension}")
+        elements = [
+            make_element('videotestsrc', num_buffers=str(frames), pattern='smpte'),
+            make_element('capsfilter', caps=(
+                f"video/x-raw,format=BGRx,width={width},height={height},framerate={FPS}/1"
+            )),
+        ] + make_encoder_chain(spec, profile) + [make_element('filesink', location=path)]
+        pipeline = Gst.Pipeline.new('bench')
+        for element in elements:
+            pipeline.add(element)
+        link_elements(elements)
+        start = time.perf_counter()
+        pipeline.set_state(Gst.State.PLAYING)
+        message = pipeline.get_bus().timed_pop_filtered(
+            120 * Gst.SECOND, Gst.MessageType.EOS | Gst.MessageType.ERROR
+        )
+        elapsed = time.perf_counter() - start
+        pipeline.set_state(Gst.State.NULL)
+        if message is None or message.type != Gst.MessageType.EOS:
+            results.append({'section': 'gstreamer', 'name': spec.element,
+                            'resolution': resolution, 'skipped': "pipeline failed"})
+            continue
+        # A pipeline has no per-frame latency; report the mean frame time
+        results.append(summarize('gstreamer', spec.element, resolution, [], elapsed, frames,
+                                 mean_ms=elapsed / frames * 1000.0,
+                                 hardware=spec.hardware,
+                                 output_mb=Path(path).stat().st_size / 1e6))
+        Path(path).unlink(missing_ok=True)
+    return results
+
+
+def bench_pipeline(resolution, seconds, tmp, backend='opencv'):
+    """Record with CaptureManager for a while and report its own telemetry."""
+    from capture.capture_manager import CaptureManager
+    from capture.frame_sources import SyntheticSource
+    width, height = RESOLUTIONS[resolution]
+    manager = CaptureManager()
+    manager.use_frame_source(SyntheticSource(width, height))
+    manager.set_encoder_backend(backend)
+    errors = []
+    manager.errorOccurred.connect(errors.append)
+
+    manager.start_recording(str(Path(tmp) / f"pipeline-{resolution}.avi"))
+    time.sleep(seconds)
+    manager.stop_recording()
+    if manager._recording_thread:
+        manager._recording_thread.join()
+    # Spooled recordings are encoded afterwards; that time is not capture time
+    manager.wait_spool_encodes()
+    snapshot = manager.telemetry
+    if errors or not snapshot:
+        return [{'section': 'pipeline', 'name': backend, 'resolution': resolution,
+                 'skipped': "; ".join(errors) or "no telemetry"}]
+    stages = snapshot['stages']
+    return [{
+        'section': 'pipeline',
+        'name': backend,
+        'resolution': resolution,
+        'frames': snapshot['written'],
+        'fps': snapshot['effective_fps'],
+        'target_fps': snapshot['target_fps'],
+        'dropped': snapshot['dropped'],
+        'late': snapshot['late'],
+        'missed': snapshot['missed'],
+        'stages': {name: stages[name] for name in stages if stages[name]['count']},
+    }]
+
+
+def environment():
+    return {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'cpus': os.cpu_count(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'opencv': cv2.__version__,
+    }
+
+
+def _guarded(section, resolution, bench, *args):
+    """Run one benchmark, turning a failure into a skipped result."""
+    try:
+        return bench(resolution, *args)
+    except Exception as e:
+        return [{'section': section, 'name': 'all', 'resolution': resolution,
+                 'skipped': f"{type(e).__name__}: {e}"}]
+
+
+def run(sections, resolutions, frames, seconds):
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for resolution in resolutions:
+            if 'convert' in sections:
+                results += _guarded('convert', resolution, bench_convert, frames)
+            if 'codecs' in sections:
+                results += _guarded('codecs', resolution, bench_codecs, frames, tmp)
+            if 'gstreamer' in sections:
+                results += _guarded('gstreamer', resolution, bench_gstreamer, frames, tmp)
+            if 'pipeline' in sections:
+                for backend in PIPELINE_BACKENDS:
+                    results += _guarded('pipeline', resolution, bench_pipeline, seconds, tmp, backend)
+    return results
+
+
+def _key(result):
+    return result['section'], result['name'], result['resolution']
+
+
+def compare(results, baseline, threshold):
+    """Results whose throughput dropped by more than threshold (a fraction)."""
+    previous = {_key(r): r for r in baseline['results'] if 'fps' in r}
+    regressions = []
+    for result in results:
+        before = previous.get(_key(result))
+        if before is None or 'fps' not in result or not before['fps']:
+            continue
+        change = result['fps'] / before['fps'] - 1.0
+        if change < -threshold:
+            regressions.append((result, before, change))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sections', nargs='+', default=list(SECTIONS), choices=SECTIONS)
+    parser.add_argument('--resolutions', nargs='+', default=['720p', '1080p', '4k'],
+                        choices=sorted(RESOLUTIONS))
+    parser.add_argument('--frames', type=int, default=90,
+                        help="Frames per convert/codec/GStreamer run")
+    parser.add_argument('--seconds', type=float, default=3.0,
+                        help="Recording time per pipeline run")
+    parser.add_argument('--json', help="Write results to this JSON file")
+    parser.add_argument('--compare', help="Baseline JSON from an earlier run")
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help="Allowed throughput loss against the baseline")
+    args = parser.parse_args(argv)
+
+    logger.remove()
+    logger.add(sys.stderr, level='WARNING')
+    app = QGuiApplication.instance() or QGuiApplication([])  # noqa: F841
+
+    results = run(args.sections, args.resolutions, args.frames, args.seconds)
+    print(f"{'section':>9} {'name':>18} {'res':>6} {'fps':>8} {'p50 ms':>8} "
+          f"{'p95 ms':>8} {'p99 ms':>8}")
+    for row in results:
+        if 'skipped' in row:
+            print(f"{row['section']:>9} {row['name']:>18} {row['resolution']:>6}  "
+                  f"skipped: {row['skipped']}")
+            continue
+        latency = [f"{row[k]:>8.2f}" if k in row else f"{'-':>8}"
+                   for k in ('p50_ms', 'p95_ms', 'p99_ms')]
+        print(f"{row['section']:>9} {row['name']:>18} {row['resolution']:>6} "
+              f"{row['fps']:>8.1f} {' '.join(latency)}")
+        for stage, stats in row.get('stages', {}).items():
+            print(f"{'':>9} {stage:>18} {'':>6} {'':>8} {stats['p50_ms']:>8.2f} "
+                  f"{stats['p95_ms']:>8.2f} {stats['p99_ms']:>8.2f}")
+    report = {'environment': environment(), 'results': results}
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, indent=2))
+
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text())
+        regressions = compare(results, baseline, args.threshold)
+        for result, before, change in regressions:
+            print(f"REGRESSION {'/'.join(_key(result))}: "
+                  f"{before['fps']:.1f} -> {result['fps']:.1f} fps ({change:+.0%})")
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the tile-delta intermediate format.
+
+Encodes synthetic screen-content sequences and reports encode throughput
+and compression ratio (raw BGR bytes / bytes on disk).
+
+    python benchmarks/bench_tiles.py --resolutions 1080p 4k --frames 120
+"""
+import argparse
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+from capture.tile_codec import TileStreamWriter, EXTENSION  # noqa: E402
+
+RESOLUTIONS = {
+    '720p': (1280, 720),
+    '1080p': (1920, 1080),
+    '4k': (3840, 2160),
+}
+
+
+def slides(width, height, frames, rng):
+    """Static slides that change every 2 seconds, with a moving cursor."""
+    slide = None
+    for index in range(frames):
+        if index % 60 == 0:
+            slide = np.full((height, width, 3), rng.integers(0, 256, 3), dtype=np.uint8)
+            for _ in range(8):
+                x, y = rng.integers(0, width - 400), rng.integers(0, height - 60)
+                slide[y:y + 40, x:x + 380] = rng.integers(0, 256, 3)
+        frame = slide.copy()
+        cx = (index * 7) % (width - 16)
+        frame[height // 2:height // 2 + 16, cx:cx + 16] = 255
+        yield frame
+
+
+def terminal(width, height, frames, rng):
+    """Text lines appearing at the bottom and scrolling up."""
+    line_height = 18
+    frame = np.zeros((height, width, 3), dtype=np.uint8)
+    for index in range(frames):
+        if index % 4 == 0:
+            frame[:-line_height] = frame[line_height:]
+            frame[-line_height:] = 0
+            length = int(rng.integers(width // 8, width))
+            glyphs = rng.integers(0, 2, (line_height - 4, length), dtype=np.uint8) * 200
+            frame[-line_height + 2:-2, :length] = glyphs[:, :, None]
+        yield frame
+
+
+def noise(width, height, frames, rng):
+    """Worst case: every pixel changes every frame."""
+    for _ in range(frames):
+        yield rng.integers(0, 256, (height, width, 3), dtype=np.uint8)
+
+
+SEQUENCES = {'slides': slides, 'terminal': terminal, 'noise': noise}
+
+
+def run(resolutions, sequences, frames, tile_size):
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for name in resolutions:
+            width, height = RESOLUTIONS[name]
+            for sequence in sequences:
+                rng = np.random.default_rng(0)
+                source = list(SEQUENCES[sequence](width, height, frames, rng))
+                path = str(Path(tmp) / f"{sequence}-{name}{EXTENSION}")
+                writer = TileStreamWriter(path, width, height, 30, tile_size=tile_size)
+                start = time.perf_counter()
+                for frame in source:
+                    writer.write(frame)
+                elapsed = time.perf_counter() - start
+                ratio = writer.compression_ratio
+                tiles = writer.tiles_written
+                writer.release()
+                results.append({
+                    'resolution': name,
+                    'sequence': sequence,
+                    'frames': frames,
+                    'fps': frames / elapsed,
+                    'raw_mb_per_s': frames * width * height * 3 / elapsed / 1e6,
+                    'compression_ratio': ratio,
+                    'tiles_per_frame': tiles / frames,
+                })
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--resolutions', nargs='+', default=['1080p', '4k'],
+                        choices=sorted(RESOLUTIONS))
+    parser.add_argument('--sequences', nargs='+', default=sorted(SEQUENCES),
+                        choices=sorted(SEQUENCES))
+    parser.add_argument('--frames', type=int, default=120)
+    parser.add_argument('--tile-size', type=int, default=64)
+    parser.add_argument('--json', help="Also write results to this JSON file")
+    args = parser.parse_args(argv)
+
+    results = run(args.resolutions, args.sequences, args.frames, args.tile_size)
+    print(f"{'resolution':>10} {'sequence':>9} {'fps':>8} {'raw MB/s':>9} "
+          f"{'ratio':>8} {'tiles/frame':>11}")
+    for row in results:
+        print(f"{row['resolution']:>10} {row['sequence']:>9} {row['fps']:>8.1f} "
+              f"{row['raw_mb_per_s']:>9.0f} {row['compression_ratio']:>8.1f} "
+              f"{row['tiles_per_frame']:>11.1f}")
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
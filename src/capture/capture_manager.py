@@ -1,22 +1,69 @@
 from PySide6.QtCore import QObject, Signal, Slot, Property, QRect, QPoint
 from PySide6.QtGui import QScreen, QGuiApplication, QPixmap, QImage, QWindow
 import numpy as np
-import cv2
 from pathlib import Path
 import time
 from loguru import logger
 import platform
 import os
-import ctypes
+import threading
 from typing import List, Dict
 
-WNDENUMPROC = ctypes.WINFUNCTYPE(ctypes.c_bool, ctypes.POINTER(ctypes.c_int), ctypes.POINTER(ctypes.c_int))
+from .frame_queue import FrameQueue, QueuedFrame, POLICIES as BACKPRESSURE_POLICIES, BLOCK
+from .frame_convert import qimage_to_bgra, bgra_to_bgr
+from .frame_transform import FrameTransform, INTERPOLATIONS, COLORSPACES, DEFAULT_INTERPOLATION, BGR
+from .yuv_convert import YUV_FORMATS, GST_FORMATS
+from .compositor import SceneSource, build_scene
+from .quality_controller import QualityController, QualityBounds, PipelineLoad, CpuMeter
+from .frame_pool import FramePool
+from .memory import PeakMemory
+from .damage import TileDiff
+from .tile_codec import TileStreamWriter, EXTENSION as TILE_EXTENSION
+from .frame_spool import SpoolWriter, encode_spool
+from .video_writers import VIDEO_CODECS, open_opencv_writer
+from .encode_workers import ProcessEncodeWriter
+from .segmented_writer import SegmentedWriter, join_segments
+from .frame_sources import FRAME_SOURCES, QT, FILE, SourceExhausted, create_source
+from .telemetry import Telemetry, TelemetryDump, GRAB, TO_IMAGE, CONVERT, ENCODE, SLEEP, JITTER
+from .frame_scheduler import (
+    FrameScheduler, TimecodeWriter, timecodes_path,
+    CATCH_UP_POLICIES, DUPLICATE
+)
+from .window_index import WindowIndex, default_lister, as_dict
+from .preview import PreviewTap
+from .replay_buffer import ReplayBuffer, DEFAULT_MAX_MB as REPLAY_DEFAULT_MB
 
 class CaptureManager(QObject):
     recordingChanged = Signal(bool)
     captureComplete = Signal(str)  # Emits path to captured file
     errorOccurred = Signal(str)
     availableWindowsChanged = Signal()
+    screenChanged = Signal()
+    queueStatsChanged = Signal()
+    memoryStatsChanged = Signal()
+    segmentFinished = Signal(str)  # Emits path of a finished, playable segment
+    telemetryChanged = Signal()
+    previewChanged = Signal()
+    finalizingChanged = Signal(bool)
+    finalizeProgressChanged = Signal()
+    replaySaved = Signal(str)  # Emits path of a saved instant replay
+    spoolEncodingChanged = Signal()
+    qualityChanged = Signal()
+    
+    # OpenCV codecs tried in order until one opens
+    VIDEO_CODECS = VIDEO_CODECS
+    ENCODER_BACKENDS = ('opencv', 'gstreamer', 'tiles', 'processes', 'spool')
+    FRAME_SOURCES = FRAME_SOURCES
+    QUALITY_INTERVAL = 1.0  # Seconds between adaptive quality samples
+    STATS_INTERVAL = 1.0  # Seconds between telemetry and memory updates
+    FINALIZE_DRAIN_SHARE = 0.9  # Finalize progress once the queued frames are written
+    
+    # GStreamer encoder probe results are per machine, so every manager shares one probe
+    _probed_encoders = None
+    _probe_error = None
+    _probe_thread = None
+    _probe_callbacks = []
+    _probe_lock = threading.Lock()
     
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -26,8 +73,98 @@ class CaptureManager(QObject):
         self._selected_window = None
         self._fps = 30
         self._output_path = None
-        self._available_windows = []
-        self._update_window_list()
+        self._window_index = None
+        self._recording_thread = None
+        
+        # Where frames come from; rebuilt lazily when the selection changes
+        self._source_kind = QT
+        self._replay_path = None
+        self._screen_index = None  # None records the primary screen
+        self._shared_start = None  # Clock time of frame 0 shared with other streams
+        self._frame_source = None
+        
+        # Capture/encode pipeline
+        self._queue_capacity = 8
+        self._backpressure = BLOCK
+        self._encoder_count = 1
+        self._frame_queue = None
+        self._encoder_threads = []
+        self._read_lock = threading.Lock()
+        self._write_cond = threading.Condition()
+        self._frames_dequeued = 0
+        self._next_write = 0
+        self._frames_written = 0
+        self._pipeline_failed = False
+        
+        # Draining and finalizing after stop, reported while the UI keeps running
+        self._finalizing = False
+        self._finalize_from = 0
+        self._finalize_progress = 0.0
+        
+        # Crop, scale and colour conversion between grab and encode
+        self._output_size = (0, 0)  # 0 keeps the capture size
+        self._crop = None
+        self._interpolation = DEFAULT_INTERPOLATION
+        self._colorspace = BGR
+        self._yuv_threads = 1
+        self._transform = None
+        
+        # Frame pacing
+        self._catch_up = DUPLICATE
+        self._scheduler = None
+        self._timecodes = None
+        
+        # Adaptive quality: the capture rate follows the pipeline load
+        self._adaptive_quality = False
+        self._quality_bounds = QualityBounds()
+        self._quality = None
+        self._cpu_meter = None
+        self._capture_step = 1  # Capture every n-th frame slot
+        self._encode_seen = (0, 0.0)
+        self._next_quality_sample = 0.0
+        
+        # Buffers recycled between sessions, reallocated only on size changes
+        self._frame_pool = None
+        self._grab_pool = None  # BGRA copies for sources that reuse their buffer
+        self._peak_memory = PeakMemory()
+        
+        # Encoder backend
+        self._encoder_backend = 'opencv'
+        self._bitrate_kbps = 8000
+        self._encode_processes = 0  # 0 picks one per spare CPU core
+        
+        # Spool backend: raw frames now, encoded by background jobs after stopping
+        self._spool_path = None
+        self._spool_jobs = []
+        self._spool_lock = threading.Lock()
+        self._spool_progress = 0.0
+        
+        # Instant replay: keep the last seconds in memory instead of writing a file
+        self._replay_seconds = 0.0
+        self._replay_mb = REPLAY_DEFAULT_MB
+        self._replay_buffer = None
+        
+        # Segmented output, disabled when both limits are 0
+        self._segment_seconds = 0.0
+        self._segment_mb = 0.0
+        self._keep_segments = False
+        
+        # Damage tracking: unchanged frames are repeated instead of re-encoded
+        self._damage_tracking = False
+        self._damage_tile_size = 64
+        self._tile_diff = None
+        self._repeated_frames = 0
+        self._last_frame = None
+        self._last_buffer = None
+        
+        # Per-stage timings and frame counters, published once per second
+        self._telemetry = None
+        self._telemetry_dump_path = None
+        self._telemetry_dump = None
+        
+        # Downscaled frames for the live preview, taken from the capture thread
+        self._preview = PreviewTap(on_frame=lambda serial: self.previewChanged.emit())
+        
         logger.info("CaptureManager initialized")
         
     @Property(bool, notify=recordingChanged)
@@ -37,34 +174,149 @@ class CaptureManager(QObject):
         
     @Property('QVariantList', notify=availableWindowsChanged)
     def availableWindows(self):
-        return self._available_windows
+        return [as_dict(window) for window in self._get_window_index().windows()]
         
-    def _update_window_list(self):
-        """Update the list of available windows."""
-        if platform.system() == 'Windows':
-            self._available_windows = []
-            
-            def callback(hwnd, _):
-                if ctypes.windll.user32.IsWindowVisible(hwnd):
-                    length = ctypes.windll.user32.GetWindowTextLengthW(hwnd)
-                    if length > 0:
-                        title = ctypes.create_unicode_buffer(length + 1)
-                        ctypes.windll.user32.GetWindowTextW(hwnd, title, length + 1)
-                        rect = ctypes.wintypes.RECT()
-                        if ctypes.windll.user32.GetWindowRect(hwnd, ctypes.byref(rect)):
-                            self._available_windows.append({
-                                'handle': hwnd,
-                                'title': title.value,
-                                'rect': QRect(rect.left, rect.top, 
-                                            rect.right - rect.left,
-                                            rect.bottom - rect.top)
-                            })
-                return True
-
-            enum_windows = ctypes.windll.user32.EnumWindows
-            enum_windows(WNDENUMPROC(callback), 0)
-            
-            self.availableWindowsChanged.emit()
+    @Property('QVariantList', notify=screenChanged)
+    def availableScreens(self):
+        """Index, name and geometry of every screen."""
+        return [
+            {'index': index, 'name': screen.name(), 'geometry': screen.geometry()}
+            for index, screen in enumerate(QGuiApplication.screens())
+        ]
+        
+    @Property(int, notify=screenChanged)
+    def screen(self):
+        return -1 if self._screen_index is None else self._screen_index
+        
+    @Property(int, notify=queueStatsChanged)
+    def queueDepth(self):
+        return self._frame_queue.depth if self._frame_queue else 0
+        
+    @Property(int, notify=queueStatsChanged)
+    def queueCapacity(self):
+        return self._queue_capacity
+        
+    @Property(int, notify=queueStatsChanged)
+    def droppedFrames(self):
+        return self._frame_queue.dropped if self._frame_queue else 0
+        
+    @Property(str, notify=queueStatsChanged)
+    def backpressurePolicy(self):
+        return self._backpressure
+        
+    @Property(int, notify=queueStatsChanged)
+    def missedFrames(self):
+        return self._scheduler.missed_frames if self._scheduler else 0
+        
+    @Property(int, notify=queueStatsChanged)
+    def repeatedFrames(self):
+        """Frames written as repeats because nothing on screen changed."""
+        return self._repeated_frames
+        
+    @Property(bool, notify=queueStatsChanged)
+    def damageTracking(self):
+        return self._damage_tracking
+        
+    @Property(float, notify=memoryStatsChanged)
+    def peakMemoryMB(self):
+        """Peak resident memory of the current or last recording session."""
+        return self._peak_memory.peak / (1024 * 1024)
+        
+    @Property(float, notify=memoryStatsChanged)
+    def framePoolMB(self):
+        return self._frame_pool.nbytes / (1024 * 1024) if self._frame_pool else 0.0
+        
+    @Property('QVariantMap', notify=telemetryChanged)
+    def telemetry(self):
+        """Stage percentiles, frame counters and fps of the current or last session."""
+        return self._telemetry.snapshot() if self._telemetry else {}
+        
+    @Property(bool, notify=finalizingChanged)
+    def finalizing(self):
+        """True from stop until the last queued frame is written and the file is closed."""
+        return self._finalizing
+        
+    @Property(float, notify=finalizeProgressChanged)
+    def finalizeProgress(self):
+        """Fraction of the finalization done, 0 to 1."""
+        return self._finalize_progress
+        
+    @Property(bool, notify=queueStatsChanged)
+    def replayBuffering(self):
+        """True while recording into the instant replay buffer."""
+        return self._recording and self._replay_buffer is not None
+        
+    @Property(float, notify=queueStatsChanged)
+    def replaySeconds(self):
+        """Seconds held by the instant replay buffer, which is kept after stopping."""
+        return self._replay_buffer.duration if self._replay_buffer else 0.0
+        
+    @Property(float, notify=queueStatsChanged)
+    def replayMB(self):
+        return self._replay_buffer.nbytes / (1024 * 1024) if self._replay_buffer else 0.0
+        
+    @Property(bool, notify=spoolEncodingChanged)
+    def spoolEncoding(self):
+        """True while spooled recordings are being encoded in the background."""
+        with self._spool_lock:
+            return bool(self._spool_jobs)
+        
+    @Property(float, notify=spoolEncodingChanged)
+    def spoolEncodeProgress(self):
+        """Progress of the latest spool encode, 0 to 1."""
+        return self._spool_progress
+        
+    @Property(bool, notify=qualityChanged)
+    def adaptiveQuality(self):
+        return self._adaptive_quality
+        
+    @Property(float, notify=qualityChanged)
+    def qualityFps(self):
+        """Frames captured per second at the current adaptive quality level."""
+        return self._quality.level.fps if self._quality else float(self._fps)
+        
+    @Property(int, notify=previewChanged)
+    def previewFrame(self):
+        """Serial of the latest preview frame, for image://preview/<serial> URLs."""
+        return self._preview.serial
+        
+    @Property(bool, notify=previewChanged)
+    def previewEnabled(self):
+        return self._preview.enabled
+        
+    @property
+    def preview(self) -> PreviewTap:
+        return self._preview
+        
+    @Slot(bool)
+    def set_preview_enabled(self, enabled: bool):
+        """Publish preview frames while recording."""
+        self._preview.enabled = bool(enabled)
+        self.previewChanged.emit()
+        
+    @Slot(int, float)
+    def set_preview_quality(self, max_width: int, fps: float):
+        """Largest preview width in pixels and preview frames per second."""
+        self._preview.max_width = max(16, max_width)
+        self._preview.fps = max(0.1, fps)
+        
+    def _get_window_index(self) -> WindowIndex:
+        """The window index, started on first use so per-stream managers never poll."""
+        if self._window_index is None:
+            self._window_index = WindowIndex(default_lister(), parent=self)
+            self._window_index.windowsChanged.connect(self.availableWindowsChanged)
+            self._window_index.start()
+        return self._window_index
+        
+    @Property(QObject, constant=True)
+    def windowModel(self):
+        """List model of open windows, updated row by row in the background."""
+        return self._get_window_index().model
+        
+    @Slot()
+    def refresh_windows(self):
+        """Rescan open windows now instead of at the next poll."""
+        self._get_window_index().refresh()
         
     @Slot('QVariant')
     def set_capture_area(self, area):
@@ -76,6 +328,8 @@ class CaptureManager(QObject):
             self._capture_area = None
             self._selected_window = None
         logger.info(f"Capture area set to: {self._capture_area}")
+        self._reset_frame_source()
+        self._resize_frame_pool()
         
     @Slot('QVariant')
     def set_selected_window(self, window_info):
@@ -87,51 +341,466 @@ class CaptureManager(QObject):
             self._selected_window = None
             self._capture_area = None
         logger.info(f"Selected window set to: {self._selected_window}")
+        self._reset_frame_source()
+        self._resize_frame_pool()
         
-    def _grab_screen(self) -> QPixmap:
-        """Capture the current screen or selected area."""
-        screen = QGuiApplication.primaryScreen()
-        if self._selected_window:
-            # Update window position in case it moved
-            rect = ctypes.wintypes.RECT()
-            if ctypes.windll.user32.GetWindowRect(
-                self._selected_window['handle'],
-                ctypes.byref(rect)
-            ):
-                self._capture_area = QRect(
-                    rect.left, rect.top,
-                    rect.right - rect.left,
-                    rect.bottom - rect.top
-                )
+    @Slot(str)
+    def set_frame_source(self, kind: str):
+        """Choose where frames come from: qt, x11, file or synthetic."""
+        if kind not in FRAME_SOURCES:
+            self.errorOccurred.emit(f"Unknown frame source: {kind}")
+            return
+        if kind == FILE and not self._replay_path:
+            self.errorOccurred.emit("Choose a video file to replay first")
+            return
+        self._source_kind = kind
+        logger.info(f"Frame source set to: {kind}")
+        self._reset_frame_source()
+        try:
+            self._resize_frame_pool()
+        except Exception as e:
+            logger.error(f"Error opening frame source: {str(e)}")
+            self.errorOccurred.emit(str(e))
+        
+    @Slot(int)
+    def set_screen(self, index: int):
+        """Record the screen with this index; -1 selects the primary screen."""
+        self._screen_index = index if index >= 0 else None
+        logger.info(f"Screen set to: {self._screen_index}")
+        self._reset_frame_source()
+        self._resize_frame_pool()
+        self.screenChanged.emit()
+        
+    def set_shared_start(self, start_time):
+        """Anchor frame 0 at this time.monotonic() value, so streams recorded
+        together share frame deadlines and timestamps. None anchors at start."""
+        self._shared_start = start_time
+        
+    @Slot(str)
+    def set_replay_file(self, path: str):
+        """Record from a video file instead of the screen."""
+        self._replay_path = path
+        self.set_frame_source(FILE)
+        
+    @Slot(str)
+    def set_backpressure_policy(self, policy: str):
+        """Set what happens when the frame queue is full: block, drop_oldest or drop_newest."""
+        if policy not in BACKPRESSURE_POLICIES:
+            self.errorOccurred.emit(f"Unknown backpressure policy: {policy}")
+            return
+        self._backpressure = policy
+        logger.info(f"Backpressure policy set to: {policy}")
+        self.queueStatsChanged.emit()
+        
+    @Slot(int)
+    def set_queue_capacity(self, capacity: int):
+        """Set the number of frames buffered between capture and encoding."""
+        self._queue_capacity = max(1, capacity)
+        logger.info(f"Frame queue capacity set to: {self._queue_capacity}")
+        self.queueStatsChanged.emit()
+        
+    @Slot(int)
+    def set_encoder_threads(self, count: int):
+        """Set the number of encoder threads draining the frame queue."""
+        self._encoder_count = max(1, count)
+        logger.info(f"Encoder threads set to: {self._encoder_count}")
+        
+    @Slot(str)
+    def set_encoder_backend(self, backend: str):
+        """Select how frames are encoded.
+        
+        opencv: cv2.VideoWriter in this process
+        gstreamer: auto-selected GStreamer encoder through appsrc
+        tiles: lossless tile-delta intermediate format
+        processes: OpenCV in worker processes, segment-parallel
+        spool: raw frames to a memory-mapped spool, encoded after stopping
+        """
+        if backend not in self.ENCODER_BACKENDS:
+            self.errorOccurred.emit(f"Unknown encoder backend: {backend}")
+            return
+        self._encoder_backend = backend
+        logger.info(f"Encoder backend set to: {backend}")
+        if backend == 'gstreamer':
+            self.probe_encoders_async()
+        
+    @classmethod
+    def probe_encoders_async(cls, force: bool = False, on_done=None):
+        """Probe GStreamer encoders on a worker thread, unless done or under way.
+        
+        Probing encodes a test clip with every encoder and can take seconds,
+        so it runs ahead of time rather than when recording starts. force
+        ignores the cached results. on_done is called, from the probing
+        thread, once results or an error are in.
+        """
+        with cls._probe_lock:
+            done = cls._probed_encoders is not None and not force
+            if not done:
+                if on_done is not None:
+                    cls._probe_callbacks.append(on_done)
+                if not (cls._probe_thread and cls._probe_thread.is_alive()):
+                    cls._probe_error = None
+                    cls._probe_thread = threading.Thread(
+                        target=cls._probe_encoders, args=(force,), name="encoder-probe", daemon=True
+                    )
+                    cls._probe_thread.start()
+        if done and on_done is not None:
+            on_done()
+            
+    @classmethod
+    def _probe_encoders(cls, force: bool = False):
+        try:
+            # Imported here so GStreamer stays optional for the OpenCV path
+            from .encoder_select import probe_encoders
+            cls._probed_encoders = probe_encoders(force=force)
+        except Exception as e:
+            logger.error(f"Error probing GStreamer encoders: {str(e)}")
+            cls._probe_error = str(e)
+        with cls._probe_lock:
+            callbacks, cls._probe_callbacks = cls._probe_callbacks, []
+        for callback in callbacks:
+            callback()
+            
+    def _encoders_ready(self):
+        """Whether the gstreamer backend can open a writer without probing first."""
+        if self._encoder_backend != 'gstreamer' or self._replay_seconds > 0:
+            return True
+        if self._probed_encoders is not None:
+            return True
+        error = self._probe_error
+        self.probe_encoders_async()
+        if error:
+            self.errorOccurred.emit(f"GStreamer encoders are not available: {error}")
+        else:
+            self.errorOccurred.emit("GStreamer encoders are still being probed, try again in a moment")
+        return False
+        
+    @Slot(int)
+    def set_encode_processes(self, count: int):
+        """Number of worker processes for the processes and spool backends, 0 for automatic."""
+        self._encode_processes = max(0, count)
+        logger.info(f"Encode processes set to: {self._encode_processes or 'auto'}")
+        
+    @Slot(float, float)
+    def set_segmenting(self, seconds: float, max_mb: float):
+        """Roll over to a new segment every seconds or max_mb; 0 and 0 disables."""
+        self._segment_seconds = max(0.0, seconds)
+        self._segment_mb = max(0.0, max_mb)
+        logger.info(f"Segmenting set to: {self._segment_seconds}s / {self._segment_mb} MB")
+        
+    @Slot(float, float)
+    def set_replay_buffer(self, seconds: float, max_mb: float):
+        """Record into an in-memory ring of the last seconds, capped at max_mb; 0 seconds disables.
+        
+        Nothing is written to disk until save_replay() is called.
+        """
+        self._replay_seconds = max(0.0, seconds)
+        self._replay_mb = max(1.0, max_mb)
+        logger.info(f"Replay buffer set to: {self._replay_seconds}s / {self._replay_mb} MB")
+        if self._replay_seconds == 0 and not self._recording:
+            self._drop_replay_buffer()
+            
+    def _drop_replay_buffer(self):
+        """Free the replay kept from the last recording."""
+        if self._replay_buffer is not None:
+            self._replay_buffer.clear()
+            self._replay_buffer = None
+            self.queueStatsChanged.emit()
+        
+    @Slot()
+    @Slot(str)
+    def save_replay(self, path: str = None):
+        """Write the instant replay buffer to a tile stream file.
+        
+        Capture keeps running; after stopping, the last replay can still be
+        saved until the next recording starts.
+        """
+        buffer = self._replay_buffer
+        if buffer is None:
+            self.errorOccurred.emit("There is no instant replay to save")
+            return
+        if not path:
+            path = str(Path.home() / f"CaptureStudio_Replay_{int(time.time())}{TILE_EXTENSION}")
+        self._ensure_output_directory(path)
+        threading.Thread(
+            target=self._save_replay, args=(buffer, path), name="replay-save", daemon=True
+        ).start()
+        
+    def _save_replay(self, buffer, path):
+        try:
+            path = buffer.save(path)
+        except Exception as e:
+            logger.error(f"Error saving replay: {str(e)}")
+            self.errorOccurred.emit(str(e))
+            return
+        logger.info(f"Saved instant replay to {path}")
+        self.replaySaved.emit(path)
+        
+    @Slot(bool)
+    def set_keep_segments(self, keep: bool):
+        """Keep segment files after they have been joined into one recording."""
+        self._keep_segments = bool(keep)
+        
+    @Slot(str)
+    def set_telemetry_dump(self, path: str):
+        """Dump telemetry every second: Prometheus text for .prom, else JSON lines."""
+        self._telemetry_dump_path = path or None
+        logger.info(f"Telemetry dump set to: {self._telemetry_dump_path}")
+        
+    @Slot(int)
+    def set_bitrate(self, kbps: int):
+        """Target bitrate for the GStreamer encoder backend."""
+        self._bitrate_kbps = max(100, kbps)
+        logger.info(f"Target bitrate set to: {self._bitrate_kbps} kbps")
+        
+    @Slot(bool)
+    def set_damage_tracking(self, enabled: bool):
+        """Skip converting and re-encoding frames in which no tile changed."""
+        self._damage_tracking = bool(enabled)
+        logger.info(f"Damage tracking {'enabled' if enabled else 'disabled'}")
+        self.queueStatsChanged.emit()
+        
+    @Slot(str)
+    def set_catch_up_policy(self, policy: str):
+        """Set how missed frame slots are handled: skip or duplicate."""
+        if policy not in CATCH_UP_POLICIES:
+            self.errorOccurred.emit(f"Unknown catch-up policy: {policy}")
+            return
+        self._catch_up = policy
+        logger.info(f"Catch-up policy set to: {policy}")
+        
+    @Slot(int, int)
+    def set_output_size(self, width: int, height: int):
+        """Scale recordings to this size; 0 for one dimension keeps the aspect ratio, 0, 0 the capture size."""
+        if self._recording:
+            self.errorOccurred.emit("Cannot change the output size while recording")
+            return
+        self._output_size = (max(0, width), max(0, height))
+        logger.info(f"Output size set to: {self._output_size}")
+        self._resize_frame_pool()
+        
+    @Slot('QVariant')
+    def set_crop(self, area):
+        """Crop captured frames to this QRect, relative to the captured area; None disables."""
+        if self._recording:
+            self.errorOccurred.emit("Cannot change the crop while recording")
+            return
+        if area and isinstance(area, QRect) and area.isValid():
+            self._crop = (area.x(), area.y(), area.width(), area.height())
+        else:
+            self._crop = None
+        try:
+            self._resize_frame_pool()
+        except ValueError as e:
+            self._crop = None
+            self.errorOccurred.emit(str(e))
+            return
+        logger.info(f"Crop set to: {self._crop}")
+        
+    @Slot(str)
+    def set_interpolation(self, name: str):
+        """Scaling filter: nearest, linear, area, cubic or lanczos."""
+        if name not in INTERPOLATIONS:
+            self.errorOccurred.emit(f"Unknown interpolation: {name}")
+            return
+        self._interpolation = name
+        logger.info(f"Interpolation set to: {name}")
+        
+    @Slot(str)
+    def set_colorspace(self, colorspace: str):
+        """Output colours: bgr, gray for grayscale recordings, or i420/nv12.
+        
+        i420 and nv12 hand the encoder planar YUV 4:2:0, 1.5 bytes per pixel
+        instead of 3, and need the gstreamer backend.
+        """
+        if colorspace not in COLORSPACES:
+            self.errorOccurred.emit(f"Unknown colorspace: {colorspace}")
+            return
+        self._colorspace = colorspace
+        logger.info(f"Colorspace set to: {colorspace}")
+        
+    @Slot(bool)
+    def set_adaptive_quality(self, enabled: bool):
+        """Lower the capture rate under sustained load, and restore it after."""
+        self._adaptive_quality = bool(enabled)
+        logger.info(f"Adaptive quality {'enabled' if enabled else 'disabled'}")
+        self.qualityChanged.emit()
         
-        if self._capture_area and self._capture_area.isValid():
-            return screen.grabWindow(0, self._capture_area.x(), 
-                                   self._capture_area.y(),
-                                   self._capture_area.width(), 
-                                   self._capture_area.height())
-        return screen.grabWindow(0)
-        
-    def _qimage_to_numpy(self, qimage):
-        """Convert QImage to numpy array."""
-        # Convert the QImage to RGB888 format
-        img_rgb = qimage.convertToFormat(QImage.Format_RGB888)
-        width = img_rgb.width()
-        height = img_rgb.height()
-        
-        # Create a numpy array from the QImage data using buffer protocol
-        ptr = img_rgb.constBits()
-        # Create a memoryview and get its size
-        view = memoryview(ptr).tobytes()
-        
-        # Reshape the raw data into an image array
-        arr = np.frombuffer(view, dtype=np.uint8).reshape((height, width, 3))
-        return cv2.cvtColor(arr, cv2.COLOR_RGB2BGR)
+    @Slot(float)
+    def set_quality_bounds(self, min_fps: float):
+        """Lowest capture rate adaptive quality may step down to."""
+        self._quality_bounds = QualityBounds(max(1.0, min_fps))
+        logger.info(f"Adaptive quality bounds set to: {self._quality_bounds}")
+        
+    @Slot(int)
+    def set_yuv_threads(self, count: int):
+        """Threads converting row bands of each frame to I420/NV12, 1 for none."""
+        self._yuv_threads = max(1, count)
+        logger.info(f"YUV conversion threads set to: {self._yuv_threads}")
+        
+    def _make_transform(self, width, height):
+        """The crop/scale/colour stage for frames of this capture size."""
+        return FrameTransform(
+            (width, height), self._output_size, self._crop, self._interpolation, self._colorspace,
+            self._yuv_threads
+        )
+        
+    @staticmethod
+    def _pool_geometry(transform):
+        """FramePool width, height and channels for the frames a transform produces."""
+        shape = transform.output_shape
+        if len(shape) == 2:
+            # Planar YUV is one byte deep, 1.5 rows of bytes per image row
+            return shape[1], shape[0], 1
+        return shape[1], shape[0], shape[2]
+        
+    def _get_frame_source(self):
+        """The frame source for the current selection, built on first use."""
+        if self._frame_source is None:
+            window = self._selected_window['handle'] if self._selected_window else None
+            self._frame_source = create_source(
+                self._source_kind, self._capture_area, window, self._replay_path, self._fps,
+                self._screen_index
+            )
+        return self._frame_source
+        
+    def use_frame_source(self, source):
+        """Record from a FrameSource instance, e.g. a configured SyntheticSource."""
+        if self._recording:
+            logger.warning("Cannot change the frame source while recording")
+            return
+        self._reset_frame_source()
+        self._frame_source = source
+        self._resize_frame_pool()
+        
+    @Slot('QVariant')
+    def set_scene(self, config):
+        """Record a composited scene of several sources; None returns to the selected source.
+        
+        config is the plain description build_scene() takes: output width
+        and height, background, and the layers bottom first.
+        """
+        if self._recording:
+            self.errorOccurred.emit("Cannot change the scene while recording")
+            return
+        if not config:
+            self._reset_frame_source()
+            logger.info("Scene cleared")
+            return
+        try:
+            scene = build_scene(dict(config))
+        except Exception as e:
+            logger.error(f"Error building scene: {str(e)}")
+            self.errorOccurred.emit(str(e))
+            return
+        self.use_frame_source(SceneSource(scene))
+        
+    def _reset_frame_source(self):
+        """Drop the current source; a running recording keeps its own."""
+        if self._recording:
+            return
+        if self._frame_source:
+            self._frame_source.close()
+        self._frame_source = None
+        
+    def _qimage_to_numpy(self, qimage, out=None):
+        """Convert QImage to a BGR numpy array with a single copy."""
+        return bgra_to_bgr(qimage_to_bgra(qimage), out)
+        
+    def _capture_size(self):
+        """Width and height of the frames the current selection produces."""
+        return self._get_frame_source().size()
+        
+    def _resize_frame_pool(self):
+        """Reallocate pooled frame buffers if the capture size changed."""
+        if self._frame_pool is None or self._recording:
+            return  # A running recording keeps the geometry it started with
+        transform = self._make_transform(*self._capture_size())
+        width, height, channels = self._pool_geometry(transform)
+        transform.close()
+        if channels != self._frame_pool.channels:
+            return  # Reallocated when the next recording starts
+        if self._frame_pool.resize(width, height):
+            self.memoryStatsChanged.emit()
         
     def _ensure_output_directory(self, path):
         """Ensure the output directory exists."""
         output_dir = Path(path).parent
         output_dir.mkdir(parents=True, exist_ok=True)
         
+    def _open_video_writer(self, output_path, width, height):
+        """Open a writer, segmented if segmenting is enabled.
+        
+        Returns the writer and the path of the final recording, which is
+        None for the instant replay buffer.
+        """
+        if self._colorspace in YUV_FORMATS and (
+                self._replay_seconds > 0 or self._encoder_backend != 'gstreamer'):
+            raise Exception(f"{self._colorspace.upper()} output needs the gstreamer encoder backend")
+        if self._replay_seconds > 0:
+            # Replay keeps tile-compressed frames in memory whatever the backend
+            if self._encoder_backend != 'opencv':
+                logger.warning(f"The {self._encoder_backend} encoder backend is not used "
+                               f"for the instant replay buffer")
+            if self._segment_seconds > 0 or self._segment_mb > 0:
+                logger.warning("Segmenting is not used with the instant replay buffer")
+            self._replay_buffer = ReplayBuffer(
+                width, height, self._fps, self._replay_seconds, self._replay_mb
+            )
+            return self._replay_buffer, None
+        segmenting = self._segment_seconds > 0 or self._segment_mb > 0
+        if segmenting and self._encoder_backend in ('spool', 'processes'):
+            # Both cut and join segments themselves; rolling over would also
+            # start a new process pool at every segment boundary
+            logger.info(f"Segmenting is not used with the {self._encoder_backend} backend")
+        elif segmenting:
+            writer = SegmentedWriter(
+                output_path, self._fps,
+                lambda path: self._open_backend_writer(path, width, height),
+                segment_seconds=self._segment_seconds,
+                segment_mb=self._segment_mb,
+                on_segment=self.segmentFinished.emit,
+            )
+            return writer, writer.path
+        return self._open_backend_writer(output_path, width, height)
+        
+    def _open_backend_writer(self, output_path, width, height):
+        """Open a writer for the configured backend.
+        
+        Returns the writer and the path it actually writes to, since the
+        extension depends on the codec that could be opened.
+        """
+        if self._encoder_backend == 'gstreamer':
+            # Imported here so GStreamer stays optional for the OpenCV path
+            from .encoder_select import EncoderProfile, select_encoder
+            from .gst_writer import AppSrcWriter
+            if self._probed_encoders is None:
+                raise Exception("GStreamer encoders have not been probed yet")
+            profile = EncoderProfile(
+                width=width, height=height, fps=self._fps, bitrate_kbps=self._bitrate_kbps
+            )
+            spec = select_encoder(self._probed_encoders, profile)
+            path = str(Path(output_path).with_suffix(spec.extension))
+            pixel_format = GST_FORMATS.get(self._colorspace, 'BGR')
+            return AppSrcWriter(path, spec, profile, pixel_format), path
+            
+        if self._encoder_backend == 'tiles':
+            path = str(Path(output_path).with_suffix(TILE_EXTENSION))
+            return TileStreamWriter(path, width, height, self._fps), path
+            
+        if self._encoder_backend == 'spool':
+            writer = SpoolWriter(output_path, width, height, self._fps)
+            self._spool_path = writer.path
+            return writer, str(Path(output_path).with_suffix('.avi'))
+            
+        if self._encoder_backend == 'processes':
+            return ProcessEncodeWriter(
+                output_path, width, height, self._fps,
+                workers=self._encode_processes, codecs=self.VIDEO_CODECS
+            ), str(Path(output_path).with_suffix('.avi'))
+            
+        # Try different codecs if the first one fails
+        return open_opencv_writer(output_path, self._fps, width, height, self.VIDEO_CODECS)
+        
     @Slot(str, result=None)
     def start_recording(self, output_path: str = None):
         """Start screen recording."""
@@ -139,6 +808,12 @@ class CaptureManager(QObject):
         if self._recording:
             logger.info("Already recording, ignoring start request")
             return
+        if self._finalizing or (self._recording_thread and self._recording_thread.is_alive()):
+            self.errorOccurred.emit("The previous recording is still being saved")
+            return
+        if not self._encoders_ready():
+            return
+        self._drop_replay_buffer()
             
         try:
             if not output_path:
@@ -147,47 +822,87 @@ class CaptureManager(QObject):
             self._output_path = output_path
             self._ensure_output_directory(output_path)
                 
-            # Get screen dimensions
-            screen = QGuiApplication.primaryScreen()
-            if self._capture_area and self._capture_area.isValid():
-                width = self._capture_area.width()
-                height = self._capture_area.height()
-            else:
-                geometry = screen.geometry()
-                width = geometry.width()
-                height = geometry.height()
+            # Get frame dimensions
+            source = self._get_frame_source()
+            width, height = source.size()
                 
-            logger.info(f"Setting up recording with dimensions: {width}x{height}")
+            self._transform = self._make_transform(width, height)
+            out_width, out_height = self._transform.output_size
+            if (out_width, out_height) != (width, height):
+                logger.info(f"Setting up recording with dimensions: {width}x{height} "
+                            f"scaled to {out_width}x{out_height}")
+            else:
+                logger.info(f"Setting up recording with dimensions: {width}x{height}")
             
-            # Try different codecs if the first one fails
-            codecs = ['DIVX', 'XVID', 'MJPG']
-            for codec in codecs:
-                try:
-                    fourcc = cv2.VideoWriter_fourcc(*codec)
-                    test_path = str(Path(output_path).with_suffix('.avi'))
-                    self._video_writer = cv2.VideoWriter(
-                        test_path, fourcc, self._fps, (width, height)
-                    )
-                    if self._video_writer.isOpened():
-                        self._output_path = test_path
-                        break
-                except Exception as e:
-                    logger.warning(f"Codec {codec} failed: {str(e)}")
-                    if self._video_writer:
-                        self._video_writer.release()
-                    continue
+            self._video_writer, self._output_path = self._open_video_writer(
+                output_path, out_width, out_height
+            )
             
-            if not self._video_writer or not self._video_writer.isOpened():
-                raise Exception("Failed to initialize video writer with any supported codec")
+            self._frame_queue = FrameQueue(self._queue_capacity, self._backpressure,
+                                           on_drop=self._release_grab)
+            self._scheduler = FrameScheduler(self._fps, self._catch_up)
+            if self._output_path:
+                self._timecodes = TimecodeWriter(timecodes_path(self._output_path))
+            self._frames_dequeued = 0
+            self._next_write = 0
+            self._frames_written = 0
+            self._pipeline_failed = False
+            self._repeated_frames = 0
+            if self._damage_tracking:
+                self._tile_diff = TileDiff(self._damage_tile_size, keep_copy=not source.fresh_buffers)
+            else:
+                self._tile_diff = None
+            self._telemetry = Telemetry(self._fps)
+            self._capture_step = 1
+            self._quality = QualityController(self._fps, self._quality_bounds) \
+                if self._adaptive_quality else None
+            self._cpu_meter = CpuMeter(self._pipeline_threads) if self._quality else None
+            self._encode_seen = (0, 0.0)
+            self._next_quality_sample = time.monotonic() + self.QUALITY_INTERVAL
+            if self._telemetry_dump_path:
+                self._telemetry_dump = TelemetryDump(self._telemetry_dump_path)
             
+            # One buffer per encoder in flight plus spares for the writer
+            pool_size = self._encoder_count + 2
+            pool_width, pool_height, channels = self._pool_geometry(self._transform)
+            if (self._frame_pool is None or self._frame_pool.count != pool_size
+                    or self._frame_pool.channels != channels):
+                self._frame_pool = FramePool(pool_width, pool_height, channels, count=pool_size)
+            else:
+                self._frame_pool.resize(pool_width, pool_height)
+            if source.fresh_buffers:
+                self._grab_pool = None
+            else:
+                # Every queued frame and one per encoder needs its own copy
+                self._grab_pool = FramePool(
+                    width, height, channels=source.channels, count=self._queue_capacity + pool_size
+                )
+            self._peak_memory.reset()
+            self.memoryStatsChanged.emit()
+            
+            source.open()
+            self._preview.reset()
             self._recording = True
             logger.info("Recording started successfully")
             self.recordingChanged.emit(True)
-            logger.info(f"Started recording to {self._output_path}")
+            self.queueStatsChanged.emit()
+            if self._replay_buffer is not None:
+                logger.info(f"Started recording into the instant replay buffer "
+                            f"({self._replay_seconds}s, {self._replay_mb} MB)")
+            else:
+                logger.info(f"Started recording to {self._output_path}")
+            
+            # Encoder threads drain the queue so that encoder stalls never
+            # hold up the capture thread
+            self._encoder_threads = []
+            for index in range(self._encoder_count):
+                thread = threading.Thread(target=self._encode_loop, name=f"encoder-{index}")
+                thread.daemon = True
+                thread.start()
+                self._encoder_threads.append(thread)
             
-            # Start the recording loop in a separate thread
-            from threading import Thread
-            self._recording_thread = Thread(target=self._record_loop)
+            # Start the capture loop in a separate thread
+            self._recording_thread = threading.Thread(target=self._record_loop, name="capture")
             self._recording_thread.daemon = True  # Make thread daemon so it doesn't block program exit
             self._recording_thread.start()
             
@@ -197,66 +912,394 @@ class CaptureManager(QObject):
             self._cleanup()
             
     def _record_loop(self):
-        """Main recording loop."""
+        """Capture loop: grabs frames into the queue, encoding happens on the encoder threads."""
         logger.info("Recording loop started")
-        frames_written = 0
+        frames_captured = 0
+        scheduler = self._scheduler
+        telemetry = self._telemetry
+        source = self._frame_source
+        frame_interval = 1.0 / self._fps
+        next_stats = time.monotonic() + self.STATS_INTERVAL
         try:
+            scheduler.start(self._shared_start)
             while self._recording:
-                # Capture frame
-                pixmap = self._grab_screen()
-                image = pixmap.toImage()
+                # Wait for the next absolute frame deadline
+                started = time.perf_counter()
+                tick = scheduler.wait_next()
+                telemetry.record(SLEEP, time.perf_counter() - started)
+                telemetry.record(JITTER, time.monotonic() - tick.deadline)
+                if not self._recording:
+                    break
+                    
+                if tick.missed and scheduler.catch_up == DUPLICATE:
+                    # Fill the slots we fell behind on with the last frame
+                    for index in range(tick.index - tick.missed, tick.index):
+                        self._frame_queue.put(QueuedFrame.repeat_of_previous(scheduler.pts(index)))
+                if tick.index % self._capture_step:
+                    # Adaptive quality lowered the capture rate; fill the slot like a missed one
+                    if scheduler.catch_up == DUPLICATE:
+                        self._frame_queue.put(QueuedFrame.repeat_of_previous(tick.pts))
+                    continue
                 
+                # Capture frame
+                started = time.perf_counter()
                 try:
-                    # Convert QImage to numpy array and write frame
-                    frame = self._qimage_to_numpy(image)
-                    
-                    if self._video_writer and self._video_writer.isOpened():
-                        self._video_writer.write(frame)
-                        frames_written += 1
-                    else:
-                        raise Exception("Video writer closed unexpectedly")
-                except Exception as e:
-                    logger.error(f"Error processing frame: {str(e)}")
-                    raise
+                    native = source.grab()
+                except SourceExhausted as e:
+                    logger.info(str(e))
+                    break
+                grabbed = time.perf_counter()
+                pixels = source.to_bgra(native)
+                converted = time.perf_counter()
+                self._preview.offer(pixels)
+                queued = self._make_queued_frame(pixels, tick.pts)
+                if self._grab_pool is not None and not queued.repeat:
+                    # The source overwrites its buffer on the next grab
+                    detaching = time.perf_counter()
+                    queued.pixels = self._grab_pool.acquire()
+                    np.copyto(queued.pixels, pixels)
+                    converted += time.perf_counter() - detaching
+                telemetry.record(GRAB, grabbed - started)
+                telemetry.record(TO_IMAGE, converted - grabbed)
                 
-                # Control FPS
-                time.sleep(1/self._fps)
+                if self._frame_queue.put(queued):
+                    frames_captured += 1
+                    telemetry.count('captured')
+                else:
+                    self._release_grab(queued)
+                if time.monotonic() - tick.deadline > frame_interval:
+                    # Captured after the following slot was already due
+                    telemetry.count('late')
+                if self._quality is not None:
+                    self._adapt_quality()
+                if time.monotonic() >= next_stats:
+                    next_stats = time.monotonic() + self.STATS_INTERVAL
+                    self._peak_memory.sample()
+                    self._publish_telemetry()
+                    self.queueStatsChanged.emit()
+                    self.memoryStatsChanged.emit()
                 
         except Exception as e:
             logger.error(f"Error in recording loop: {str(e)}")
             self.errorOccurred.emit(str(e))
         finally:
-            logger.info(f"Recording loop ended. Frames written: {frames_written}")
+            # Let the encoders drain what is already queued
+            self._frame_queue.close()
+            for thread in self._encoder_threads:
+                thread.join()
+            frames_written = self._frames_written
+            logger.info(
+                f"Recording loop ended. Frames captured: {frames_captured}, "
+                f"written: {frames_written}, dropped: {self._frame_queue.dropped}, "
+                f"missed slots: {scheduler.missed_frames}, "
+                f"unchanged repeats: {self._repeated_frames}, "
+                f"peak queue depth: {self._frame_queue.peak_depth}"
+            )
+            telemetry.stop()
+            self._publish_telemetry()
+            logger.info(f"Telemetry: {telemetry.summary()}")
+            self._peak_memory.sample()
+            logger.info(
+                f"Session peak memory: {self._peak_memory.peak / (1024 * 1024):.1f} MB "
+                f"(baseline {self._peak_memory.baseline / (1024 * 1024):.1f} MB, "
+                f"frame pool misses: {self._frame_pool.misses})"
+            )
+            self.queueStatsChanged.emit()
+            self.memoryStatsChanged.emit()
+            # Closing the writer flushes the encoder and muxer
+            self._set_finalize_progress(self.FINALIZE_DRAIN_SHARE)
+            spool_path = self._spool_path
             self._cleanup()
-            if frames_written > 0:
-                self.captureComplete.emit(self._output_path)
+            self._end_finalizing()
+            if frames_written > 0 and self._output_path:
+                if spool_path:
+                    # captureComplete follows once the spool is encoded
+                    self._start_spool_encode(spool_path, self._output_path)
+                else:
+                    self.captureComplete.emit(self._output_path)
+                
+    def _start_spool_encode(self, spool_path, output_path):
+        """Encode a finished spool on a background thread; a new recording may start meanwhile."""
+        thread = threading.Thread(
+            target=self._encode_spool, args=(spool_path, output_path), name="spool-encode", daemon=True
+        )
+        with self._spool_lock:
+            self._spool_jobs.append(thread)
+        self._spool_progress = 0.0
+        self.spoolEncodingChanged.emit()
+        thread.start()
+        
+    def _encode_spool(self, spool_path, output_path):
+        try:
+            path = encode_spool(
+                spool_path, output_path, workers=self._encode_processes,
+                codecs=self.VIDEO_CODECS, on_progress=self._set_spool_progress
+            )
+            if path:
+                logger.info(f"Encoded spool {spool_path} to {path}")
+                self.captureComplete.emit(path)
+            else:
+                self.errorOccurred.emit(f"Encoded segments could not be joined; spool kept at {spool_path}")
+        except Exception as e:
+            logger.error(f"Error encoding spool: {str(e)}")
+            self.errorOccurred.emit(str(e))
+        finally:
+            with self._spool_lock:
+                self._spool_jobs.remove(threading.current_thread())
+            self._spool_progress = 1.0
+            self.spoolEncodingChanged.emit()
+            
+    def _set_spool_progress(self, progress):
+        # Only report whole percents so long encodes do not flood the GUI
+        if int(progress * 100) != int(self._spool_progress * 100):
+            self._spool_progress = progress
+            self.spoolEncodingChanged.emit()
+            
+    def wait_spool_encodes(self, timeout=None) -> bool:
+        """Wait for running spool encode jobs. Returns False on timeout."""
+        with self._spool_lock:
+            jobs = list(self._spool_jobs)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for thread in jobs:
+            thread.join(None if deadline is None else max(0.0, deadline - time.monotonic()))
+        return not any(thread.is_alive() for thread in jobs)
+        
+    def _pipeline_threads(self):
+        return [self._recording_thread, *self._encoder_threads]
+        
+    def _adapt_quality(self):
+        """Sample the pipeline load once per interval and apply quality changes."""
+        now = time.monotonic()
+        if now < self._next_quality_sample:
+            return
+        self._next_quality_sample = now + self.QUALITY_INTERVAL
+        stage = self._telemetry.stage(ENCODE)
+        count, total = stage.count, stage.total
+        seen_count, seen_total = self._encode_seen
+        self._encode_seen = (count, total)
+        written = count - seen_count
+        load = PipelineLoad(
+            encode=(total - seen_total) / written * self._fps if written else 0.0,
+            queue=self._frame_queue.depth / max(1, self._frame_queue.capacity),
+            cpu=self._cpu_meter.sample(),
+        )
+        level = self._quality.sample(load)
+        if level is None:
+            return
+        self._capture_step = max(1, round(self._fps / level.fps))
+        logger.info(
+            f"Adaptive quality: capturing {level.fps:g} fps (writer {load.encode:.0%} of "
+            f"frame time, queue {load.queue:.0%}, busiest thread {load.cpu:.0%} CPU)"
+        )
+        self.qualityChanged.emit()
+        
+    def _publish_telemetry(self):
+        """Fold queue and scheduler counters into the telemetry and publish it."""
+        telemetry = self._telemetry
+        telemetry.set_count('dropped', self._frame_queue.dropped)
+        telemetry.set_count('missed', self._scheduler.missed_frames)
+        if self._telemetry_dump:
+            try:
+                self._telemetry_dump.dump(telemetry)
+            except OSError as e:
+                logger.error(f"Telemetry dump failed: {str(e)}")
+        self.telemetryChanged.emit()
+        
+    def _release_grab(self, queued):
+        """Return the grab pool copy of a frame that will not be encoded."""
+        if self._grab_pool is not None:
+            self._grab_pool.release(queued.pixels)
+        
+    def _make_queued_frame(self, pixels, pts):
+        """Wrap a grabbed frame for the queue, as a repeat if nothing changed."""
+        if self._tile_diff is None:
+            return QueuedFrame(pixels, pts)
+        mask = self._tile_diff.update(pixels)
+        if not mask.any():
+            self._repeated_frames += 1
+            return QueuedFrame.repeat_of_previous(pts)
+        return QueuedFrame(pixels, pts)
+        
+    def _encode_loop(self):
+        """Encoder loop: converts queued frames and writes them in capture order."""
+        while True:
+            with self._read_lock:
+                queued = self._frame_queue.get()
+                if queued is None:
+                    break
+                seq = self._frames_dequeued
+                self._frames_dequeued += 1
+                
+            frame = None
+            buffer = None
+            if not self._pipeline_failed and not queued.repeat:
+                try:
+                    # Conversion runs in parallel across encoder threads
+                    started = time.perf_counter()
+                    transform = self._transform
+                    if not transform.identity or self._frame_pool.fits(queued.pixels):
+                        buffer = self._frame_pool.acquire()
+                    frame = transform.apply(queued.pixels, buffer)
+                    self._telemetry.record(CONVERT, time.perf_counter() - started)
+                except Exception as e:
+                    logger.error(f"Error processing frame: {str(e)}")
+                    self._abort_pipeline(str(e))
+            self._release_grab(queued)
+            buffer = self._write_in_order(seq, queued, frame, buffer)
+            self._frame_pool.release(buffer)
+            
+    def _write_in_order(self, seq, queued, frame, buffer):
+        """Write a converted frame once all frames captured before it are written.
+        
+        Repeats re-write the last written frame. The buffer of the last
+        written frame is kept for that purpose; the buffer it replaces is
+        returned to the caller for release.
+        """
+        with self._write_cond:
+            while self._next_write != seq:
+                self._write_cond.wait()
+            try:
+                if queued.repeat:
+                    frame = self._last_frame
+                if frame is not None and not self._pipeline_failed:
+                    if self._video_writer and self._video_writer.isOpened():
+                        started = time.perf_counter()
+                        self._video_writer.write(frame)
+                        self._telemetry.record(ENCODE, time.perf_counter() - started)
+                        if self._timecodes:
+                            self._timecodes.write(queued.pts)
+                        self._frames_written += 1
+                        self._telemetry.count('written')
+                        if self._finalizing:
+                            self._report_drain_progress()
+                    else:
+                        raise Exception("Video writer closed unexpectedly")
+                    if not queued.repeat:
+                        self._last_frame = frame
+                        self._last_buffer, buffer = buffer, self._last_buffer
+            except Exception as e:
+                logger.error(f"Error writing frame: {str(e)}")
+                self._abort_pipeline(str(e))
+            finally:
+                self._next_write += 1
+                self._write_cond.notify_all()
+        return buffer
+                
+    def _abort_pipeline(self, error: str):
+        """Stop capturing after an unrecoverable encoder error."""
+        if self._pipeline_failed:
+            return
+        self._pipeline_failed = True
+        self._recording = False
+        self._frame_queue.close()
+        self.errorOccurred.emit(error)
             
     @Slot(result=None)
     def stop_recording(self):
-        """Stop screen recording."""
+        """Stop screen recording without blocking the GUI thread.
+        
+        The capture thread drains the queue and closes the writer;
+        finalizeProgressChanged reports progress, and finalizingChanged(False)
+        followed by captureComplete signals that the file is ready.
+        """
         logger.info("Stop recording called")
         if not self._recording:
             logger.info("Not recording, ignoring stop request")
             return
             
-        try:
-            self._recording = False
-            if self._recording_thread:
-                logger.info("Waiting for recording thread to finish...")
-                self._recording_thread.join(timeout=5.0)  # Wait up to 5 seconds
-            self._cleanup()
-            logger.info("Recording stopped successfully")
-            
-        except Exception as e:
-            logger.error(f"Error stopping recording: {str(e)}")
-            self.errorOccurred.emit(str(e))
+        if self._recording_thread is None or not self._recording_thread.is_alive():
             self._cleanup()
-            
+            return
+        self._begin_finalizing()
+        self.request_stop()
+        self.recordingChanged.emit(False)
+        logger.info("Recording stopped, finalizing in the background")
+        
+    def _begin_finalizing(self):
+        with self._write_cond:
+            self._finalize_from = self._next_write
+        self._finalize_progress = 0.0
+        self._finalizing = True
+        self.finalizingChanged.emit(True)
+        self.finalizeProgressChanged.emit()
+        
+    def _report_drain_progress(self):
+        """Progress of writing the frames queued at stop; called under the write lock."""
+        queued = self._frames_dequeued + self._frame_queue.depth - self._finalize_from
+        done = self._next_write + 1 - self._finalize_from
+        progress = self.FINALIZE_DRAIN_SHARE * min(1.0, done / max(1, queued))
+        # Only report whole percents so a long drain does not flood the GUI
+        if int(progress * 100) != int(self._finalize_progress * 100):
+            self._set_finalize_progress(progress)
+        
+    def _set_finalize_progress(self, progress):
+        if not self._finalizing:
+            return
+        self._finalize_progress = progress
+        self.finalizeProgressChanged.emit()
+        
+    def _end_finalizing(self):
+        if not self._finalizing:
+            return
+        self._set_finalize_progress(1.0)
+        self._finalizing = False
+        self.finalizingChanged.emit(False)
+        logger.info("Recording finalized")
+        
+    def request_stop(self):
+        """Stop capturing without waiting; the capture thread drains and cleans up."""
+        self._recording = False
+        
+    def wait(self, timeout=None) -> bool:
+        """Wait for the capture thread to finish. Returns False on timeout."""
+        thread = self._recording_thread
+        if thread is None:
+            return True
+        thread.join(timeout)
+        return not thread.is_alive()
+        
+    @property
+    def output_path(self):
+        """Path of the current or last recording."""
+        return self._output_path
+        
+    def _join_segments(self, writer):
+        """Join finished segments; falls back to reporting the manifest."""
+        joined = join_segments(writer.manifest, remove_segments=not self._keep_segments)
+        self._output_path = joined or writer.manifest
+        
     def _cleanup(self):
         """Clean up resources."""
         if self._video_writer:
             self._video_writer.release()
+            if isinstance(self._video_writer, SegmentedWriter):
+                self._join_segments(self._video_writer)
+            elif isinstance(self._video_writer, ProcessEncodeWriter) and not self._video_writer.joined:
+                # There is no recording to report, only its segments
+                self._output_path = None
+                self.errorOccurred.emit(
+                    f"Encoded segments could not be joined; segments kept in "
+                    f"{self._video_writer.segment_dir}"
+                )
             self._video_writer = None
+        if self._timecodes:
+            self._timecodes.close()
+            self._timecodes = None
+        self._spool_path = None
+        if self._transform:
+            self._transform.close()
+            self._transform = None
+        if self._frame_source:
+            self._frame_source.close()
+        self._grab_pool = None
+        if self._telemetry_dump:
+            self._telemetry_dump.close()
+            self._telemetry_dump = None
+        if self._frame_pool:
+            self._frame_pool.release(self._last_buffer)
+        self._last_frame = None
+        self._last_buffer = None
+        self._tile_diff = None
         self._recording = False
         self.recordingChanged.emit(False)
         logger.info("Cleanup completed") 
\ No newline at end of file
@@ -0,0 +1,350 @@
+"""
+Scene compositor: several sources blended into one output frame.
+
+A scene is a stack of layers, bottom first, each placed at an (x, y,
+width, height) rect of the output. SourceLayer shows a FrameSource (a
+screen region, a window, a video file standing in for a webcam);
+ImageLayer shows a still image, with its alpha channel. Layers can be
+made translucent with an opacity.
+
+Static work is done once when the scene opens: the background and every
+image layer below the first source are flattened into a base frame, and
+each run of image layers between sources is pre-blended into one
+premultiplied plate. Per frame, every source is grabbed and diffed tile by
+tile, and only the output tiles under changed source pixels are
+recomposited, from the base up through the stack. A mostly static scene
+therefore costs little more than its grabs.
+"""
+from typing import List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import cv2
+from loguru import logger
+from PySide6.QtCore import QRect
+
+from .damage import TileDiff
+from .frame_sources import (
+    FrameSource, QT, create_source, VideoFileSource, SyntheticSource
+)
+
+SCENE = 'scene'
+DEFAULT_TILE_SIZE = 64
+
+Rect = Tuple[int, int, int, int]
+
+
+def _intersect(a: Rect, b: Rect) -> Optional[Rect]:
+    x, y = max(a[0], b[0]), max(a[1], b[1])
+    right, bottom = min(a[0] + a[2], b[0] + b[2]), min(a[1] + a[3], b[1] + b[3])
+    if right <= x or bottom <= y:
+        return None
+    return x, y, right - x, bottom - y
+
+
+def _slices(rect: Rect, origin: Tuple[int, int] = (0, 0)):
+    """Row and column slices of rect relative to origin."""
+    x, y, w, h = rect
+    return slice(y - origin[1], y - origin[1] + h), slice(x - origin[0], x - origin[0] + w)
+
+
+class Layer:
+    """One element of a scene, placed at rect of the output frame."""
+
+    static = False
+
+    def __init__(self, rect: Rect, opacity: float = 1.0):
+        x, y, w, h = (int(value) for value in rect)
+        if w <= 0 or h <= 0:
+            raise ValueError(f"Layer rect must have a positive size, got {rect}")
+        self.rect = (x, y, w, h)
+        self.opacity = min(1.0, max(0.0, float(opacity)))
+
+    def open(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class ImageLayer(Layer):
+    """A still image, scaled to the layer rect; BGRA alpha is honoured."""
+
+    static = True
+
+    def __init__(self, image: Union[str, np.ndarray], rect: Rect, opacity: float = 1.0):
+        super().__init__(rect, opacity)
+        if isinstance(image, str):
+            path = image
+            image = cv2.imread(path, cv2.IMREAD_UNCHANGED)
+            if image is None:
+                raise Exception(f"Cannot read image: {path}")
+        if image.ndim == 2:
+            image = cv2.cvtColor(image, cv2.COLOR_GRAY2BGRA)
+        elif image.shape[2] == 3:
+            image = cv2.cvtColor(image, cv2.COLOR_BGR2BGRA)
+        width, height = self.rect[2:]
+        if image.shape[:2] != (height, width):
+            image = cv2.resize(image, (width, height), interpolation=cv2.INTER_AREA)
+        self.pixels = image
+
+    def coverage(self) -> np.ndarray:
+        """Per-pixel alpha times opacity, (height, width, 1) float32 in 0..1."""
+        return self.pixels[:, :, 3:4].astype(np.float32) * (self.opacity / 255.0)
+
+
+class SourceLayer(Layer):
+    """Frames from a FrameSource, scaled to the layer rect and treated as opaque."""
+
+    def __init__(self, source: FrameSource, rect: Rect, opacity: float = 1.0,
+                 tile_size: int = DEFAULT_TILE_SIZE):
+        super().__init__(rect, opacity)
+        self.source = source
+        width, height = self.rect[2:]
+        self._resize = source.size() != (width, height)
+        # Resized frames are new arrays; unscaled reused buffers must be copied
+        self._diff = TileDiff(tile_size, keep_copy=not self._resize and not source.fresh_buffers)
+        self.frame = None
+
+    def open(self):
+        self.source.open()
+        self._diff.reset()
+        self.frame = None
+
+    def close(self):
+        self.source.close()
+
+    def render(self) -> List[Rect]:
+        """Grab the next frame; returns the changed rects in layer coordinates."""
+        frame = self.source.to_bgra(self.source.grab())
+        if self._resize:
+            frame = cv2.resize(frame, self.rect[2:], interpolation=cv2.INTER_AREA)
+        mask = self._diff.update(frame)
+        self.frame = frame
+        return self._diff.dirty_rects(mask, *frame.shape[:2])
+
+    def blend(self, canvas: np.ndarray, region: Rect):
+        area = _intersect(region, self.rect)
+        if area is None or self.frame is None:
+            return
+        target = canvas[_slices(area)]
+        pixels = self.frame[_slices(area, self.rect[:2])][:, :, :3]
+        if self.opacity >= 1.0:
+            np.copyto(target, pixels)
+        else:
+            cv2.addWeighted(pixels, self.opacity, target, 1.0 - self.opacity, 0.0, dst=target)
+
+
+class _Plate:
+    """A run of image layers pre-blended into premultiplied colour and coverage."""
+
+    def __init__(self, layers: Sequence[ImageLayer], bounds: Rect):
+        rects = [_intersect(layer.rect, bounds) for layer in layers]
+        rects = [rect for rect in rects if rect is not None]
+        if not rects:
+            self.rect = None
+            return
+        x = min(rect[0] for rect in rects)
+        y = min(rect[1] for rect in rects)
+        right = max(rect[0] + rect[2] for rect in rects)
+        bottom = max(rect[1] + rect[3] for rect in rects)
+        self.rect = (x, y, right - x, bottom - y)
+        # Composite the run onto transparency: colour is premultiplied by
+        # coverage, and keep is how much of what lies beneath shows through
+        self._color = np.zeros((bottom - y, right - x, 3), dtype=np.float32)
+        self._keep = np.ones((bottom - y, right - x, 1), dtype=np.float32)
+        for layer in layers:
+            area = _intersect(layer.rect, self.rect)
+            if area is None:
+                continue
+            source = _slices(area, layer.rect[:2])
+            alpha = layer.coverage()[source]
+            color = self._color[_slices(area, self.rect[:2])]
+            keep = self._keep[_slices(area, self.rect[:2])]
+            color *= 1.0 - alpha
+            color += layer.pixels[source][:, :, :3] * alpha
+            keep *= 1.0 - alpha
+
+    def blend(self, canvas: np.ndarray, region: Rect):
+        area = _intersect(region, self.rect) if self.rect else None
+        if area is None:
+            return
+        target = canvas[_slices(area)]
+        local = _slices(area, self.rect[:2])
+        blended = self._color[local] + target * self._keep[local]
+        np.copyto(target, blended + 0.5, casting='unsafe')
+
+
+class SceneCompositor:
+    """Composites a stack of layers into BGR frames of width x height.
+
+    With dirty_regions=False every frame is recomposited in full, which is
+    only useful as a baseline for benchmarks.
+    """
+
+    def __init__(self, width: int, height: int, layers: Sequence[Layer],
+                 background: Tuple[int, int, int] = (0, 0, 0),
+                 tile_size: int = DEFAULT_TILE_SIZE, dirty_regions: bool = True):
+        self.width = width
+        self.height = height
+        self.layers = list(layers)
+        self._background = tuple(background)
+        self._tiles = TileDiff(tile_size)
+        self._dirty_regions = dirty_regions
+        self._sources = [layer for layer in self.layers if not layer.static]
+        self._base = None
+        self._stack = []
+        self._canvas = np.zeros((height, width, 3), dtype=np.uint8)
+        self._full = True
+        self.dirty_pixels = 0  # Pixels recomposited for the last frame
+
+    def _prerender(self):
+        """Flatten the static layers: a base frame, then plates between sources."""
+        bounds = (0, 0, self.width, self.height)
+        first_source = next(
+            (index for index, layer in enumerate(self.layers) if not layer.static), len(self.layers)
+        )
+        self._base = np.empty((self.height, self.width, 3), dtype=np.uint8)
+        self._base[:] = self._background
+        _Plate(self.layers[:first_source], bounds).blend(self._base, bounds)
+
+        self._stack = []
+        run = []
+        for layer in self.layers[first_source:]:
+            if layer.static:
+                run.append(layer)
+                continue
+            if run:
+                self._stack.append(_Plate(run, bounds))
+                run = []
+            self._stack.append(layer)
+        if run:
+            self._stack.append(_Plate(run, bounds))
+
+    def open(self):
+        for layer in self.layers:
+            layer.open()
+        self._prerender()
+        self._full = True
+
+    def close(self):
+        for layer in self.layers:
+            layer.close()
+
+    def compose(self) -> Tuple[np.ndarray, List[Rect]]:
+        """Render the next frame; returns the canvas and the rects that were redrawn.
+
+        The canvas is reused; copy it to keep a frame.
+        """
+        if self._base is None:
+            self.open()
+        rows, cols = self._tiles.grid_shape(self.height, self.width)
+        dirty = np.zeros((rows, cols), dtype=bool)
+        if self._full or not self._dirty_regions:
+            dirty[:] = True
+            self._full = False
+        tile = self._tiles.tile_size
+        bounds = (0, 0, self.width, self.height)
+        for layer in self._sources:
+            origin_x, origin_y = layer.rect[:2]
+            for x, y, w, h in layer.render():
+                area = _intersect((x + origin_x, y + origin_y, w, h), bounds)
+                if area is not None:
+                    x, y, w, h = area
+                    dirty[y // tile:(y + h - 1) // tile + 1, x // tile:(x + w - 1) // tile + 1] = True
+
+        rects = self._tiles.dirty_rects(dirty, self.height, self.width)
+        for rect in rects:
+            region = _slices(rect)
+            np.copyto(self._canvas[region], self._base[region])
+            for item in self._stack:
+                item.blend(self._canvas, rect)
+        self.dirty_pixels = sum(w * h for _x, _y, w, h in rects)
+        return self._canvas, rects
+
+
+class SceneSource(FrameSource):
+    """A SceneCompositor as a frame source, so a scene records like a screen."""
+
+    name = SCENE
+    fresh_buffers = False  # Frames are the compositor's reused canvas
+    channels = 3
+
+    def __init__(self, compositor: SceneCompositor):
+        self.compositor = compositor
+
+    def size(self) -> Tuple[int, int]:
+        return self.compositor.width, self.compositor.height
+
+    def open(self):
+        self.compositor.open()
+
+    def grab(self):
+        return self.compositor.compose()[0]
+
+    def close(self):
+        self.compositor.close()
+
+
+def _rect(value) -> Rect:
+    if isinstance(value, QRect):
+        return value.x(), value.y(), value.width(), value.height()
+    return tuple(int(v) for v in value)
+
+
+def _window_area(spec: dict) -> QRect:
+    """Desktop rect of a window layer's window, so its grab keeps the window's shape."""
+    if spec.get('area'):
+        return QRect(*_rect(spec['area']))
+    from .window_index import default_lister
+    lister = default_lister()
+    if lister is None:
+        raise Exception("Window layers need an area where windows cannot be listed")
+    try:
+        windows = lister.list_windows()
+    finally:
+        if hasattr(lister, 'close'):
+            lister.close()
+    for window in windows:
+        if window.handle == spec['handle']:
+            return QRect(*window.rect)
+    raise Exception(f"No window with handle {spec['handle']}")
+
+
+def build_scene(config: dict) -> SceneCompositor:
+    """Build a compositor from a plain description, as passed from QML.
+
+        {'width': 1920, 'height': 1080, 'background': [b, g, r], 'layers': [
+            {'kind': 'screen', 'rect': [x, y, w, h], 'area': [x, y, w, h], 'screen': 0},
+            {'kind': 'window', 'rect': [...], 'handle': 12345, 'area': [x, y, w, h]},
+            {'kind': 'file', 'rect': [...], 'path': 'webcam.mp4', 'opacity': 0.9},
+            {'kind': 'image', 'rect': [...], 'path': 'logo.png'},
+            {'kind': 'synthetic', 'rect': [...]},
+        ]}
+
+    Layers are listed bottom first. A screen layer without an area shows
+    the whole screen. A window layer's area is the window's desktop rect,
+    as in the window list; without one the window is looked up.
+    """
+    width, height = int(config['width']), int(config['height'])
+    layers = []
+    for spec in config.get('layers', []):
+        kind = spec.get('kind')
+        rect = _rect(spec['rect'])
+        opacity = float(spec.get('opacity', 1.0))
+        if kind == 'image':
+            layers.append(ImageLayer(spec['path'], rect, opacity))
+            continue
+        if kind == 'screen':
+            area = QRect(*_rect(spec['area'])) if spec.get('area') else None
+            source = create_source(QT, area, screen=spec.get('screen'))
+        elif kind == 'window':
+            source = create_source(QT, _window_area(spec), window_handle=spec['handle'])
+        elif kind == 'file':
+            source = VideoFileSource(spec['path'])
+        elif kind == 'synthetic':
+            source = SyntheticSource(*rect[2:], seed=len(layers))
+        else:
+            raise ValueError(f"Unknown scene layer kind: {kind}")
+        layers.append(SourceLayer(source, rect, opacity))
+    logger.info(f"Built a {width}x{height} scene with {len(layers)} layers")
+    return SceneCompositor(width, height, layers, tuple(config.get('background', (0, 0, 0))))
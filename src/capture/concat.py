@@ -0,0 +1,75 @@
+"""
+Lossless concatenation of recorded segments.
+
+Segments start on a keyframe, so they can be joined by stream copy without
+re-encoding. This uses ffmpeg's concat demuxer when ffmpeg is available;
+otherwise an ffconcat list is left next to the output so the join can be
+done later with `ffmpeg -f concat -safe 0 -i <list> -c copy <output>`.
+"""
+import shutil
+import subprocess
+from pathlib import Path
+from typing import Optional, Sequence
+
+from loguru import logger
+
+
+def _quote(path: Path) -> str:
+    return "'" + str(path).replace("'", "'\\''") + "'"
+
+
+def write_concat_list(segments: Sequence[str], list_path: str,
+                      durations: Optional[Sequence[float]] = None) -> str:
+    """Write an ffconcat list of the segments, relative to the list's folder."""
+    list_file = Path(list_path)
+    lines = ["ffconcat version 1.0"]
+    for index, segment in enumerate(segments):
+        segment_path = Path(segment)
+        try:
+            segment_path = segment_path.resolve().relative_to(list_file.parent.resolve())
+        except ValueError:
+            segment_path = segment_path.resolve()
+        lines.append(f"file {_quote(segment_path)}")
+        if durations is not None:
+            lines.append(f"duration {durations[index]:.6f}")
+    list_file.write_text("\n".join(lines) + "\n", encoding='utf-8')
+    return str(list_file)
+
+
+def concat_list_path(output_path: str) -> str:
+    path = Path(output_path)
+    return str(path.with_name(path.stem + '.ffconcat'))
+
+
+def concat_segments(segments: Sequence[str], output_path: str,
+                    timeout: Optional[float] = None) -> bool:
+    """Join segments into output_path by stream copy.
+
+    Returns True if the output was written. A single segment is simply
+    renamed. On failure the segments are kept along with an ffconcat list.
+    """
+    if not segments:
+        return False
+    if len(segments) == 1:
+        Path(segments[0]).replace(output_path)
+        return True
+
+    list_path = write_concat_list(segments, concat_list_path(output_path))
+    ffmpeg = shutil.which('ffmpeg')
+    if not ffmpeg:
+        logger.warning(f"ffmpeg not found; segments kept, join them with {list_path}")
+        return False
+
+    command = [
+        ffmpeg, '-hide_banner', '-loglevel', 'error', '-y',
+        '-f', 'concat', '-safe', '0', '-i', list_path,
+        '-c', 'copy', output_path,
+    ]
+    try:
+        subprocess.run(command, check=True, capture_output=True, timeout=timeout)
+    except (OSError, subprocess.SubprocessError) as e:
+        stderr = getattr(e, 'stderr', b'') or b''
+        logger.error(f"Concatenating segments failed: {e} {stderr.decode(errors='replace')}")
+        return False
+    Path(list_path).unlink(missing_ok=True)
+    return True
@@ -0,0 +1,120 @@
+"""
+Damage tracking for grabbed frames.
+
+TileDiff compares each frame against the previous one in fixed-size tiles
+and reports which tiles changed, so unchanged frames can be repeated
+instead of converted and encoded again, and changed regions can be passed
+downstream as dirty rectangles.
+"""
+from typing import List, Optional, Tuple
+
+import numpy as np
+from numpy.lib.stride_tricks import as_strided
+
+Rect = Tuple[int, int, int, int]  # x, y, width, height
+
+
+def _as_words(frame: np.ndarray, tile: int) -> Tuple[Optional[np.ndarray], int]:
+    """View a uint8 frame as rows of the widest words tile boundaries allow.
+
+    Returns the (height, words per row) view and the number of words per
+    tile width, or (None, 0) when the pixels of a row are not contiguous in
+    memory and the frame has to be compared per channel instead.
+    """
+    height, width = frame.shape[:2]
+    channels = frame.shape[2] if frame.ndim == 3 else 1
+    if frame.dtype != np.uint8 or frame.strides[1] != channels \
+            or (frame.ndim == 3 and frame.strides[2] != 1):
+        return None, 0
+    row_bytes = width * channels
+    tile_bytes = tile * channels
+    for word in (8, 4, 2, 1):
+        if row_bytes % word == 0 and tile_bytes % word == 0:
+            break
+    rows = as_strided(frame, (height, row_bytes), (frame.strides[0], 1), writeable=False)
+    return rows.view(np.dtype(f'u{word}')), tile_bytes // word
+
+
+def _any_per_block(changed: np.ndarray, size: int, axis: int) -> np.ndarray:
+    """Reduce consecutive blocks of size along axis with logical or."""
+    length = changed.shape[axis]
+    full = length - length % size
+    moved = np.moveaxis(changed, axis, 0)
+    blocks = moved[:full].reshape((full // size, size) + moved.shape[1:]).any(axis=1)
+    if full < length:
+        blocks = np.concatenate((blocks, moved[full:].any(axis=0, keepdims=True)))
+    return np.moveaxis(blocks, 0, axis)
+
+
+class TileDiff:
+    """Tile-by-tile change detection against the previous frame.
+
+    By default the previous frame is referenced, not copied, which is safe
+    for sources that hand out a fresh buffer per grab (Qt). Sources that
+    reuse one buffer must pass keep_copy=True.
+    """
+
+    def __init__(self, tile_size: int = 64, keep_copy: bool = False):
+        if tile_size < 1:
+            raise ValueError(f"Tile size must be positive, got {tile_size}")
+        self._tile = tile_size
+        self._keep_copy = keep_copy
+        self._previous = None
+
+    @property
+    def tile_size(self) -> int:
+        return self._tile
+
+    def reset(self):
+        self._previous = None
+
+    def grid_shape(self, height: int, width: int) -> Tuple[int, int]:
+        tile = self._tile
+        return (height + tile - 1) // tile, (width + tile - 1) // tile
+
+    def compare(self, frame: np.ndarray, previous: np.ndarray) -> np.ndarray:
+        """Boolean (rows, cols) mask of tiles that differ between two frames."""
+        words, per_tile = _as_words(frame, self._tile)
+        previous_words, _ = _as_words(previous, self._tile)
+        if words is not None and previous_words is not None:
+            changed = words != previous_words
+        else:
+            per_tile = self._tile
+            changed = frame != previous
+            if changed.ndim == 3:
+                changed = changed.any(axis=2)
+        rows = _any_per_block(changed, self._tile, axis=0)
+        return _any_per_block(rows, per_tile, axis=1)
+
+    def update(self, frame: np.ndarray) -> np.ndarray:
+        """Compare frame with the previous one and remember it.
+
+        The first frame, and any frame whose size differs from the previous
+        one, is reported as fully dirty.
+        """
+        previous = self._previous
+        self._previous = frame.copy() if self._keep_copy else frame
+        if previous is None or previous.shape != frame.shape:
+            return np.ones(self.grid_shape(*frame.shape[:2]), dtype=bool)
+        return self.compare(frame, previous)
+
+    def dirty_rects(self, mask: np.ndarray, height: int, width: int) -> List[Rect]:
+        """Merge dirty tiles into rectangles, one per horizontal run of tiles."""
+        tile = self._tile
+        rects = []
+        for row in np.flatnonzero(mask.any(axis=1)):
+            padded = np.concatenate(([False], mask[row], [False]))
+            edges = np.flatnonzero(padded[1:] != padded[:-1])
+            y = int(row) * tile
+            h = min(y + tile, height) - y
+            for start, end in zip(edges[::2], edges[1::2]):
+                x = int(start) * tile
+                rects.append((x, y, min(int(end) * tile, width) - x, h))
+        return rects
+
+
+def changed_fraction(mask: Optional[np.ndarray]) -> float:
+    """Share of tiles that changed, 1.0 when unknown."""
+    if mask is None or mask.size == 0:
+        return 1.0
+    return float(np.count_nonzero(mask)) / mask.size
@@ -0,0 +1,224 @@
+"""
+Process-pool encoding backend.
+
+Frames are copied once into a multiprocessing.shared_memory ring; worker
+processes read them in place, so no frame is ever pickled. The stream is
+cut into short segments of whole GOPs (every segment starts a fresh writer
+and therefore a keyframe), segment k goes to worker k % N, and the
+segments are joined losslessly when the writer is released. Encoding CPU
+time and the GIL are thereby kept out of the GUI and capture process.
+"""
+import multiprocessing
+import os
+import queue
+import shutil
+import tempfile
+import time
+from multiprocessing import shared_memory
+from pathlib import Path
+from typing import List, Optional, Sequence
+
+import numpy as np
+from loguru import logger
+
+from .concat import concat_segments
+from .video_writers import VIDEO_CODECS, open_opencv_writer
+
+RING_BYTES = 512 * 1024 * 1024  # Default budget for queued frames
+MAX_SLOTS = 256                 # Keeps the free-slot queue well below pipe capacity
+RESULT_TIMEOUT = 60             # Seconds to wait for a worker to finish
+
+
+def _encode_worker(shm_name, ring_shape, fps, codecs, tasks, free_slots, results):
+    """Worker process: encode the segments assigned to it from the shared ring."""
+    shm = shared_memory.SharedMemory(name=shm_name)
+    ring = np.ndarray(ring_shape, dtype=np.uint8, buffer=shm.buf)
+    height, width = ring_shape[1:3]
+    writer = None
+    segment = None
+    frames = 0
+    try:
+        while True:
+            message = tasks.get()
+            kind = message[0]
+            if kind == 'frame':
+                slot = message[1]
+                try:
+                    if writer is not None:
+                        writer.write(ring[slot])
+                        frames += 1
+                finally:
+                    free_slots.put(slot)
+            elif kind == 'open':
+                segment, path = message[1], message[2]
+                writer, _ = open_opencv_writer(path, fps, width, height, codecs)
+                frames = 0
+            elif kind == 'close':
+                if writer is not None:
+                    writer.release()
+                    writer = None
+                    results.put(('done', segment, frames))
+            elif kind == 'stop':
+                break
+    except Exception as e:
+        results.put(('error', segment, str(e)))
+    finally:
+        if writer is not None:
+            writer.release()
+        del ring
+        shm.close()
+
+
+class ProcessEncodeWriter:
+    """cv2.VideoWriter-compatible writer that encodes in worker processes."""
+
+    def __init__(self, path: str, width: int, height: int, fps: float,
+                 workers: int = 0, segment_frames: Optional[int] = None,
+                 ring_bytes: int = RING_BYTES, codecs: Sequence[str] = VIDEO_CODECS):
+        self._path = str(Path(path).with_suffix('.avi'))
+        self._shape = (height, width, 3)
+        self._workers_count = workers or max(1, (os.cpu_count() or 2) - 1)
+        frame_bytes = width * height * 3
+        slots = max(2 * self._workers_count, min(MAX_SLOTS, ring_bytes // frame_bytes))
+        # Whole segments should fit in the ring so workers can run in parallel
+        self._segment_frames = segment_frames or max(
+            1, min(int(fps * 2), slots // self._workers_count)
+        )
+        self._count = 0
+        self._segments: List[str] = []
+        self._finished = []
+        self._segment_dir = Path(tempfile.mkdtemp(
+            prefix=Path(self._path).stem + '.segments-', dir=Path(self._path).parent
+        ))
+
+        context = multiprocessing.get_context('spawn')
+        self._shm = shared_memory.SharedMemory(create=True, size=slots * frame_bytes)
+        self._ring = np.ndarray((slots,) + self._shape, dtype=np.uint8, buffer=self._shm.buf)
+        self._free_slots = context.Queue()
+        for slot in range(slots):
+            self._free_slots.put(slot)
+        self._results = context.Queue()
+        self._tasks = [context.Queue() for _ in range(self._workers_count)]
+        self._processes = []
+        for index in range(self._workers_count):
+            process = context.Process(
+                target=_encode_worker,
+                args=(self._shm.name, self._ring.shape, fps, list(codecs),
+                      self._tasks[index], self._free_slots, self._results),
+                name=f"encode-worker-{index}",
+                daemon=True,
+            )
+            process.start()
+            self._processes.append(process)
+        self._opened = True
+        self.joined = None  # Whether release() produced the output file
+        logger.info(
+            f"Started {self._workers_count} encode processes, {slots} ring slots, "
+            f"{self._segment_frames} frames per segment"
+        )
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    @property
+    def workers(self) -> int:
+        return self._workers_count
+
+    @property
+    def segment_dir(self) -> str:
+        return str(self._segment_dir)
+
+    def isOpened(self) -> bool:
+        return self._opened
+
+    def _check_errors(self):
+        """Collect worker results, raising on the first reported failure."""
+        try:
+            while True:
+                kind, segment, detail = self._results.get_nowait()
+                if kind == 'error':
+                    raise Exception(f"Encode worker failed on segment {segment}: {detail}")
+                self._finished.append(segment)
+        except queue.Empty:
+            pass
+
+    def _next_free_slot(self) -> int:
+        """Wait for a free ring slot; blocking here is the backpressure."""
+        while True:
+            try:
+                return self._free_slots.get(timeout=0.5)
+            except queue.Empty:
+                self._check_errors()
+                dead = [p.name for p in self._processes if not p.is_alive()]
+                if dead:
+                    raise Exception(f"Encode workers exited unexpectedly: {', '.join(dead)}")
+
+    def _worker_for(self, segment: int):
+        return self._tasks[segment % self._workers_count]
+
+    def write(self, frame: np.ndarray):
+        if not self._opened:
+            raise Exception("Process encode writer is closed")
+        self._check_errors()
+
+        segment, offset = divmod(self._count, self._segment_frames)
+        tasks = self._worker_for(segment)
+        if offset == 0:
+            if segment > 0:
+                self._worker_for(segment - 1).put(('close',))
+            path = str(self._segment_dir / f"segment_{segment:06d}.avi")
+            self._segments.append(path)
+            tasks.put(('open', segment, path))
+
+        slot = self._next_free_slot()
+        np.copyto(self._ring[slot], frame)
+        tasks.put(('frame', slot))
+        self._count += 1
+
+    def _join_workers(self):
+        """Wait for the workers, draining returned slots so none blocks on exit."""
+        deadline = time.monotonic() + RESULT_TIMEOUT
+        while any(p.is_alive() for p in self._processes) and time.monotonic() < deadline:
+            try:
+                while True:
+                    self._free_slots.get_nowait()
+            except queue.Empty:
+                pass
+            for process in self._processes:
+                process.join(0.05)
+        for process in self._processes:
+            if process.is_alive():
+                logger.error(f"{process.name} did not finish, terminating")
+                process.terminate()
+
+    def release(self):
+        """Finish all segments, stop the workers and join the segments."""
+        if not self._opened:
+            return
+        self._opened = False
+        try:
+            if self._count:
+                last_segment = (self._count - 1) // self._segment_frames
+                self._worker_for(last_segment).put(('close',))
+            for tasks in self._tasks:
+                tasks.put(('stop',))
+            self._join_workers()
+
+            try:
+                self._check_errors()
+            except Exception as e:
+                logger.error(str(e))
+            written = set(self._finished)
+            segments = [path for index, path in enumerate(self._segments) if index in written]
+            if len(segments) != len(self._segments):
+                logger.warning(f"{len(self._segments) - len(segments)} segments were not finished")
+            self.joined = concat_segments(segments, self._path) if self._count else True
+            if self.joined:
+                shutil.rmtree(self._segment_dir, ignore_errors=True)
+            else:
+                logger.warning(f"Segments left in {self._segment_dir}")
+        finally:
+            del self._ring
+            self._shm.close()
+            self._shm.unlink()
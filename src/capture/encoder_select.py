@@ -0,0 +1,244 @@
+"""
+GStreamer encoder discovery and selection.
+
+Every known encoder element is probed once by encoding a short test
+pattern; the measured speed is cached on disk, keyed by the GStreamer
+version and the installed plugin versions, so later launches skip the
+probe entirely. select_encoder() then picks the fastest working encoder
+that can sustain a recording profile.
+"""
+import json
+import os
+import platform
+import time
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import gi
+gi.require_version('Gst', '1.0')
+from gi.repository import Gst
+from loguru import logger
+
+
+class EncoderSpec(NamedTuple):
+    element: str
+    codec: str
+    hardware: bool
+    parser: Optional[str]
+    muxer: str
+    extension: str
+    bitrate_property: Optional[str]
+    bitrate_scale: int          # Multiplier from kbit/s to the property's unit
+    properties: Dict[str, str]  # Low-latency tuning, set by nick
+
+
+class EncoderProfile(NamedTuple):
+    width: int = 1920
+    height: int = 1080
+    fps: int = 30
+    bitrate_kbps: int = 8000
+    codecs: Tuple[str, ...] = ()   # Acceptable codecs, empty for any
+    headroom: float = 1.25         # Required speed over real time
+
+
+# Hardware encoders first, software fallbacks last
+ENCODERS = [
+    EncoderSpec('nvh264enc', 'h264', True, 'h264parse', 'mp4mux', '.mp4',
+                'bitrate', 1, {'preset': 'low-latency-hq'}),
+    EncoderSpec('vah264enc', 'h264', True, 'h264parse', 'mp4mux', '.mp4',
+                'bitrate', 1, {}),
+    EncoderSpec('vaapih264enc', 'h264', True, 'h264parse', 'mp4mux', '.mp4',
+                'bitrate', 1, {}),
+    EncoderSpec('qsvh264enc', 'h264', True, 'h264parse', 'mp4mux', '.mp4',
+                'bitrate', 1, {}),
+    EncoderSpec('amfh264enc', 'h264', True, 'h264parse', 'mp4mux', '.mp4',
+                'bitrate', 1, {}),
+    EncoderSpec('mfh264enc', 'h264', True, 'h264parse', 'mp4mux', '.mp4',
+                'bitrate', 1, {'low-latency': 'true'}),
+    EncoderSpec('vtenc_h264', 'h264', True, 'h264parse', 'mp4mux', '.mp4',
+                'bitrate', 1, {'realtime': 'true'}),
+    EncoderSpec('x264enc', 'h264', False, 'h264parse', 'mp4mux', '.mp4',
+                'bitrate', 1, {'tune': 'zerolatency', 'speed-preset': 'ultrafast'}),
+    EncoderSpec('openh264enc', 'h264', False, 'h264parse', 'mp4mux', '.mp4',
+                'bitrate', 1000, {'complexity': 'low'}),
+    EncoderSpec('vp9enc', 'vp9', False, None, 'webmmux', '.webm',
+                'target-bitrate', 1000, {'deadline': '1', 'cpu-used': '8', 'row-mt': 'true'}),
+    EncoderSpec('av1enc', 'av1', False, 'av1parse', 'matroskamux', '.mkv',
+                'target-bitrate', 1, {'cpu-used': '8', 'usage-profile': 'realtime'}),
+    EncoderSpec('vp8enc', 'vp8', False, None, 'webmmux', '.webm',
+                'target-bitrate', 1000, {'deadline': '1', 'cpu-used': '8', 'threads': '4'}),
+]
+
+PROBE_WIDTH = 1280
+PROBE_HEIGHT = 720
+PROBE_FRAMES = 60
+PROBE_TIMEOUT = 15  # Seconds before an encoder is considered broken
+
+
+def cache_path() -> Path:
+    """Location of the encoder probe cache."""
+    if platform.system() == 'Windows':
+        base = os.environ.get('LOCALAPPDATA', str(Path.home() / 'AppData' / 'Local'))
+    else:
+        base = os.environ.get('XDG_CACHE_HOME', str(Path.home() / '.cache'))
+    return Path(base) / 'CaptureStudio' / 'encoders.json'
+
+
+def _registry_fingerprint() -> str:
+    """Identifies the GStreamer install; the cache is invalid when it changes."""
+    parts = [Gst.version_string()]
+    for spec in ENCODERS:
+        factory = Gst.ElementFactory.find(spec.element)
+        if factory:
+            plugin = factory.get_plugin()
+            version = plugin.get_version() if plugin else '?'
+            parts.append(f"{spec.element}={version}")
+    return ';'.join(parts)
+
+
+def link_elements(elements):
+    """Link a list of elements in order, raising on the first failure."""
+    for upstream, downstream in zip(elements, elements[1:]):
+        if not upstream.link(downstream):
+            raise Exception(
+                f"Failed to link {upstream.get_name()} to {downstream.get_name()}"
+            )
+
+
+def make_element(factory: str, **properties) -> Gst.Element:
+    element = Gst.ElementFactory.make(factory, None)
+    if element is None:
+        raise Exception(f"GStreamer element not available: {factory}")
+    for key, value in properties.items():
+        Gst.util_set_object_arg(element, key.replace('_', '-'), str(value))
+    return element
+
+
+def make_encoder(spec: EncoderSpec, profile: Optional[EncoderProfile] = None) -> Gst.Element:
+    """Create and configure the encoder element for spec."""
+    encoder = make_element(spec.element)
+    for key, value in spec.properties.items():
+        try:
+            Gst.util_set_object_arg(encoder, key, value)
+        except Exception as e:
+            logger.debug(f"{spec.element} does not accept {key}={value}: {e}")
+    if profile and spec.bitrate_property and profile.bitrate_kbps:
+        encoder.set_property(spec.bitrate_property, int(profile.bitrate_kbps * spec.bitrate_scale))
+    return encoder
+
+
+def make_encoder_chain(spec: EncoderSpec, profile: EncoderProfile) -> List[Gst.Element]:
+    """Elements from raw video to a muxed stream: convert, encode, parse, mux."""
+    elements = [make_element('videoconvert'), make_encoder(spec, profile)]
+    if spec.parser and Gst.ElementFactory.find(spec.parser):
+        elements.append(make_element(spec.parser))
+    elements.append(make_element(spec.muxer))
+    return elements
+
+
+def _probe_encoder(spec: EncoderSpec) -> Optional[float]:
+    """Encode a test pattern and return the achieved frames per second."""
+    pipeline = Gst.Pipeline.new(f"probe-{spec.element}")
+    try:
+        elements = [
+            make_element('videotestsrc', num_buffers=PROBE_FRAMES, pattern='smpte'),
+            make_element('capsfilter', caps=(
+                f"video/x-raw,width={PROBE_WIDTH},height={PROBE_HEIGHT},framerate=30/1"
+            )),
+            make_element('videoconvert'),
+            make_encoder(spec),
+            make_element('fakesink', sync='false'),
+        ]
+        for element in elements:
+            pipeline.add(element)
+        link_elements(elements)
+
+        start = time.perf_counter()
+        if pipeline.set_state(Gst.State.PLAYING) == Gst.StateChangeReturn.FAILURE:
+            return None
+        msg = pipeline.get_bus().timed_pop_filtered(
+            PROBE_TIMEOUT * Gst.SECOND,
+            Gst.MessageType.EOS | Gst.MessageType.ERROR
+        )
+        elapsed = time.perf_counter() - start
+        if msg is None or msg.type == Gst.MessageType.ERROR:
+            return None
+        return PROBE_FRAMES / elapsed
+    except Exception as e:
+        logger.debug(f"Probe of {spec.element} failed: {e}")
+        return None
+    finally:
+        pipeline.set_state(Gst.State.NULL)
+
+
+def probe_encoders(force: bool = False) -> Dict[str, Optional[float]]:
+    """Return measured fps at the probe resolution for each usable encoder.
+
+    Results come from the on-disk cache unless the GStreamer install has
+    changed or force is set. Encoders that are missing or fail to encode
+    are left out.
+    """
+    if not Gst.is_initialized():
+        Gst.init(None)
+    fingerprint = _registry_fingerprint()
+    path = cache_path()
+    if not force and path.exists():
+        try:
+            cached = json.loads(path.read_text())
+            if cached.get('fingerprint') == fingerprint:
+                logger.info(f"Using cached encoder probe from {path}")
+                return cached['encoders']
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Ignoring unreadable encoder cache: {e}")
+
+    logger.info("Probing GStreamer encoders...")
+    results = {}
+    for spec in ENCODERS:
+        if not Gst.ElementFactory.find(spec.element):
+            continue
+        fps = _probe_encoder(spec)
+        if fps:
+            logger.info(f"Encoder {spec.element}: {fps:.1f} fps at {PROBE_WIDTH}x{PROBE_HEIGHT}")
+            results[spec.element] = fps
+        else:
+            logger.info(f"Encoder {spec.element} is installed but not usable")
+
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps({'fingerprint': fingerprint, 'encoders': results}, indent=2))
+    except OSError as e:
+        logger.warning(f"Could not write encoder cache: {e}")
+    return results
+
+
+def select_encoder(probed: Dict[str, Optional[float]],
+                   profile: EncoderProfile = EncoderProfile()) -> EncoderSpec:
+    """Pick the fastest probed encoder that keeps up with the profile.
+
+    Probe speed is scaled from the probe resolution to the profile's
+    resolution. If nothing is fast enough, the fastest acceptable encoder
+    is returned anyway so recording can still start.
+    """
+    scale = (PROBE_WIDTH * PROBE_HEIGHT) / max(1, profile.width * profile.height)
+    required = profile.fps * profile.headroom
+    candidates = []
+    for spec in ENCODERS:
+        fps = probed.get(spec.element)
+        if not fps:
+            continue
+        if profile.codecs and spec.codec not in profile.codecs:
+            continue
+        candidates.append((fps * scale, spec))
+    if not candidates:
+        raise Exception("No usable GStreamer encoder found")
+
+    candidates.sort(key=lambda item: item[0], reverse=True)
+    fast_enough = [item for item in candidates if item[0] >= required]
+    speed, spec = fast_enough[0] if fast_enough else candidates[0]
+    if not fast_enough:
+        logger.warning(
+            f"No encoder reaches {required:.0f} fps at {profile.width}x{profile.height}, "
+            f"using fastest: {spec.element}"
+        )
+    logger.info(f"Selected encoder {spec.element} (~{speed:.0f} fps at target size)")
+    return spec
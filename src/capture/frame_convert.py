@@ -0,0 +1,80 @@
+"""
+Conversion between grabbed Qt images and NumPy frames.
+
+Screen grabs arrive as 32-bit QImages (Format_RGB32 / ARGB32), which are
+stored as native-endian 0xAARRGGBB words, i.e. B, G, R, A bytes on little
+endian machines. qimage_to_bgra() wraps that memory as a strided NumPy view
+without copying, and bgra_to_bgr() performs the single copy the encoder
+needs, dropping the alpha channel on the way.
+"""
+import sys
+import numpy as np
+import cv2
+from PySide6.QtGui import QImage
+
+# Formats that can be viewed in place
+NATIVE_FORMATS = (
+    QImage.Format_RGB32,
+    QImage.Format_ARGB32,
+    QImage.Format_ARGB32_Premultiplied,
+)
+
+
+class _ImageBuffer:
+    """Array interface over a QImage's pixels that keeps the image alive."""
+
+    def __init__(self, image: QImage):
+        self._image = image
+        bits = image.constBits()
+        address = np.frombuffer(bits, dtype=np.uint8).ctypes.data
+        if sys.byteorder == 'little':
+            strides = (image.bytesPerLine(), 4, 1)
+        else:
+            # Big endian stores A, R, G, B; walk each pixel backwards
+            address += 3
+            strides = (image.bytesPerLine(), 4, -1)
+        self.__array_interface__ = {
+            'version': 3,
+            'shape': (image.height(), image.width(), 4),
+            'typestr': '|u1',
+            'strides': strides,
+            'data': (address, True),
+        }
+
+
+def qimage_to_bgra(image: QImage) -> np.ndarray:
+    """Return a read-only (height, width, 4) BGRA view of a QImage.
+
+    Images already in a 32-bit RGB format are wrapped without copying; the
+    view honours the image's row stride, so padded scanlines are skipped
+    rather than folded into the pixel data. Other formats are converted to
+    Format_RGB32 first, which costs one copy.
+    """
+    if image.format() not in NATIVE_FORMATS:
+        image = image.convertToFormat(QImage.Format_RGB32)
+    return np.asarray(_ImageBuffer(image))
+
+
+def bgra_to_bgr(frame: np.ndarray, out: np.ndarray = None) -> np.ndarray:
+    """Copy a BGRA (or BGR) frame into a contiguous BGR array.
+
+    This is the one full-frame copy on the conversion path; pass out to
+    reuse an existing buffer of shape (height, width, 3).
+    """
+    if frame.shape[2] == 3:
+        if out is None:
+            return np.ascontiguousarray(frame)
+        np.copyto(out, frame)
+        return out
+    if frame.strides[2] == 1:
+        return cv2.cvtColor(frame, cv2.COLOR_BGRA2BGR, dst=out)
+    # Layouts OpenCV cannot wrap (big endian views) fall back to NumPy
+    if out is None:
+        out = np.empty(frame.shape[:2] + (3,), dtype=np.uint8)
+    np.copyto(out, frame[:, :, :3])
+    return out
+
+
+def qimage_to_bgr(image: QImage, out: np.ndarray = None) -> np.ndarray:
+    """Convert a QImage to a contiguous BGR frame with a single copy."""
+    return bgra_to_bgr(qimage_to_bgra(image), out)
@@ -0,0 +1,89 @@
+"""
+Preallocated frame buffers recycled through the recording pipeline.
+"""
+import threading
+import numpy as np
+from loguru import logger
+
+
+class FramePool:
+    """Fixed set of equally sized frame buffers.
+
+    Buffers are handed out with acquire() and returned with release() once
+    the encoder is done with them. The pool is only reallocated when
+    resize() is given new dimensions; buffers of an old size that come back
+    afterwards are simply dropped. If every buffer is in use, acquire()
+    allocates a temporary one rather than stalling the pipeline.
+    """
+
+    def __init__(self, width: int, height: int, channels: int = 3, count: int = 4):
+        self._lock = threading.Lock()
+        self._channels = channels
+        self._count = max(1, count)
+        self._shape = None
+        self._free = []
+        self._owned = {}
+        self._misses = 0
+        self._allocations = 0
+        self.resize(width, height)
+
+    @property
+    def shape(self):
+        return self._shape
+
+    @property
+    def channels(self) -> int:
+        return self._channels
+
+    @property
+    def count(self) -> int:
+        return self._count
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the pooled buffers."""
+        height, width, channels = self._shape
+        return height * width * channels * self._count
+
+    @property
+    def misses(self) -> int:
+        """Temporary buffers allocated because the pool was exhausted."""
+        return self._misses
+
+    @property
+    def allocations(self) -> int:
+        """Number of times the pool has been (re)allocated."""
+        return self._allocations
+
+    def resize(self, width: int, height: int) -> bool:
+        """Reallocate for new dimensions. Returns False if the size is unchanged."""
+        shape = (height, width, self._channels)
+        with self._lock:
+            if shape == self._shape:
+                return False
+            self._shape = shape
+            self._free = [np.empty(shape, dtype=np.uint8) for _ in range(self._count)]
+            # Holding the buffers keeps their ids from being reused
+            self._owned = {id(buffer): buffer for buffer in self._free}
+            self._allocations += 1
+        logger.debug(f"Frame pool allocated {self._count} buffers of {width}x{height}")
+        return True
+
+    def acquire(self) -> np.ndarray:
+        with self._lock:
+            if self._free:
+                return self._free.pop()
+            self._misses += 1
+            shape = self._shape
+        return np.empty(shape, dtype=np.uint8)
+
+    def release(self, buffer: np.ndarray):
+        if buffer is None:
+            return
+        with self._lock:
+            if self._owned.get(id(buffer)) is buffer and len(self._free) < self._count:
+                self._free.append(buffer)
+
+    def fits(self, frame: np.ndarray) -> bool:
+        """Whether a frame of this height and width can use the pooled buffers."""
+        return frame.shape[:2] == self._shape[:2]
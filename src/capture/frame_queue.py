@@ -0,0 +1,145 @@
+"""
+Bounded frame queue used between the capture and encoder threads.
+"""
+from collections import deque
+import threading
+import time
+from typing import Any, Callable, Optional
+
+# Backpressure policies applied when the queue is full
+BLOCK = 'block'
+DROP_OLDEST = 'drop_oldest'
+DROP_NEWEST = 'drop_newest'
+POLICIES = (BLOCK, DROP_OLDEST, DROP_NEWEST)
+
+
+class QueuedFrame:
+    """A captured frame on its way from the capture thread to the encoders.
+
+    pixels is a BGRA (or BGR) array, or None for a repeat of the previously
+    written frame.
+    """
+
+    __slots__ = ('pixels', 'pts')
+
+    def __init__(self, pixels, pts: float):
+        self.pixels = pixels
+        self.pts = pts
+
+    @property
+    def repeat(self) -> bool:
+        return self.pixels is None
+
+    @classmethod
+    def repeat_of_previous(cls, pts: float):
+        return cls(None, pts)
+
+
+class FrameQueue:
+    """Fixed-capacity ring of frames with a configurable backpressure policy.
+
+    The capture thread calls put() and never waits longer than the policy
+    allows; encoder threads call get() and block until a frame arrives or
+    the queue is closed and drained. on_drop is called with every frame the
+    drop_oldest policy evicts, so its buffer can be recycled.
+    """
+
+    def __init__(self, capacity: int = 8, policy: str = BLOCK,
+                 on_drop: Optional[Callable[[Any], None]] = None):
+        if capacity < 1:
+            raise ValueError(f"Queue capacity must be positive, got {capacity}")
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown backpressure policy: {policy}")
+        self._capacity = capacity
+        self._policy = policy
+        self._on_drop = on_drop
+        self._items = deque()
+        self._closed = False
+        self._dropped = 0
+        self._peak_depth = 0
+        self._cond = threading.Condition()
+
+    @property
+    def capacity(self) -> int:
+        return self._capacity
+
+    @property
+    def policy(self) -> str:
+        return self._policy
+
+    @property
+    def depth(self) -> int:
+        with self._cond:
+            return len(self._items)
+
+    @property
+    def dropped(self) -> int:
+        with self._cond:
+            return self._dropped
+
+    @property
+    def peak_depth(self) -> int:
+        with self._cond:
+            return self._peak_depth
+
+    @property
+    def closed(self) -> bool:
+        with self._cond:
+            return self._closed
+
+    def put(self, item: Any, timeout: Optional[float] = None) -> bool:
+        """Enqueue a frame. Returns False if the frame was not accepted."""
+        evicted = None
+        with self._cond:
+            if self._closed:
+                return False
+            if len(self._items) >= self._capacity:
+                if self._policy == DROP_NEWEST:
+                    self._dropped += 1
+                    return False
+                if self._policy == DROP_OLDEST:
+                    evicted = self._items.popleft()
+                    self._dropped += 1
+                else:
+                    deadline = None if timeout is None else time.monotonic() + timeout
+                    while len(self._items) >= self._capacity and not self._closed:
+                        remaining = None if deadline is None else deadline - time.monotonic()
+                        if remaining is not None and remaining <= 0:
+                            self._dropped += 1
+                            return False
+                        self._cond.wait(remaining)
+                    if self._closed:
+                        return False
+            self._items.append(item)
+            self._peak_depth = max(self._peak_depth, len(self._items))
+            self._cond.notify_all()
+        if evicted is not None and self._on_drop is not None:
+            self._on_drop(evicted)
+        return True
+
+    def get(self, timeout: Optional[float] = None) -> Optional[Any]:
+        """Dequeue the oldest frame.
+
+        Returns None once the queue is closed and empty, or on timeout.
+        """
+        with self._cond:
+            deadline = None if timeout is None else time.monotonic() + timeout
+            while not self._items:
+                if self._closed:
+                    return None
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return None
+                self._cond.wait(remaining)
+            item = self._items.popleft()
+            self._cond.notify_all()
+            return item
+
+    def close(self):
+        """Stop accepting frames and wake up all waiting threads.
+
+        Frames already queued can still be drained with get().
+        """
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
@@ -0,0 +1,130 @@
+"""
+Deadline-based frame pacing for the capture loop.
+"""
+import time
+from pathlib import Path
+from typing import Callable, NamedTuple, Optional
+
+# Catch-up policies for frame slots missed while grabbing took too long
+SKIP = 'skip'
+DUPLICATE = 'duplicate'
+CATCH_UP_POLICIES = (SKIP, DUPLICATE)
+
+
+class FrameTick(NamedTuple):
+    index: int    # Frame slot the next capture belongs to
+    pts: float    # Presentation timestamp of that slot in seconds
+    missed: int   # Slots that passed without a capture since the previous tick
+    deadline: float = 0.0  # Clock time the slot was due at
+
+
+class FrameScheduler:
+    """Paces captures against absolute deadlines on a monotonic clock.
+
+    Frame n is due at start + n / fps, so time spent grabbing and encoding
+    never accumulates into drift. When the loop falls behind by whole frame
+    slots, the tick reports how many were missed; with the duplicate policy
+    the caller fills them with the previous frame so the frame count matches
+    wall-clock time, with the skip policy they are left out.
+    """
+
+    def __init__(self, fps: float, catch_up: str = DUPLICATE,
+                 clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], None] = time.sleep):
+        if fps <= 0:
+            raise ValueError(f"Frame rate must be positive, got {fps}")
+        if catch_up not in CATCH_UP_POLICIES:
+            raise ValueError(f"Unknown catch-up policy: {catch_up}")
+        self._fps = fps
+        self._catch_up = catch_up
+        self._clock = clock
+        self._sleep = sleep
+        self._start = None
+        self._next_index = 0
+        self._missed = 0
+
+    @property
+    def fps(self) -> float:
+        return self._fps
+
+    @property
+    def catch_up(self) -> str:
+        return self._catch_up
+
+    @property
+    def missed_frames(self) -> int:
+        """Total frame slots missed since start()."""
+        return self._missed
+
+    @property
+    def start_time(self) -> Optional[float]:
+        return self._start
+
+    def start(self, start_time: Optional[float] = None):
+        """Anchor frame 0 at start_time, or now."""
+        self._start = self._clock() if start_time is None else start_time
+        self._next_index = 0
+        self._missed = 0
+
+    def pts(self, index: int) -> float:
+        """Presentation timestamp of a frame slot in seconds."""
+        return index / self._fps
+
+    def wait_next(self) -> FrameTick:
+        """Sleep until the next frame deadline and return its slot."""
+        if self._start is None:
+            self.start()
+        index = self._next_index
+        deadline = self._start + index / self._fps
+        now = self._clock()
+        missed = 0
+        if now < deadline:
+            self._sleep(deadline - now)
+        else:
+            # Running late: jump to the slot that is due right now
+            current = int((now - self._start) * self._fps)
+            if current > index:
+                missed = current - index
+                self._missed += missed
+                index = current
+        self._next_index = index + 1
+        return FrameTick(index, self.pts(index), missed, self._start + index / self._fps)
+
+
+class TimecodeWriter:
+    """Writes per-frame presentation timestamps as a v2 timecode file.
+
+    The format is understood by mkvmerge and ffmpeg-based tooling, so a
+    constant-rate container can be remuxed with exact frame timing.
+    """
+
+    HEADER = "# timecode format v2\n"
+
+    def __init__(self, path: str):
+        self._path = Path(path)
+        self._file = open(self._path, 'w', encoding='ascii')
+        self._file.write(self.HEADER)
+        self._count = 0
+
+    @property
+    def path(self) -> str:
+        return str(self._path)
+
+    @property
+    def count(self) -> int:
+        return self._count
+
+    def write(self, pts: float):
+        self._file.write(f"{pts * 1000.0:.3f}\n")
+        self._count += 1
+
+    def close(self):
+        if self._file:
+            self._file.close()
+            self._file = None
+
+
+def timecodes_path(output_path: str) -> str:
+    """Sidecar timecode path for a recording."""
+    path = Path(output_path)
+    return str(path.with_name(path.stem + '.timecodes.txt'))
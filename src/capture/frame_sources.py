@@ -0,0 +1,427 @@
+"""
+Frame sources for the recording engine.
+
+A frame source hands the capture loop one frame per tick. grab() does the
+work that depends on the display (or file, or generator) and returns a
+native frame; to_bgra() turns it into a BGRA or BGR NumPy array, so the
+two steps can be timed separately. Sources other than the Qt screen grab
+need no display, which lets recordings, benchmarks and load tests run
+headless.
+"""
+from typing import Optional, Tuple
+
+import numpy as np
+from loguru import logger
+
+from .frame_convert import qimage_to_bgra
+
+QT = 'qt'
+XSHM = 'xshm'
+X11 = 'x11'
+FILE = 'file'
+SYNTHETIC = 'synthetic'
+FRAME_SOURCES = (QT, XSHM, X11, FILE, SYNTHETIC)
+
+DEFAULT_SIZE = (1920, 1080)
+
+
+class SourceExhausted(Exception):
+    """Raised by grab() when a finite source has no more frames."""
+
+
+class FrameSource:
+    """Base class for frame sources.
+
+    fresh_buffers tells the pipeline whether every grab returns a new
+    buffer (True) or overwrites the previous one, in which case consumers
+    that hold on to a frame must copy it. channels is the channel count of
+    the frames to_bgra() returns: 4 for BGRA, 3 for BGR.
+    """
+
+    name = ''
+    fresh_buffers = True
+    channels = 4
+
+    def size(self) -> Tuple[int, int]:
+        """Width and height of the frames this source produces."""
+        raise NotImplementedError
+
+    def open(self):
+        """Acquire resources; called when a recording starts."""
+
+    def grab(self):
+        raise NotImplementedError
+
+    def to_bgra(self, native) -> np.ndarray:
+        return native
+
+    def close(self):
+        """Release resources; the source can be opened again afterwards."""
+
+
+def screen_at(index: Optional[int] = None):
+    """The QScreen with this index, or the primary screen."""
+    from PySide6.QtGui import QGuiApplication
+    screens = QGuiApplication.screens()
+    if index is not None and 0 <= index < len(screens):
+        return screens[index]
+    return QGuiApplication.primaryScreen()
+
+
+def _screen_geometry(index: Optional[int] = None):
+    screen = screen_at(index)
+    return screen, screen.geometry()
+
+
+class QtScreenSource(FrameSource):
+    """Grabs a screen, an area of it, or a window.
+
+    The area is relative to the screen, which defaults to the primary one.
+    A selected window is followed through a WindowTracker while recording;
+    the output keeps the size the window had when the recording started,
+    and frames are scaled to it after the window is resized.
+    """
+
+    name = QT
+
+    def __init__(self, area=None, window_handle=None, screen: Optional[int] = None):
+        self._area = area if area is not None and area.isValid() else None
+        self._window_handle = window_handle
+        self._screen = screen
+        self._tracker = None
+        self._origin = (0, 0)
+        self._window_area = None
+        self._grabbed_size = None
+
+    def size(self) -> Tuple[int, int]:
+        if self._area is not None:
+            return self._area.width(), self._area.height()
+        _, geometry = _screen_geometry(self._screen)
+        return geometry.width(), geometry.height()
+
+    def open(self):
+        if self._window_handle and self._tracker is None:
+            from .window_tracker import create_tracker
+            self._tracker = create_tracker(self._window_handle)
+            if self._tracker is not None:
+                _, geometry = _screen_geometry(self._screen)
+                self._origin = (geometry.x(), geometry.y())
+                self._tracker.add_listener(self._follow_window)
+                self._tracker.start()
+                self._follow_window(self._tracker.rect())
+        self._grabbed_size = self.size()
+
+    def _follow_window(self, rect):
+        """Tracker listener: keep the window's rect relative to the grabbed screen."""
+        if rect is None:
+            return
+        from PySide6.QtCore import QRect
+        x, y, width, height = rect
+        self._window_area = QRect(x - self._origin[0], y - self._origin[1], width, height)
+
+    def grab(self):
+        screen = screen_at(self._screen)
+        # Updated by window system events, not queried per frame
+        area = self._window_area or self._area
+        if area is not None and area.isValid():
+            return screen.grabWindow(0, area.x(), area.y(), area.width(), area.height())
+        return screen.grabWindow(0)
+
+    def to_bgra(self, pixmap) -> np.ndarray:
+        return self._fit(qimage_to_bgra(pixmap.toImage()))
+
+    def _fit(self, frame: np.ndarray) -> np.ndarray:
+        """Scale a frame from a resized window to the output size."""
+        width, height = self.size()
+        grabbed = (frame.shape[1], frame.shape[0])
+        if grabbed != self._grabbed_size:
+            self._grabbed_size = grabbed
+            if grabbed != (width, height):
+                logger.info(f"Window resized to {grabbed[0]}x{grabbed[1]}, "
+                            f"scaling to {width}x{height}")
+        if grabbed == (width, height):
+            return frame
+        import cv2
+        return cv2.resize(frame, (width, height), interpolation=cv2.INTER_AREA)
+
+    def close(self):
+        if self._tracker is not None:
+            self._tracker.stop()
+            self._tracker = None
+        self._window_area = None
+
+
+class XShmSource(FrameSource):
+    """Native X11 grab through MIT-SHM into a reused shared memory buffer.
+
+    Raises XShmUnavailable on construction when there is no X display or
+    the server lacks the extension (Wayland, remote displays).
+    """
+
+    name = XSHM
+    fresh_buffers = False
+
+    def __init__(self, area=None, display: Optional[str] = None):
+        self._area = area if area is not None and area.isValid() else None
+        self._display = display
+        self._grabber = None
+        self._connect()
+
+    def _connect(self):
+        """Open the display connection; close() drops it, open() makes a new one."""
+        if self._grabber is None:
+            from .xshm import XShmGrabber
+            self._grabber = XShmGrabber(self._display)
+        return self._grabber
+
+    def size(self) -> Tuple[int, int]:
+        if self._area is not None:
+            return self._area.width(), self._area.height()
+        return self._connect().screen_size()
+
+    def open(self):
+        x, y = (self._area.x(), self._area.y()) if self._area is not None else (0, 0)
+        self._connect().configure(x, y, *self.size())
+
+    def grab(self):
+        return self._grabber.grab()
+
+    def close(self):
+        if self._grabber is not None:
+            self._grabber.close()
+            self._grabber = None
+
+
+class XImageSource(FrameSource):
+    """Grabs an X11 screen through GStreamer's ximagesrc (XShm) into an appsink.
+
+    The area is in desktop coordinates; without one the selected screen
+    (the primary one by default) is grabbed, not the whole root window.
+    """
+
+    name = X11
+    PULL_TIMEOUT = 1.0  # Seconds to wait for a frame before giving up
+
+    def __init__(self, area=None, fps: float = 30, display: Optional[str] = None,
+                 screen: Optional[int] = None):
+        self._area = area if area is not None and area.isValid() else None
+        self._fps = fps
+        self._display = display
+        self._screen = screen
+        self._pipeline = None
+        self._appsink = None
+
+    def _capture_area(self):
+        """Desktop rect to grab: the area, or the whole selected screen."""
+        if self._area is not None:
+            return self._area
+        _, geometry = _screen_geometry(self._screen)
+        return geometry
+
+    def size(self) -> Tuple[int, int]:
+        area = self._capture_area()
+        return area.width(), area.height()
+
+    def open(self):
+        if self._pipeline is not None:
+            return
+        import gi
+        gi.require_version('Gst', '1.0')
+        from gi.repository import Gst
+        from .encoder_select import make_element, link_elements
+        if not Gst.is_initialized():
+            Gst.init(None)
+        self._gst = Gst
+        area = self._capture_area()
+        width, height = area.width(), area.height()
+        properties = {
+            'use_damage': 'false',
+            'startx': str(area.x()), 'starty': str(area.y()),
+            'endx': str(area.x() + width - 1), 'endy': str(area.y() + height - 1),
+        }
+        if self._display:
+            properties['display_name'] = self._display
+        self._appsink = make_element('appsink', max_buffers='1', drop='true', sync='false')
+        elements = [
+            make_element('ximagesrc', **properties),
+            make_element('videoconvert'),
+            make_element('capsfilter', caps=(
+                f"video/x-raw,format=BGRx,width={width},height={height},"
+                f"framerate={int(self._fps)}/1"
+            )),
+            self._appsink,
+        ]
+        self._pipeline = Gst.Pipeline.new('x11-source')
+        for element in elements:
+            self._pipeline.add(element)
+        link_elements(elements)
+        if self._pipeline.set_state(Gst.State.PLAYING) == Gst.StateChangeReturn.FAILURE:
+            self.close()
+            raise Exception("Failed to start ximagesrc")
+        logger.info(f"X11 source started at {width}x{height}")
+
+    def grab(self):
+        Gst = self._gst
+        sample = self._appsink.emit('try-pull-sample', int(self.PULL_TIMEOUT * Gst.SECOND))
+        if sample is None:
+            raise Exception("ximagesrc delivered no frame")
+        return sample
+
+    def to_bgra(self, sample) -> np.ndarray:
+        Gst = self._gst
+        width, height = self.size()
+        buffer = sample.get_buffer()
+        ok, info = buffer.map(Gst.MapFlags.READ)
+        if not ok:
+            raise Exception("Could not map ximagesrc buffer")
+        try:
+            stride = info.size // height
+            mapped = np.frombuffer(info.data, dtype=np.uint8).reshape(height, stride)
+            # Copy out of the GStreamer buffer, which is unmapped right after
+            return mapped[:, :width * 4].reshape(height, width, 4).copy()
+        finally:
+            buffer.unmap(info)
+
+    def close(self):
+        if self._pipeline is not None:
+            self._pipeline.set_state(self._gst.State.NULL)
+            self._pipeline = None
+            self._appsink = None
+
+
+class VideoFileSource(FrameSource):
+    """Replays a video file, optionally in a loop."""
+
+    name = FILE
+    channels = 3
+
+    def __init__(self, path: str, loop: bool = True):
+        import cv2
+        self._cv2 = cv2
+        self._path = path
+        self._loop = loop
+        self._capture = None
+        probe = cv2.VideoCapture(path)
+        if not probe.isOpened():
+            raise Exception(f"Cannot open video file: {path}")
+        self._size = (int(probe.get(cv2.CAP_PROP_FRAME_WIDTH)),
+                      int(probe.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+        probe.release()
+
+    def size(self) -> Tuple[int, int]:
+        return self._size
+
+    def open(self):
+        if self._capture is None:
+            self._capture = self._cv2.VideoCapture(self._path)
+
+    def grab(self):
+        if self._capture is None:
+            self.open()
+        ok, frame = self._capture.read()
+        if not ok and self._loop:
+            self._capture.set(self._cv2.CAP_PROP_POS_FRAMES, 0)
+            ok, frame = self._capture.read()
+        if not ok:
+            raise SourceExhausted(f"End of {self._path}")
+        return frame  # BGR, a new array per read
+
+    def close(self):
+        if self._capture is not None:
+            self._capture.release()
+            self._capture = None
+
+
+class SyntheticSource(FrameSource):
+    """Deterministic generated frames, for headless runs and tests.
+
+    Frame n depends only on n and the seed: a static desktop-like
+    background, a box moving across it and a progress bar. With
+    change_every > 1 the content only changes every that many frames,
+    which exercises damage tracking.
+    """
+
+    name = SYNTHETIC
+
+    def __init__(self, width: int = DEFAULT_SIZE[0], height: int = DEFAULT_SIZE[1],
+                 seed: int = 0, change_every: int = 1, channels: int = 4):
+        self._width = width
+        self._height = height
+        self._change_every = max(1, change_every)
+        self._index = 0
+        self.channels = channels
+        rng = np.random.default_rng(seed)
+        background = np.empty((height, width, channels), dtype=np.uint8)
+        background[:] = rng.integers(32, 96, channels, dtype=np.uint8)
+        for _ in range(max(1, width * height // 40000)):
+            w = int(rng.integers(8, max(9, width // 4)))
+            h = int(rng.integers(4, max(5, height // 20)))
+            x = int(rng.integers(0, max(1, width - w)))
+            y = int(rng.integers(0, max(1, height - h)))
+            background[y:y + h, x:x + w] = rng.integers(0, 256, channels, dtype=np.uint8)
+        if channels == 4:
+            background[:, :, 3] = 255
+        self._background = background
+        self._box = max(1, min(width, height) // 8)
+
+    def size(self) -> Tuple[int, int]:
+        return self._width, self._height
+
+    def open(self):
+        self._index = 0
+
+    def frame(self, index: int) -> np.ndarray:
+        """The frame at index, as grab() would return it."""
+        step = index // self._change_every
+        frame = self._background.copy()
+        width, height, box = self._width, self._height, self._box
+        x = (step * 8) % max(1, width - box)
+        y = (height - box) // 2
+        frame[y:y + box, x:x + box, :3] = (255, 255 - step % 256, step % 256)
+        bar = (step % 100 + 1) * width // 100
+        frame[-4:, :bar, :3] = 255
+        return frame
+
+    def grab(self):
+        frame = self.frame(self._index)
+        self._index += 1
+        return frame
+
+
+def _desktop_area(area, screen: Optional[int]):
+    """Translate a screen-relative area (or a whole screen) to desktop coordinates."""
+    if screen is None:
+        return area
+    geometry = screen_at(screen).geometry()
+    if area is None or not area.isValid():
+        return geometry
+    return area.translated(geometry.topLeft())
+
+
+def create_source(kind: str, area=None, window_handle=None, path: Optional[str] = None,
+                  fps: float = 30, screen: Optional[int] = None) -> FrameSource:
+    """Build a frame source by name.
+
+    area is a QRect relative to the screen with the given index (the
+    primary screen if None), or None for the whole screen.
+    """
+    if kind == QT:
+        return QtScreenSource(area, window_handle, screen)
+    if kind == XSHM:
+        from .xshm import XShmUnavailable
+        try:
+            return XShmSource(_desktop_area(area, screen))
+        except XShmUnavailable as e:
+            logger.warning(f"XShm grab unavailable ({e}), using the Qt screen grab")
+            return QtScreenSource(area, window_handle, screen)
+    if kind == X11:
+        return XImageSource(_desktop_area(area, screen), fps, screen=screen)
+    if kind == FILE:
+        if not path:
+            raise Exception("The file source needs a video file")
+        return VideoFileSource(path)
+    if kind == SYNTHETIC:
+        if area is not None and area.isValid():
+            return SyntheticSource(area.width(), area.height())
+        return SyntheticSource()
+    raise ValueError(f"Unknown frame source: {kind}")
@@ -0,0 +1,307 @@
+"""
+Capture now, encode later: a memory-mapped spool of raw frames.
+
+SpoolWriter has the cv2.VideoWriter interface but does no encoding: each
+frame is copied into a memory-mapped, preallocated file, one after the
+other, and its pts, offset and size are recorded in an index table at the
+start of the file. The capture rate is then bounded by grab speed and disk
+bandwidth instead of encoder speed. encode_spool() turns a finished spool
+into a video afterwards, splitting it into ranges that are encoded in
+parallel worker processes and joined losslessly.
+
+File layout (little endian):
+    header:  magic, width, height, channels, zlib level, fps, capacity, count
+    index:   capacity entries of (pts, data offset, data size)
+    data:    frames, raw or zlib-compressed, starting at an aligned offset
+
+The frame count in the header is updated after each frame's index entry,
+so a spool cut short by a crash still reads back up to its last frame.
+"""
+import math
+import mmap
+import multiprocessing
+import os
+import shutil
+import struct
+import tempfile
+import zlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Callable, Iterator, Optional, Sequence, Tuple
+
+import numpy as np
+from loguru import logger
+
+from .concat import concat_segments
+from .video_writers import VIDEO_CODECS, open_opencv_writer
+
+MAGIC = b'CSSPOOL1'
+EXTENSION = '.csspool'
+HEADER = struct.Struct('<8sIIHHdII')
+INDEX = struct.Struct('<dQI')
+COUNT = struct.Struct('<I')
+COUNT_OFFSET = HEADER.size - COUNT.size
+
+DEFAULT_MAX_SECONDS = 4 * 3600  # Index capacity; 20 bytes per frame
+CHUNK_MB = 256                  # Size of each mapped and preallocated data window
+MIN_SEGMENT_SECONDS = 2         # Shortest range worth a worker and a concat entry
+SEGMENTS_PER_WORKER = 4         # More ranges than workers for progress and balance
+
+
+def _preallocate(fd: int, start: int, end: int):
+    """Reserve disk blocks for [start, end) where supported, else just extend the file."""
+    if hasattr(os, 'posix_fallocate'):
+        try:
+            os.posix_fallocate(fd, start, end - start)
+            return
+        except OSError:
+            pass  # Not supported by the filesystem
+    os.ftruncate(fd, end)
+
+
+class SpoolWriter:
+    """Writes frames to a memory-mapped spool file. Same interface as cv2.VideoWriter.
+
+    level 0 stores raw frames; 1-9 compresses each frame with zlib, which
+    trades capture CPU time for disk bandwidth.
+    """
+
+    def __init__(self, path: str, width: int, height: int, fps: float,
+                 channels: int = 3, max_seconds: float = DEFAULT_MAX_SECONDS,
+                 level: int = 0, chunk_mb: float = CHUNK_MB):
+        self._path = str(Path(path).with_suffix(EXTENSION))
+        self._shape = (height, width, channels)
+        self._frame_bytes = width * height * channels
+        self._fps = fps
+        self._level = level
+        self._capacity = max(1, int(math.ceil(max_seconds * fps)))
+        granularity = mmap.ALLOCATIONGRANULARITY
+        index_end = HEADER.size + self._capacity * INDEX.size
+        self._data_start = -(-index_end // granularity) * granularity
+        self._chunk_bytes = max(granularity, int(chunk_mb * 1024 * 1024) // granularity * granularity)
+        self._count = 0
+        self._end = self._data_start
+
+        self._file = open(self._path, 'w+b')
+        fd = self._file.fileno()
+        self._file_size = self._data_start + self._chunk_bytes
+        _preallocate(fd, 0, self._file_size)
+        self._index = mmap.mmap(fd, self._data_start)
+        HEADER.pack_into(self._index, 0, MAGIC, width, height, channels, level, fps,
+                         self._capacity, 0)
+        self._chunk = None
+        self._chunk_view = None
+        self._chunk_start = 0
+        self._map_chunk(self._data_start, 0)
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    @property
+    def frames(self) -> int:
+        return self._count
+
+    @property
+    def nbytes(self) -> int:
+        """Frame data written so far."""
+        return self._end - self._data_start
+
+    def isOpened(self) -> bool:
+        return self._file is not None
+
+    def _unmap_chunk(self):
+        # The NumPy view must go before the map can be closed
+        self._chunk_view = None
+        if self._chunk is not None:
+            self._chunk.close()
+            self._chunk = None
+
+    def _map_chunk(self, offset: int, needed: int):
+        """Map the data window that starts at or just before offset, growing the file."""
+        self._unmap_chunk()
+        start = offset - offset % mmap.ALLOCATIONGRANULARITY
+        length = max(self._chunk_bytes, offset - start + needed)
+        if start + length > self._file_size:
+            _preallocate(self._file.fileno(), self._file_size, start + length)
+            self._file_size = start + length
+        self._chunk = mmap.mmap(self._file.fileno(), length, offset=start)
+        self._chunk_view = np.frombuffer(self._chunk, dtype=np.uint8)
+        self._chunk_start = start
+
+    def write(self, frame: np.ndarray, pts: Optional[float] = None):
+        if self._file is None:
+            raise Exception("Spool writer is closed")
+        if frame.shape != self._shape:
+            raise ValueError(f"Frame shape {frame.shape} does not match spool shape {self._shape}")
+        if self._count >= self._capacity:
+            raise Exception(f"Spool is full after {self._capacity} frames")
+        if pts is None:
+            pts = self._count / self._fps
+        data = zlib.compress(frame, self._level) if self._level else None
+        size = len(data) if data is not None else self._frame_bytes
+
+        offset = self._end
+        if offset + size > self._chunk_start + len(self._chunk):
+            self._map_chunk(offset, size)
+        start = offset - self._chunk_start
+        target = self._chunk_view[start:start + size]
+        if data is None:
+            np.copyto(target.reshape(self._shape), frame)
+        else:
+            target[:] = np.frombuffer(data, dtype=np.uint8)
+
+        INDEX.pack_into(self._index, HEADER.size + self._count * INDEX.size, pts, offset, size)
+        self._count += 1
+        self._end = offset + size
+        COUNT.pack_into(self._index, COUNT_OFFSET, self._count)
+
+    def release(self):
+        """Close the spool, giving back the preallocated space past the last frame."""
+        if self._file is None:
+            return
+        self._unmap_chunk()
+        self._index.flush()
+        self._index.close()
+        self._file.truncate(self._end)
+        self._file.close()
+        self._file = None
+
+
+class SpoolReader:
+    """Reads frames back from a spool file."""
+
+    def __init__(self, path: str):
+        self._file = open(path, 'rb')
+        header = self._file.read(HEADER.size)
+        if len(header) < HEADER.size or header[:len(MAGIC)] != MAGIC:
+            self._file.close()
+            raise ValueError(f"Not a frame spool: {path}")
+        _magic, width, height, channels, level, fps, capacity, count = HEADER.unpack(header)
+        self.width = width
+        self.height = height
+        self.channels = channels
+        self.fps = fps
+        self._level = level
+        self._shape = (height, width, channels)
+        entries = np.frombuffer(self._file.read(count * INDEX.size), dtype=np.dtype(
+            [('pts', '<f8'), ('offset', '<u8'), ('size', '<u4')]
+        ))
+        # Entries past the end of a truncated file are not usable
+        file_size = os.fstat(self._file.fileno()).st_size
+        complete = entries['offset'] + entries['size'] <= file_size
+        self._entries = entries[:int(np.argmin(complete)) if not complete.all() else len(entries)]
+        self._buffer = np.empty(self._shape, dtype=np.uint8)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def pts(self, index: int) -> float:
+        return float(self._entries['pts'][index])
+
+    def frames(self, start: int = 0, stop: Optional[int] = None) -> Iterator[Tuple[float, np.ndarray]]:
+        """Yield (pts, frame) pairs. Frames are a buffer reused between iterations."""
+        for entry in self._entries[start:stop]:
+            self._file.seek(int(entry['offset']))
+            if self._level:
+                data = zlib.decompress(self._file.read(int(entry['size'])))
+                self._buffer.reshape(-1)[:] = np.frombuffer(data, dtype=np.uint8)
+            else:
+                self._file.readinto(memoryview(self._buffer).cast('B'))
+            yield float(entry['pts']), self._buffer
+
+    def __iter__(self) -> Iterator[Tuple[float, np.ndarray]]:
+        return self.frames()
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _encode_range(spool_path: str, start: int, stop: int, path: str,
+                  codecs: Sequence[str], on_frame: Optional[Callable[[], None]] = None) -> int:
+    """Encode frames [start, stop) of a spool to path; runs in a worker process."""
+    with SpoolReader(spool_path) as reader:
+        if reader.channels != 3:
+            raise ValueError(f"Cannot encode {reader.channels}-channel frames")
+        writer, _ = open_opencv_writer(path, reader.fps, reader.width, reader.height, codecs)
+        frames = 0
+        try:
+            for _pts, frame in reader.frames(start, stop):
+                writer.write(frame)
+                frames += 1
+                if on_frame is not None:
+                    on_frame()
+        finally:
+            writer.release()
+    return frames
+
+
+def encode_spool(spool_path: str, output_path: str, workers: int = 0,
+                 codecs: Sequence[str] = VIDEO_CODECS,
+                 on_progress: Optional[Callable[[float], None]] = None,
+                 remove_spool: bool = True) -> Optional[str]:
+    """Encode a spool into an AVI at output_path.
+
+    The spool is cut into ranges that are encoded by up to workers
+    processes (0 for one per CPU but one) and joined by stream copy.
+    Returns the path of the video, or None if it could not be joined, in
+    which case the segments and the spool are kept.
+    """
+    output_path = str(Path(output_path).with_suffix('.avi'))
+    with SpoolReader(spool_path) as reader:
+        count = len(reader)
+        fps = reader.fps
+    if not count:
+        raise Exception(f"Spool has no frames: {spool_path}")
+    workers = workers or max(1, (os.cpu_count() or 2) - 1)
+    segments = max(1, min(count // max(1, int(fps * MIN_SEGMENT_SECONDS)),
+                          workers * SEGMENTS_PER_WORKER))
+
+    if workers == 1 or segments == 1:
+        done = 0
+        step = max(1, int(fps))
+
+        def frame_done():
+            nonlocal done
+            done += 1
+            if on_progress is not None and done % step == 0:
+                on_progress(done / count)
+
+        _encode_range(spool_path, 0, count, output_path, codecs, frame_done)
+        joined = True
+    else:
+        bounds = [count * index // segments for index in range(segments + 1)]
+        segment_dir = Path(tempfile.mkdtemp(
+            prefix=Path(output_path).stem + '.segments-', dir=Path(output_path).parent
+        ))
+        paths = [str(segment_dir / f"segment_{index:06d}.avi") for index in range(segments)]
+        logger.info(f"Encoding {count} spooled frames in {segments} ranges on {workers} processes")
+        done = 0
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(min(workers, segments), mp_context=context) as pool:
+            futures = [
+                pool.submit(_encode_range, spool_path, bounds[index], bounds[index + 1],
+                            paths[index], list(codecs))
+                for index in range(segments)
+            ]
+            for future in as_completed(futures):
+                done += future.result()
+                if on_progress is not None:
+                    on_progress(done / count)
+        joined = concat_segments(paths, output_path)
+        if joined:
+            shutil.rmtree(segment_dir, ignore_errors=True)
+        else:
+            logger.warning(f"Segments left in {segment_dir}")
+
+    if not joined:
+        return None
+    if remove_spool:
+        Path(spool_path).unlink(missing_ok=True)
+    return output_path
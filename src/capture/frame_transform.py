@@ -0,0 +1,160 @@
+"""
+Crop, scale and colour conversion between grab and encode.
+
+FrameTransform turns a grabbed BGRA (or BGR) frame into the BGR frame the
+writer expects, optionally cropped, resized to a smaller output and
+converted to grayscale or to planar YUV 4:2:0 (I420/NV12) for writers
+that take encoder-native input. It replaces the plain BGRA to BGR copy, so a 4K
+screen recorded to a 1080p file costs one resize instead of a full-size
+copy plus a transcode afterwards.
+"""
+from typing import Optional, Tuple
+
+import numpy as np
+import cv2
+
+from .frame_convert import bgra_to_bgr
+from .yuv_convert import YuvConverter, YUV_FORMATS
+
+INTERPOLATIONS = {
+    'nearest': cv2.INTER_NEAREST,
+    'linear': cv2.INTER_LINEAR,
+    'area': cv2.INTER_AREA,
+    'cubic': cv2.INTER_CUBIC,
+    'lanczos': cv2.INTER_LANCZOS4,
+}
+DEFAULT_INTERPOLATION = 'area'
+
+# Closest GStreamer videoscale method for each interpolation
+VIDEOSCALE_METHODS = {
+    'nearest': 'nearest-neighbour',
+    'linear': 'bilinear',
+    'area': 'bilinear2',
+    'cubic': '4-tap',
+    'lanczos': 'lanczos',
+}
+
+BGR = 'bgr'
+GRAY = 'gray'
+COLORSPACES = (BGR, GRAY) + YUV_FORMATS
+
+Size = Tuple[int, int]
+Rect = Tuple[int, int, int, int]
+
+
+def scaled_size(size: Size, target: Size) -> Size:
+    """Resolve a requested output size against the input size.
+
+    A zero width or height keeps the aspect ratio of the other dimension;
+    (0, 0) keeps the input size. Dimensions are rounded to even numbers,
+    which YUV 4:2:0 encoders require.
+    """
+    width, height = size
+    target_width, target_height = target
+    if target_width <= 0 and target_height <= 0:
+        return size
+    if target_width <= 0:
+        target_width = width * target_height / height
+    elif target_height <= 0:
+        target_height = height * target_width / width
+    even = lambda value: max(2, int(value / 2 + 0.5) * 2)  # noqa: E731
+    return even(target_width), even(target_height)
+
+
+class FrameTransform:
+    """Crop to a region, scale to an output size and convert to BGR, gray or YUV.
+
+    crop is (x, y, width, height) relative to the input frame and clipped
+    to it; output is resolved with scaled_size() against the cropped size.
+    threads splits the YUV conversion into row bands.
+    """
+
+    def __init__(self, input_size: Size, output: Size = (0, 0), crop: Optional[Rect] = None,
+                 interpolation: str = DEFAULT_INTERPOLATION, colorspace: str = BGR,
+                 threads: int = 1):
+        if interpolation not in INTERPOLATIONS:
+            raise ValueError(f"Unknown interpolation: {interpolation}")
+        if colorspace not in COLORSPACES:
+            raise ValueError(f"Unknown colorspace: {colorspace}")
+        width, height = input_size
+        self._crop = None
+        if crop is not None:
+            x, y, w, h = crop
+            x, y = max(0, x), max(0, y)
+            w, h = min(w, width - x), min(h, height - y)
+            if w <= 0 or h <= 0:
+                raise ValueError(f"Crop {crop} is outside the {width}x{height} frame")
+            if (x, y, w, h) != (0, 0, width, height):
+                self._crop = (x, y, w, h)
+        cropped = self._crop[2:] if self._crop else (width, height)
+        self._output = scaled_size(cropped, output)
+        self._resize = self._output != cropped
+        self._downscale = self._output[0] * self._output[1] < cropped[0] * cropped[1]
+        self._interpolation = INTERPOLATIONS[interpolation]
+        self._gray = colorspace == GRAY
+        self._yuv = None
+        if colorspace in YUV_FORMATS:
+            if not self._resize:
+                # 4:2:0 needs even sizes; odd ones lose their last row or column
+                self._output = (cropped[0] // 2 * 2, cropped[1] // 2 * 2)
+            self._yuv = YuvConverter(*self._output, colorspace, threads)
+
+    @property
+    def output_size(self) -> Size:
+        return self._output
+
+    @property
+    def output_shape(self) -> Tuple[int, ...]:
+        """Array shape of the frames apply() returns."""
+        if self._yuv is not None:
+            return self._yuv.shape
+        return self._output[1], self._output[0], 3
+
+    @property
+    def identity(self) -> bool:
+        """True when apply() is the plain BGRA to BGR copy."""
+        return self._crop is None and not self._resize and not self._gray and self._yuv is None
+
+    def apply(self, frame: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """Transform a BGRA or BGR frame into a contiguous BGR or YUV frame.
+
+        out, if given, must hold output_shape bytes: (output height,
+        output width, 3) for BGR, (output height * 3 / 2, output width)
+        or the same with a trailing axis of 1 for YUV.
+        """
+        if self._crop is not None:
+            x, y, w, h = self._crop
+            frame = frame[y:y + h, x:x + w]
+        if self._yuv is not None:
+            return self._apply_yuv(frame, out)
+        if self._gray:
+            code = cv2.COLOR_BGRA2GRAY if frame.shape[2] == 4 else cv2.COLOR_BGR2GRAY
+            plane = cv2.cvtColor(frame, code)
+            if self._resize:
+                plane = cv2.resize(plane, self._output, interpolation=self._interpolation)
+            return cv2.cvtColor(plane, cv2.COLOR_GRAY2BGR, dst=out)
+        if not self._resize:
+            return bgra_to_bgr(frame, out)
+        if self._downscale:
+            # Shrink first so the channel conversion runs on fewer pixels
+            return bgra_to_bgr(
+                cv2.resize(frame, self._output, interpolation=self._interpolation), out
+            )
+        return cv2.resize(bgra_to_bgr(frame), self._output, dst=out,
+                          interpolation=self._interpolation)
+
+    def _apply_yuv(self, frame: np.ndarray, out: Optional[np.ndarray]) -> np.ndarray:
+        width, height = self._output
+        if self._resize:
+            # Scaling in BGRA keeps the chroma subsampling to one pass
+            frame = cv2.resize(frame, self._output, interpolation=self._interpolation)
+        elif frame.shape[:2] != (height, width):
+            frame = frame[:height, :width]
+        if out is not None:
+            out = out.reshape(self._yuv.shape)
+        return self._yuv.convert(frame, out)
+
+    def close(self):
+        """Stop the YUV conversion threads, if any."""
+        if self._yuv is not None:
+            self._yuv.close()
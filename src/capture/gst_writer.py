@@ -0,0 +1,114 @@
+"""
+cv2.VideoWriter-compatible writer that encodes through GStreamer appsrc.
+"""
+from typing import Optional
+
+import numpy as np
+import gi
+gi.require_version('Gst', '1.0')
+from gi.repository import Gst
+from loguru import logger
+
+from .encoder_select import (
+    EncoderProfile, EncoderSpec, make_element, make_encoder_chain, link_elements
+)
+from .yuv_convert import GST_FORMATS
+
+YUV_CAPS_FORMATS = tuple(GST_FORMATS.values())
+
+
+class AppSrcWriter:
+    """Feeds raw frames into appsrc ! <encoder chain> ! filesink.
+
+    Exposes the same write()/isOpened()/release() calls CaptureManager uses
+    on cv2.VideoWriter. Frames are timestamped at index / fps.
+    pixel_format is BGR, or I420/NV12 for frames in the planar layout
+    produced by yuv_convert.
+    """
+
+    EOS_TIMEOUT = 30  # Seconds to wait for the muxer to finish on release
+
+    def __init__(self, path: str, spec: EncoderSpec, profile: EncoderProfile,
+                 pixel_format: str = 'BGR'):
+        if not Gst.is_initialized():
+            Gst.init(None)
+        self._path = path
+        self._fps = profile.fps
+        self._frame_duration = Gst.SECOND // profile.fps
+        self._count = 0
+        self._pipeline = Gst.Pipeline.new('appsrc-writer')
+        self._appsrc = make_element(
+            'appsrc',
+            format='time',
+            is_live='false',
+            block='true',
+            max_bytes=str(profile.width * profile.height * 4 * 4),
+            caps=(
+                f"video/x-raw,format={pixel_format},width={profile.width},"
+                f"height={profile.height},framerate={profile.fps}/1"
+                # I420/NV12 frames come from OpenCV, which uses BT.601 limited range
+                + (",colorimetry=bt601" if pixel_format in YUV_CAPS_FORMATS else "")
+            ),
+        )
+        elements = [self._appsrc] + make_encoder_chain(spec, profile) + [
+            make_element('filesink', location=path)
+        ]
+        for element in elements:
+            self._pipeline.add(element)
+        link_elements(elements)
+        if self._pipeline.set_state(Gst.State.PLAYING) == Gst.StateChangeReturn.FAILURE:
+            self._pipeline.set_state(Gst.State.NULL)
+            self._pipeline = None
+            raise Exception(f"Failed to start {spec.element} pipeline")
+        logger.info(f"GStreamer writer started: {spec.element} -> {path}")
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    def isOpened(self) -> bool:
+        return self._pipeline is not None
+
+    def write(self, frame: np.ndarray, pts: Optional[float] = None):
+        """Push one frame; pts in seconds defaults to the frame index.
+
+        The frame is copied once, straight into GStreamer memory: the
+        caller's pooled buffer is reused as soon as this returns, while
+        appsrc queues the pushed buffer.
+        """
+        buffer = Gst.Buffer.new_allocate(None, frame.nbytes, None)
+        ok, info = buffer.map(Gst.MapFlags.WRITE)
+        if not ok:
+            raise Exception("Could not map GStreamer buffer")
+        try:
+            np.copyto(np.frombuffer(info.data, dtype=np.uint8).reshape(frame.shape), frame)
+        finally:
+            buffer.unmap(info)
+        if pts is None:
+            buffer.pts = self._count * self._frame_duration
+        else:
+            buffer.pts = int(pts * Gst.SECOND)
+        buffer.duration = self._frame_duration
+        self._count += 1
+        ret = self._appsrc.emit('push-buffer', buffer)
+        if ret != Gst.FlowReturn.OK:
+            raise Exception(f"GStreamer writer rejected frame: {ret.value_nick}")
+
+    def release(self):
+        """Send EOS and wait (bounded) for the file to be finalized."""
+        if self._pipeline is None:
+            return
+        try:
+            self._appsrc.emit('end-of-stream')
+            msg = self._pipeline.get_bus().timed_pop_filtered(
+                self.EOS_TIMEOUT * Gst.SECOND,
+                Gst.MessageType.EOS | Gst.MessageType.ERROR
+            )
+            if msg is None:
+                logger.warning("Timed out waiting for GStreamer writer to finish")
+            elif msg.type == Gst.MessageType.ERROR:
+                err, _debug = msg.parse_error()
+                logger.error(f"GStreamer writer error: {err.message}")
+        finally:
+            self._pipeline.set_state(Gst.State.NULL)
+            self._pipeline = None
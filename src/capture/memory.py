@@ -0,0 +1,76 @@
+"""
+Process memory sampling for recording sessions.
+"""
+import os
+import platform
+import threading
+import ctypes
+from ctypes import wintypes
+
+
+def current_rss() -> int:
+    """Resident set size of this process in bytes, or 0 if unknown."""
+    system = platform.system()
+    if system == 'Linux':
+        try:
+            with open('/proc/self/statm', 'rb') as statm:
+                return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+        except (OSError, ValueError, IndexError):
+            return 0
+    if system == 'Windows':
+        class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+            _fields_ = [
+                ('cb', wintypes.DWORD),
+                ('PageFaultCount', wintypes.DWORD),
+                ('PeakWorkingSetSize', ctypes.c_size_t),
+                ('WorkingSetSize', ctypes.c_size_t),
+                ('QuotaPeakPagedPoolUsage', ctypes.c_size_t),
+                ('QuotaPagedPoolUsage', ctypes.c_size_t),
+                ('QuotaPeakNonPagedPoolUsage', ctypes.c_size_t),
+                ('QuotaNonPagedPoolUsage', ctypes.c_size_t),
+                ('PagefileUsage', ctypes.c_size_t),
+                ('PeakPagefileUsage', ctypes.c_size_t),
+            ]
+        counters = PROCESS_MEMORY_COUNTERS()
+        counters.cb = ctypes.sizeof(counters)
+        handle = ctypes.windll.kernel32.GetCurrentProcess()
+        if ctypes.windll.psapi.GetProcessMemoryInfo(handle, ctypes.byref(counters), counters.cb):
+            return counters.WorkingSetSize
+        return 0
+    try:
+        import resource
+        # Only the lifetime peak is available here; bytes on macOS
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    except (ImportError, OSError):
+        return 0
+
+
+class PeakMemory:
+    """Tracks the peak resident memory seen during one session."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._baseline = 0
+        self._peak = 0
+
+    @property
+    def peak(self) -> int:
+        with self._lock:
+            return self._peak
+
+    @property
+    def baseline(self) -> int:
+        with self._lock:
+            return self._baseline
+
+    def reset(self):
+        rss = current_rss()
+        with self._lock:
+            self._baseline = rss
+            self._peak = rss
+
+    def sample(self) -> int:
+        rss = current_rss()
+        with self._lock:
+            self._peak = max(self._peak, rss)
+        return rss
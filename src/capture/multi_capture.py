@@ -0,0 +1,215 @@
+"""
+Concurrent recording of several screens or regions.
+
+Every stream is recorded by its own CaptureManager, so each has its own
+capture thread, encoder threads and writer, and streams are scheduled
+across cores instead of sharing one loop. All streams anchor frame 0 at
+the same monotonic clock time, so frame n of every stream is due at the
+same moment and carries the same timestamp.
+"""
+import threading
+import time
+from pathlib import Path
+from typing import List, Optional
+
+from PySide6.QtCore import QObject, QRect, Signal, Slot, Property
+from PySide6.QtGui import QGuiApplication
+from loguru import logger
+
+from .capture_manager import CaptureManager
+from .frame_sources import QT
+
+
+class MultiCaptureManager(QObject):
+    recordingChanged = Signal(bool)
+    streamsChanged = Signal()
+    captureComplete = Signal('QVariantList')  # Emits paths of all streams
+    errorOccurred = Signal(str)
+    finalizingChanged = Signal(bool)
+
+    START_LEAD = 0.2   # Seconds for every capture thread to be running before frame 0
+    STOP_TIMEOUT = 5.0  # Seconds before a stream still draining is logged; stop waits regardless
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._streams: List[dict] = []
+        self._managers: List[CaptureManager] = []
+        self._recording = False
+        self._finalizing = False
+        self._source_kind = QT
+        self._encoder_backend = 'opencv'
+        self._encoder_threads = 1
+        self._damage_tracking = False
+
+    @Property(bool, notify=recordingChanged)
+    def recording(self):
+        return self._recording
+
+    @Property(bool, notify=finalizingChanged)
+    def finalizing(self):
+        """True from stop until every stream has been written out."""
+        return self._finalizing
+
+    @Property('QVariantList', notify=streamsChanged)
+    def streams(self):
+        return [
+            {'label': stream['label'], 'screen': stream['screen'],
+             'area': stream['area'] or QRect()}
+            for stream in self._streams
+        ]
+
+    @Property(int, notify=streamsChanged)
+    def streamCount(self):
+        return len(self._streams)
+
+    def _add_stream(self, label: str, screen: Optional[int] = None, area=None, source=None):
+        if self._recording:
+            self.errorOccurred.emit("Cannot change streams while recording")
+            return
+        self._streams.append({'label': label, 'screen': screen, 'area': area, 'source': source})
+        logger.info(f"Stream added: {label}")
+        self.streamsChanged.emit()
+
+    @Slot(int)
+    def add_screen(self, index: int):
+        """Record a whole screen as its own stream."""
+        if not 0 <= index < len(QGuiApplication.screens()):
+            self.errorOccurred.emit(f"No screen with index {index}")
+            return
+        self._add_stream(f"screen{index}", screen=index)
+
+    @Slot()
+    def add_all_screens(self):
+        for index in range(len(QGuiApplication.screens())):
+            self.add_screen(index)
+
+    @Slot(int, QRect)
+    def add_region(self, screen: int, area: QRect):
+        """Record an area of a screen, relative to that screen, as its own stream."""
+        if not area.isValid():
+            self.errorOccurred.emit("Invalid capture region")
+            return
+        self._add_stream(f"region{len(self._streams)}", screen=screen, area=area)
+
+    def add_source(self, source, label: Optional[str] = None):
+        """Record from a FrameSource instance, e.g. a SyntheticSource."""
+        self._add_stream(label or f"source{len(self._streams)}", source=source)
+
+    @Slot()
+    def clear_streams(self):
+        if self._recording:
+            self.errorOccurred.emit("Cannot change streams while recording")
+            return
+        self._streams = []
+        self.streamsChanged.emit()
+
+    @Slot(str)
+    def set_frame_source(self, kind: str):
+        """Grab path for screen streams: qt, xshm or x11."""
+        self._source_kind = kind
+
+    @Slot(str)
+    def set_encoder_backend(self, backend: str):
+        self._encoder_backend = backend
+        if backend == 'gstreamer':
+            CaptureManager.probe_encoders_async()
+
+    @Slot(int)
+    def set_encoder_threads(self, count: int):
+        """Encoder threads per stream."""
+        self._encoder_threads = max(1, count)
+
+    @Slot(bool)
+    def set_damage_tracking(self, enabled: bool):
+        self._damage_tracking = bool(enabled)
+
+    def _make_manager(self, stream: dict) -> CaptureManager:
+        manager = CaptureManager(self)
+        manager.errorOccurred.connect(
+            lambda error, label=stream['label']: self.errorOccurred.emit(f"{label}: {error}")
+        )
+        manager.set_encoder_backend(self._encoder_backend)
+        manager.set_encoder_threads(self._encoder_threads)
+        manager.set_damage_tracking(self._damage_tracking)
+        if stream['source'] is not None:
+            manager.use_frame_source(stream['source'])
+        else:
+            manager.set_frame_source(self._source_kind)
+            if stream['screen'] is not None:
+                manager.set_screen(stream['screen'])
+            if stream['area'] is not None:
+                manager.set_capture_area(stream['area'])
+        return manager
+
+    @Slot(str)
+    def start_recording(self, output_path: str = None):
+        """Start all streams; each writes <stem>_<label> next to output_path."""
+        if self._recording:
+            return
+        if self._finalizing:
+            self.errorOccurred.emit("The previous recording is still being saved")
+            return
+        if not self._streams:
+            self.errorOccurred.emit("No streams to record")
+            return
+        if not output_path:
+            output_path = str(Path.home() / f"CaptureStudio_Recording_{int(time.time())}.avi")
+        base = Path(output_path)
+
+        for manager in self._managers:
+            if manager.wait(0):
+                manager.deleteLater()
+        self._managers = [self._make_manager(stream) for stream in self._streams]
+        start = time.monotonic() + self.START_LEAD
+        for manager, stream in zip(self._managers, self._streams):
+            manager.set_shared_start(start)
+            manager.start_recording(str(base.with_name(f"{base.stem}_{stream['label']}{base.suffix}")))
+            if not manager.recording:
+                logger.error(f"Stream {stream['label']} failed to start, stopping all streams")
+                self._begin_finalize(complete=False)
+                return
+        self._recording = True
+        self.recordingChanged.emit(True)
+        logger.info(f"Recording {len(self._managers)} streams")
+
+    def _stop_managers(self) -> List[str]:
+        """Stop every stream and wait until all of them have written their files."""
+        # Stop every capture loop first so all streams end on the same frame
+        for manager in self._managers:
+            manager.request_stop()
+        deadline = time.monotonic() + self.STOP_TIMEOUT
+        for manager in self._managers:
+            if not manager.wait(max(0.0, deadline - time.monotonic())):
+                logger.warning("Stream still draining, waiting for it to finish")
+                manager.wait()
+            manager.wait_spool_encodes()
+        return [manager.output_path for manager in self._managers if manager.output_path]
+
+    @Slot()
+    def stop_recording(self):
+        """Stop all streams; they drain on a worker thread, then captureComplete is emitted."""
+        if not self._recording:
+            return
+        self._recording = False
+        self.recordingChanged.emit(False)
+        self._begin_finalize(complete=True)
+
+    def _begin_finalize(self, complete: bool):
+        """Drain the streams on a worker thread; new recordings wait until it is done."""
+        self._finalizing = True
+        self.finalizingChanged.emit(True)
+        threading.Thread(target=self._finalize, args=(complete,), name="multi-finalize",
+                         daemon=True).start()
+
+    def _finalize(self, complete: bool):
+        paths = self._stop_managers()
+        logger.info(f"Stopped {len(self._managers)} streams")
+        self._finalizing = False
+        self.finalizingChanged.emit(False)
+        if complete:
+            self.captureComplete.emit(paths)
+
+    @property
+    def managers(self) -> List[CaptureManager]:
+        """Per-stream managers of the current or last recording."""
+        return list(self._managers)
@@ -0,0 +1,112 @@
+"""
+Live preview tap on the capture pipeline.
+
+The capture thread offers every grabbed frame to a PreviewTap. At most
+fps times a second, the tap decimates the frame into a small buffer by
+reading a strided view of the captured pixels (no full-resolution copy)
+and swaps it into the published slot. If the GUI thread is reading the
+slot at that moment, the preview frame is dropped instead of waiting,
+so the preview can never hold up recording.
+"""
+import math
+import threading
+import time
+from typing import Callable, Optional
+
+import numpy as np
+from PySide6.QtCore import QSize
+from PySide6.QtGui import QImage
+from PySide6.QtQuick import QQuickImageProvider
+
+DEFAULT_MAX_WIDTH = 480
+DEFAULT_FPS = 10.0
+
+
+class PreviewTap:
+    """Publishes downscaled, rate-limited copies of captured frames."""
+
+    def __init__(self, max_width: int = DEFAULT_MAX_WIDTH, fps: float = DEFAULT_FPS,
+                 on_frame: Optional[Callable[[int], None]] = None, clock=time.monotonic):
+        self.max_width = max_width
+        self.fps = fps
+        self.enabled = True
+        self._on_frame = on_frame
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._back = None
+        self._front = None
+        self._serial = 0
+        self._next_due = 0.0
+        self.published = 0
+        self.dropped = 0
+
+    @property
+    def serial(self) -> int:
+        """Increases with every published preview frame."""
+        return self._serial
+
+    def reset(self):
+        with self._lock:
+            self._front = None
+            self._back = None
+            self._next_due = 0.0
+
+    def offer(self, pixels: np.ndarray) -> bool:
+        """Called by the capture thread; returns True if a preview frame was published."""
+        if not self.enabled:
+            return False
+        now = self._clock()
+        if now < self._next_due:
+            return False
+        self._next_due = now + 1.0 / max(0.1, self.fps)
+        step = max(1, math.ceil(pixels.shape[1] / max(1, self.max_width)))
+        view = pixels[::step, ::step]
+        back = self._back
+        if back is None or back.shape != view.shape:
+            back = np.empty(view.shape, dtype=np.uint8)
+        np.copyto(back, view)
+        if not self._lock.acquire(blocking=False):
+            # The GUI is reading the current frame; skip this one
+            self._back = back
+            self.dropped += 1
+            return False
+        try:
+            self._back, self._front = self._front, back
+            self._serial += 1
+            serial = self._serial
+        finally:
+            self._lock.release()
+        self.published += 1
+        if self._on_frame is not None:
+            self._on_frame(serial)
+        return True
+
+    def image(self) -> QImage:
+        """The latest preview frame as a QImage, or a null image."""
+        with self._lock:
+            frame = self._front
+            if frame is None:
+                return QImage()
+            height, width, channels = frame.shape
+            image_format = QImage.Format_RGB32 if channels == 4 else QImage.Format_BGR888
+            # copy() detaches from the buffer the capture thread will reuse
+            return QImage(frame.data, width, height, frame.strides[0], image_format).copy()
+
+
+class PreviewImageProvider(QQuickImageProvider):
+    """Serves a PreviewTap as image://<name>/<serial>; the id only defeats caching."""
+
+    def __init__(self, tap: PreviewTap):
+        super().__init__(QQuickImageProvider.Image)
+        self._tap = tap
+
+    def requestImage(self, image_id: str, size: QSize, requested_size: QSize) -> QImage:
+        image = self._tap.image()
+        if image.isNull():
+            image = QImage(16, 9, QImage.Format_RGB32)
+            image.fill(0)
+        if requested_size.isValid() and not requested_size.isEmpty():
+            image = image.scaled(requested_size)
+        size.setWidth(image.width())
+        size.setHeight(image.height())
+        return image
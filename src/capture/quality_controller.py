@@ -0,0 +1,156 @@
+"""
+Adaptive recording quality driven by pipeline backpressure.
+
+Once a second the capture loop hands QualityController a PipelineLoad:
+the mean time the writer spent per frame (as a share of the frame
+interval), how full the frame queue is, and the CPU share of the busiest
+pipeline thread. Sustained overload steps the recording one level down a
+ladder, sustained headroom steps it back up, with hysteresis so it does
+not oscillate around a threshold.
+
+The ladder lowers the capture rate in whole divisions of the recording
+rate (30, 15, 10 fps...); the skipped slots are cheap to fill and text
+stays sharp. Resolution is left alone: a writer cannot change its frame
+size mid-file, so the encoder would get full-size frames either way.
+"""
+import os
+import threading
+import time
+from typing import Callable, List, NamedTuple, Optional, Sequence
+
+DEFAULT_MIN_FPS = 10.0
+
+# Load thresholds: above a high mark is overload, below all low marks is headroom
+ENCODE_HIGH = 0.9   # Writer time per frame over the frame interval
+ENCODE_LOW = 0.5
+QUEUE_HIGH = 0.5    # Queue depth over capacity
+QUEUE_LOW = 0.1
+CPU_HIGH = 0.9      # Share of one core used by the busiest pipeline thread
+CPU_LOW = 0.6
+
+DOWN_AFTER = 2      # Consecutive overloaded samples before stepping down
+UP_AFTER = 5        # Consecutive samples with headroom before stepping up
+
+
+class QualityLevel(NamedTuple):
+    fps: float     # Frames actually captured per second
+
+
+class QualityBounds(NamedTuple):
+    min_fps: float = DEFAULT_MIN_FPS
+
+
+class PipelineLoad(NamedTuple):
+    encode: float  # Mean writer time per frame / frame interval
+    queue: float   # Queue depth / capacity
+    cpu: float     # CPU share of the busiest pipeline thread, 0 to 1
+
+    @property
+    def overloaded(self) -> bool:
+        return self.encode > ENCODE_HIGH or self.queue > QUEUE_HIGH or self.cpu > CPU_HIGH
+
+    @property
+    def idle(self) -> bool:
+        return self.encode < ENCODE_LOW and self.queue < QUEUE_LOW and self.cpu < CPU_LOW
+
+
+def quality_ladder(fps: float, bounds: QualityBounds = QualityBounds()) -> List[QualityLevel]:
+    """Levels from best to worst within bounds."""
+    levels = []
+    divisor = 1
+    while divisor == 1 or fps / divisor >= bounds.min_fps:
+        levels.append(QualityLevel(fps / divisor))
+        divisor += 1
+    return levels
+
+
+def _thread_cpu_time(ident: int) -> float:
+    return time.clock_gettime(time.pthread_getcpuclockid(ident))
+
+
+# Per-thread CPU clocks are POSIX only
+THREAD_CLOCKS = hasattr(time, 'pthread_getcpuclockid')
+
+
+class CpuMeter:
+    """CPU share of the busiest of some threads between calls.
+
+    A single saturated capture or encoder thread is a bottleneck however
+    many cores are idle, so the busiest thread is what counts. Without
+    per-thread clocks the process CPU time spread over the threads stands in.
+    """
+
+    def __init__(self, threads: Callable[[], Sequence[threading.Thread]],
+                 clock=time.monotonic, process_time=time.process_time,
+                 thread_time=_thread_cpu_time if THREAD_CLOCKS else None):
+        self._threads = threads
+        self._clock = clock
+        self._process_time = process_time
+        self._thread_time = thread_time
+        self._last = (clock(), process_time())
+        self._thread_last = {}
+
+    def sample(self) -> float:
+        now, used = self._clock(), self._process_time()
+        wall = now - self._last[0]
+        process = used - self._last[1]
+        self._last = (now, used)
+        threads = [thread for thread in self._threads() if thread is not None and thread.ident]
+        if self._thread_time is None:
+            busiest = process / wall / max(1, len(threads)) if wall > 0 else 0.0
+            return min(1.0, max(0.0, busiest))
+        busiest = 0.0
+        seen = {}
+        for thread in threads:
+            try:
+                spent = self._thread_time(thread.ident)
+            except OSError:
+                continue  # The thread has exited
+            seen[thread.ident] = spent
+            if thread.ident in self._thread_last and wall > 0:
+                busiest = max(busiest, (spent - self._thread_last[thread.ident]) / wall)
+        self._thread_last = seen
+        return min(1.0, max(0.0, busiest))
+
+
+class QualityController:
+    """Steps a recording down and up the quality ladder on sustained load."""
+
+    def __init__(self, fps: float, bounds: QualityBounds = QualityBounds()):
+        self._levels = quality_ladder(fps, bounds)
+        self._index = 0
+        self._overloaded = 0
+        self._idle = 0
+        self.changes = 0
+
+    @property
+    def level(self) -> QualityLevel:
+        return self._levels[self._index]
+
+    @property
+    def levels(self) -> List[QualityLevel]:
+        return list(self._levels)
+
+    def sample(self, load: PipelineLoad) -> Optional[QualityLevel]:
+        """Feed one load sample; returns the new level if it changed."""
+        if load.overloaded:
+            self._overloaded += 1
+            self._idle = 0
+        elif load.idle:
+            self._idle += 1
+            self._overloaded = 0
+        else:
+            self._overloaded = self._idle = 0
+
+        index = self._index
+        if self._overloaded >= DOWN_AFTER and index < len(self._levels) - 1:
+            index += 1
+        elif self._idle >= UP_AFTER and index > 0:
+            index -= 1
+        if index == self._index:
+            return None
+        # Each change needs a fresh run of samples before the next one
+        self._index = index
+        self._overloaded = self._idle = 0
+        self.changes += 1
+        return self.level
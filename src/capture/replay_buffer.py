@@ -0,0 +1,140 @@
+"""
+In-memory instant replay.
+
+ReplayBuffer is a writer (same interface as cv2.VideoWriter) that keeps
+the most recent frames as compressed tile-delta records in memory instead
+of writing a file. Records are grouped into GOPs that each start with a
+keyframe; whole GOPs are evicted from the front once the buffer holds
+more than the requested seconds or exceeds its memory cap. save() writes
+the buffered GOPs out as a tile stream file as they are, without
+decoding or re-encoding, while capture keeps running.
+"""
+import threading
+from collections import deque
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+
+from .tile_codec import TileEncoder, EXTENSION
+
+DEFAULT_SECONDS = 30.0
+DEFAULT_MAX_MB = 256.0
+GOP_SECONDS = 2.0  # Keyframe spacing, which is also the eviction granularity
+
+
+class _Gop:
+    __slots__ = ('records', 'nbytes', 'start_pts', 'end_pts')
+
+    def __init__(self, pts: float):
+        self.records: List[bytes] = []
+        self.nbytes = 0
+        self.start_pts = pts
+        self.end_pts = pts
+
+
+class ReplayBuffer:
+    """Bounded ring of compressed GOPs for the last max_seconds of capture.
+
+    The memory cap is hard: when a single GOP outgrows it (a screen that
+    changes completely every frame), the next frame is forced to be a
+    keyframe so the older part can be evicted.
+    """
+
+    def __init__(self, width: int, height: int, fps: float,
+                 max_seconds: float = DEFAULT_SECONDS, max_mb: float = DEFAULT_MAX_MB,
+                 channels: int = 3, gop_seconds: float = GOP_SECONDS):
+        self._encoder = TileEncoder(width, height, fps, channels,
+                                    keyframe_interval=max(1, int(round(fps * gop_seconds))))
+        self._fps = fps
+        self._max_seconds = max_seconds
+        self._max_bytes = int(max_mb * 1024 * 1024)
+        self._lock = threading.Lock()
+        self._gops = deque()
+        self._nbytes = 0
+        self._open = True
+        self.evicted_gops = 0
+
+    @property
+    def path(self) -> Optional[str]:
+        """Replay buffers write no file until saved."""
+        return None
+
+    @property
+    def nbytes(self) -> int:
+        """Compressed bytes currently held."""
+        return self._nbytes
+
+    @property
+    def duration(self) -> float:
+        """Seconds of capture currently held."""
+        with self._lock:
+            if not self._gops:
+                return 0.0
+            return self._gops[-1].end_pts - self._gops[0].start_pts + 1.0 / self._fps
+
+    @property
+    def frames(self) -> int:
+        with self._lock:
+            return sum(len(gop.records) for gop in self._gops)
+
+    def isOpened(self) -> bool:
+        return self._open
+
+    def write(self, frame: np.ndarray, pts: Optional[float] = None):
+        if pts is None:
+            pts = self._encoder.frames / self._fps
+        record, keyframe = self._encoder.encode(frame, pts)
+        with self._lock:
+            if keyframe or not self._gops:
+                self._gops.append(_Gop(pts))
+            gop = self._gops[-1]
+            gop.records.append(record)
+            gop.nbytes += len(record)
+            gop.end_pts = pts
+            self._nbytes += len(record)
+            self._evict(pts)
+
+    def _evict(self, pts: float):
+        """Drop the oldest GOPs beyond the time window or the memory cap."""
+        gops = self._gops
+        while len(gops) > 1:
+            # The window still covers max_seconds without the oldest GOP
+            expired = pts - gops[1].start_pts >= self._max_seconds
+            if not expired and self._nbytes <= self._max_bytes:
+                break
+            self._nbytes -= gops.popleft().nbytes
+            self.evicted_gops += 1
+        if self._nbytes > self._max_bytes:
+            # One GOP is over the cap; start a new one so this one can go
+            self._encoder.force_keyframe()
+
+    def snapshot(self) -> List[bytes]:
+        """Records currently held, oldest first, starting at a keyframe."""
+        with self._lock:
+            return [record for gop in self._gops for record in gop.records]
+
+    def save(self, path: str) -> str:
+        """Write the buffered frames to a tile stream file; returns its path.
+
+        Only the list of records is taken under the lock, so writers are
+        not held up while the file is written.
+        """
+        records = self.snapshot()
+        if not records:
+            raise Exception("The replay buffer is empty")
+        path = str(Path(path).with_suffix(EXTENSION))
+        with open(path, 'wb') as file:
+            file.write(self._encoder.header())
+            for record in records:
+                file.write(record)
+        return path
+
+    def release(self):
+        """Stop taking frames; what is buffered can still be saved until clear()."""
+        self._open = False
+
+    def clear(self):
+        with self._lock:
+            self._gops.clear()
+            self._nbytes = 0
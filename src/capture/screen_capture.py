@@ -1,4 +1,4 @@
-from PySide6.QtCore import QObject, Signal, Slot, Property
+from PySide6.QtCore import QObject, QTimer, Signal, Slot, Property
 from PySide6.QtGui import QScreen, QGuiApplication
 import gi
 gi.require_version('Gst', '1.0')
@@ -8,27 +8,153 @@ import time
 from loguru import logger
 import platform
 
+from .capture_manager import CaptureManager
+from .encoder_select import (
+    EncoderProfile, select_encoder,
+    make_element, make_encoder_chain, link_elements
+)
+from .frame_transform import VIDEOSCALE_METHODS, DEFAULT_INTERPOLATION, scaled_size
+from .yuv_convert import GST_FORMATS, I420
+
 class ScreenRecorder(QObject):
     recordingChanged = Signal(bool)
     errorOccurred = Signal(str)
+    encoderChanged = Signal()
+    finalizingChanged = Signal(bool)
+    captureComplete = Signal(str)  # Emits path to the finalized file
+    
+    EOS_TIMEOUT = 60.0   # Seconds to wait for the muxer before forcing the pipeline down
     
     def __init__(self, parent=None):
         super().__init__(parent)
         self._recording = False
         self._pipeline = None
         self._mainloop = None
+        self._fps = 30
+        self._bitrate_kbps = 8000
+        self._codecs = ()
+        self._encoder = None
+        self._use_damage = False
+        self._output_path = None
+        self._finalizing = False
+        self._bus_watch = None
+        self._eos_timer = QTimer(self)
+        self._eos_timer.setSingleShot(True)
+        self._eos_timer.setInterval(int(self.EOS_TIMEOUT * 1000))
+        self._eos_timer.timeout.connect(self._eos_timed_out)
+        self._output_size = (0, 0)  # 0 keeps the screen size
+        self._interpolation = DEFAULT_INTERPOLATION
+        self._convert_threads = 0  # 0 lets videoconvert pick one per core
         
         # Initialize GStreamer
         Gst.init(None)
         
+        # Probed off the GUI thread and shared with the capture managers;
+        # results are cached on disk, so this is only slow on first launch
+        CaptureManager.probe_encoders_async(on_done=self.encoderChanged.emit)
+        
+    @property
+    def _probed_encoders(self):
+        return CaptureManager._probed_encoders or {}
+        
     @Property(bool, notify=recordingChanged)
     def recording(self):
         return self._recording
         
+    @Property(bool, notify=finalizingChanged)
+    def finalizing(self):
+        """True between stop and the file being finalized."""
+        return self._finalizing
+        
+    @Property(str, notify=encoderChanged)
+    def encoder(self):
+        """Element name of the encoder used for the current or last recording."""
+        return self._encoder.element if self._encoder else ""
+        
+    @Property('QStringList', notify=encoderChanged)
+    def availableEncoders(self):
+        return list(self._probed_encoders)
+        
+    @Slot(int)
+    def set_bitrate(self, kbps: int):
+        self._bitrate_kbps = max(100, kbps)
+        
+    @Slot('QStringList')
+    def set_preferred_codecs(self, codecs):
+        """Restrict encoder selection to these codecs (h264, vp8, vp9, av1)."""
+        self._codecs = tuple(codecs)
+        
+    @Slot(bool)
+    def set_damage_tracking(self, enabled: bool):
+        """Let ximagesrc read back only XDamage-reported regions (Linux only)."""
+        self._use_damage = bool(enabled)
+        
+    @Slot(int, int)
+    def set_output_size(self, width: int, height: int):
+        """Scale with videoscale before encoding; 0 keeps aspect ratio, 0, 0 the screen size."""
+        self._output_size = (max(0, width), max(0, height))
+        
+    @Slot(str)
+    def set_interpolation(self, name: str):
+        """Scaling filter: nearest, linear, area, cubic or lanczos."""
+        if name not in VIDEOSCALE_METHODS:
+            self.errorOccurred.emit(f"Unknown interpolation: {name}")
+            return
+        self._interpolation = name
+        
+    def _make_scaler(self, screen_size, width: int, height: int):
+        """videoscale and its caps, or nothing when recording at screen size."""
+        if (width, height) == screen_size:
+            return []
+        return [
+            make_element('videoscale', method=VIDEOSCALE_METHODS[self._interpolation]),
+            make_element('capsfilter', caps=f"video/x-raw,width={width},height={height}"),
+        ]
+        
+    @Slot(int)
+    def set_convert_threads(self, count: int):
+        """Threads for the RGB to I420 conversion, 0 for one per core."""
+        self._convert_threads = max(0, count)
+        
+    def _make_converter(self):
+        """Convert the grabbed RGB to I420 right after the source.
+        
+        Scaling and the encoder chain then move 1.5 bytes per pixel instead
+        of 4, and the chain's own videoconvert passes I420 straight through
+        to encoders that accept it.
+        """
+        return [
+            make_element('videoconvert', n_threads=self._convert_threads),
+            make_element('capsfilter', caps=f"video/x-raw,format={GST_FORMATS[I420]}"),
+        ]
+        
+    @Slot()
+    def reprobe_encoders(self):
+        """Ignore the cache and probe encoders again, in the background."""
+        CaptureManager.probe_encoders_async(force=True, on_done=self.encoderChanged.emit)
+        
+    def _make_source(self, screen):
+        """Screen source elements for this platform."""
+        if platform.system() == "Windows":
+            return [make_element('gdiscreencapsrc')]
+        # With XDamage, ximagesrc only copies changed regions into its buffer
+        # instead of reading back the whole screen every frame
+        use_damage = 'true' if self._use_damage else 'false'
+        return [make_element('ximagesrc', display_name=screen.name(), use_damage=use_damage)]
+        
     @Slot()
     def start_recording(self, output_path: str = None):
         if self._recording:
             return
+        if self._finalizing:
+            self.errorOccurred.emit("The previous recording is still being saved")
+            return
+        if CaptureManager._probed_encoders is None:
+            error = CaptureManager._probe_error
+            CaptureManager.probe_encoders_async(on_done=self.encoderChanged.emit)
+            self.errorOccurred.emit(f"GStreamer encoders are not available: {error}" if error
+                                    else "GStreamer encoders are still being probed, try again in a moment")
+            return
             
         try:
             screen = QGuiApplication.primaryScreen()
@@ -37,34 +163,42 @@ class ScreenRecorder(QObject):
             if not output_path:
                 output_path = str(Path.home() / f"CaptureStudio_{int(time.time())}.mp4")
             
-            # Create GStreamer pipeline for screen recording
-            if platform.system() == "Windows":
-                pipeline_str = (
-                    "gdiscreencapsrc ! "
-                    "videorate ! video/x-raw,framerate=30/1 ! "
-                    "videoconvert ! "
-                    "vp8enc cpu-used=8 threads=4 deadline=1 ! "
-                    "webmmux ! "
-                    f"filesink location={output_path.replace('.mp4', '.webm')}"
-                )
-            else:
-                pipeline_str = (
-                    f"ximagesrc display-name={screen.name()} use-damage=false ! "
-                    f"video/x-raw,framerate=30/1 ! "
-                    "videoconvert ! "
-                    "x264enc tune=zerolatency speed-preset=ultrafast ! "
-                    "mp4mux ! "
-                    f"filesink location={output_path}"
-                )
+            screen_size = (geometry.width(), geometry.height())
+            width, height = scaled_size(screen_size, self._output_size)
+            profile = EncoderProfile(
+                width=width,
+                height=height,
+                fps=self._fps,
+                bitrate_kbps=self._bitrate_kbps,
+                codecs=self._codecs,
+            )
+            self._encoder = select_encoder(self._probed_encoders, profile)
+            self.encoderChanged.emit()
+            output_path = str(Path(output_path).with_suffix(self._encoder.extension))
             
-            logger.info(f"Using pipeline: {pipeline_str}")
-            self._pipeline = Gst.parse_launch(pipeline_str)
+            # Build the pipeline:
+            # source ! videorate ! caps ! videoconvert ! I420 caps ! [videoscale ! caps]
+            #   ! <encoder chain> ! filesink
+            elements = self._make_source(screen) + [
+                make_element('videorate'),
+                make_element('capsfilter', caps=f"video/x-raw,framerate={self._fps}/1"),
+            ] + self._make_converter() + self._make_scaler(screen_size, width, height) + make_encoder_chain(self._encoder, profile) + [
+                make_element('filesink', location=output_path),
+            ]
+            self._pipeline = Gst.Pipeline.new('screen-recorder')
+            for element in elements:
+                self._pipeline.add(element)
+            link_elements(elements)
+            logger.info(
+                "Using pipeline: " + " ! ".join(e.get_factory().get_name() for e in elements)
+            )
             
             # Start the pipeline
             ret = self._pipeline.set_state(Gst.State.PLAYING)
             if ret == Gst.StateChangeReturn.FAILURE:
                 raise Exception("Failed to start pipeline")
                 
+            self._output_path = output_path
             self._recording = True
             self.recordingChanged.emit(True)
             logger.info(f"Started recording to {output_path}")
@@ -76,37 +210,59 @@ class ScreenRecorder(QObject):
             
     @Slot()
     def stop_recording(self):
+        """Send EOS and return; the bus watch reports when the file is finalized."""
         if not self._recording:
             return
             
         try:
-            # Send EOS event
-            self._pipeline.send_event(Gst.Event.new_eos())
-            
-            # Wait for EOS message
+            # The GUI's GLib main context dispatches bus messages as they arrive
             bus = self._pipeline.get_bus()
-            msg = bus.timed_pop_filtered(
-                Gst.CLOCK_TIME_NONE,
-                Gst.MessageType.EOS | Gst.MessageType.ERROR
-            )
-            
-            if msg.type == Gst.MessageType.ERROR:
-                err, debug = msg.parse_error()
-                raise Exception(f"Pipeline error: {err.message}")
-                
-            # Stop the pipeline
-            self._pipeline.set_state(Gst.State.NULL)
-            logger.info("Stopped recording")
-            
+            bus.add_signal_watch()
+            self._bus_watch = bus.connect('message', self._on_bus_message)
+            self._pipeline.send_event(Gst.Event.new_eos())
         except Exception as e:
             logger.error(f"Error stopping recording: {str(e)}")
             self.errorOccurred.emit(str(e))
-            
-        finally:
             self._cleanup()
+            return
+        self._recording = False
+        self.recordingChanged.emit(False)
+        self._finalizing = True
+        self.finalizingChanged.emit(True)
+        self._eos_timer.start()
+        
+    def _on_bus_message(self, bus, msg):
+        """Finish on EOS or an error; other messages are ignored."""
+        if msg.type == Gst.MessageType.EOS:
+            logger.info("Stopped recording")
+            self._finish(self._output_path)
+        elif msg.type == Gst.MessageType.ERROR:
+            err, debug = msg.parse_error()
+            logger.error(f"Error stopping recording: {err.message}")
+            self.errorOccurred.emit(f"Pipeline error: {err.message}")
+            self._finish(None)
+            
+    @Slot()
+    def _eos_timed_out(self):
+        logger.warning("Timed out waiting for the pipeline to finish, the file may be truncated")
+        self.errorOccurred.emit("Timed out saving the recording, the file may be truncated")
+        self._finish(None)
+        
+    def _finish(self, path):
+        self._eos_timer.stop()
+        self._cleanup()
+        self._finalizing = False
+        self.finalizingChanged.emit(False)
+        if path:
+            self.captureComplete.emit(path)
             
     def _cleanup(self):
         if self._pipeline:
+            if self._bus_watch is not None:
+                bus = self._pipeline.get_bus()
+                bus.disconnect(self._bus_watch)
+                bus.remove_signal_watch()
+                self._bus_watch = None
             self._pipeline.set_state(Gst.State.NULL)
             self._pipeline = None
         self._recording = False
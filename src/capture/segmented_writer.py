@@ -0,0 +1,216 @@
+"""
+Segmented, crash-safe recording output.
+
+SegmentedWriter rolls over to a new file every N seconds or M megabytes.
+After every rollover it atomically rewrites a JSON manifest and an ffconcat
+list, so at any point in time all finished segments are complete, playable
+files that can be uploaded or joined without re-encoding. If the process
+dies, at most the segment being written is lost.
+"""
+import json
+import os
+import shutil
+from pathlib import Path
+from typing import Callable, List, Optional, Tuple
+
+from loguru import logger
+
+from .concat import concat_segments, write_concat_list
+
+MANIFEST_VERSION = 1
+
+OpenWriter = Callable[[str], Tuple[object, str]]
+
+
+def manifest_path(output_path: str) -> str:
+    path = Path(output_path)
+    return str(path.with_name(path.stem + '.manifest.json'))
+
+
+def segments_dir(output_path: str) -> Path:
+    path = Path(output_path)
+    return path.with_name(path.stem + '.segments')
+
+
+def _write_atomic(path: Path, text: str):
+    """Replace path with text so readers never see a half-written file."""
+    tmp = path.with_name(path.name + '.tmp')
+    with open(tmp, 'w', encoding='utf-8') as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+class SegmentedWriter:
+    """Writer that splits the recording into independently playable segments.
+
+    open_writer(path) must return (writer, actual_path) for one segment;
+    the writer only needs write(), isOpened() and release(), so any of the
+    recording backends can be segmented.
+    """
+
+    def __init__(self, output_path: str, fps: float, open_writer: OpenWriter,
+                 segment_seconds: float = 60.0, segment_mb: float = 0.0,
+                 on_segment: Optional[Callable[[str], None]] = None):
+        if segment_seconds <= 0 and segment_mb <= 0:
+            raise ValueError("Need a segment duration or size limit")
+        self._output = Path(output_path)
+        self._fps = fps
+        self._open_writer = open_writer
+        self._segment_frames = int(round(segment_seconds * fps)) if segment_seconds > 0 else 0
+        self._segment_bytes = int(segment_mb * 1024 * 1024) if segment_mb > 0 else 0
+        self._size_check_interval = max(1, int(fps))
+        self._on_segment = on_segment
+        self._dir = segments_dir(output_path)
+        self._dir.mkdir(parents=True, exist_ok=True)
+        self._manifest = Path(manifest_path(output_path))
+        self._segments: List[dict] = []
+        self._writer = None
+        self._frames = 0
+        self._segment_frame_count = 0
+        self._extension = None
+        self._complete = False
+        self._open_segment()
+
+    @property
+    def path(self) -> str:
+        """Path of the joined recording."""
+        return str(self._output.with_suffix(self._extension))
+
+    @property
+    def manifest(self) -> str:
+        return str(self._manifest)
+
+    @property
+    def segments(self) -> List[str]:
+        return [str(self._dir / segment['file']) for segment in self._segments]
+
+    def isOpened(self) -> bool:
+        return self._writer is not None and self._writer.isOpened()
+
+    def _open_segment(self):
+        index = len(self._segments)
+        requested = self._dir / f"{self._output.stem}_{index:05d}"
+        writer, actual = self._open_writer(str(requested))
+        self._writer = writer
+        self._extension = Path(actual).suffix
+        self._segment_frame_count = 0
+        self._segments.append({
+            'index': index,
+            'file': Path(actual).name,
+            'start': self._frames / self._fps,
+            'duration': 0.0,
+            'frames': 0,
+            'bytes': 0,
+            'complete': False,
+        })
+        self._write_manifest()
+
+    def _close_segment(self):
+        if self._writer is None:
+            return
+        self._writer.release()
+        self._writer = None
+        segment = self._segments[-1]
+        segment_path = self._dir / segment['file']
+        if not segment['frames']:
+            # Nothing was written; don't leave an empty file in the list
+            segment_path.unlink(missing_ok=True)
+            self._segments.pop()
+            self._write_manifest()
+            return
+        segment['duration'] = segment['frames'] / self._fps
+        segment['bytes'] = segment_path.stat().st_size if segment_path.exists() else 0
+        segment['complete'] = True
+        self._write_manifest()
+        logger.info(
+            f"Segment {segment['index']} finished: {segment['file']} "
+            f"({segment['duration']:.1f}s, {segment['bytes'] / (1024 * 1024):.1f} MB)"
+        )
+        if self._on_segment:
+            self._on_segment(str(segment_path))
+
+    def _write_manifest(self):
+        complete = [s for s in self._segments if s['complete']]
+        manifest = {
+            'version': MANIFEST_VERSION,
+            'fps': self._fps,
+            'output': self._output.with_suffix(self._extension or '').name,
+            'complete': self._complete,
+            'segments': self._segments,
+        }
+        _write_atomic(self._manifest, json.dumps(manifest, indent=2))
+        write_concat_list(
+            [str(self._dir / s['file']) for s in complete],
+            str(self._manifest.with_name(self._output.stem + '.ffconcat')),
+            [s['duration'] for s in complete],
+        )
+
+    def _should_roll_over(self) -> bool:
+        count = self._segment_frame_count
+        if self._segment_frames and count >= self._segment_frames:
+            return True
+        if self._segment_bytes and count % self._size_check_interval == 0 and count:
+            current = self._dir / self._segments[-1]['file']
+            try:
+                return current.stat().st_size >= self._segment_bytes
+            except OSError:
+                return False
+        return False
+
+    def write(self, frame):
+        if self._should_roll_over():
+            self._close_segment()
+            self._open_segment()
+        self._writer.write(frame)
+        self._frames += 1
+        self._segment_frame_count += 1
+        self._segments[-1]['frames'] = self._segment_frame_count
+
+    def release(self):
+        """Close the last segment and mark the manifest complete."""
+        if self._writer is None:
+            return
+        self._close_segment()
+        self._complete = True
+        self._write_manifest()
+
+
+def load_manifest(path: str) -> dict:
+    """Read a manifest, including one left behind by a crashed session."""
+    return json.loads(Path(path).read_text(encoding='utf-8'))
+
+
+def join_segments(manifest: str, output_path: Optional[str] = None,
+                  remove_segments: bool = False) -> Optional[str]:
+    """Join the complete segments of a manifest by stream copy.
+
+    Incomplete segments (the one being written when a session crashed) are
+    left out. Returns the joined file's path, or None if joining failed.
+    """
+    manifest_file = Path(manifest)
+    data = load_manifest(manifest)
+    folder = manifest_file.parent
+    stem = manifest_file.name[:-len('.manifest.json')]
+    seg_dir = folder / (stem + '.segments')
+    segments = [str(seg_dir / s['file']) for s in data['segments'] if s['complete']]
+    if not segments:
+        return None
+    output = output_path or str(folder / data['output'])
+    if len(segments) == 1 and not remove_segments:
+        # Keep the segment for uploads; a copy is still a stream copy
+        shutil.copyfile(segments[0], output)
+        return output
+    if not concat_segments(segments, output):
+        return None
+    if remove_segments:
+        for segment in segments:
+            Path(segment).unlink(missing_ok=True)
+        for leftover in (manifest_file, folder / (stem + '.ffconcat')):
+            leftover.unlink(missing_ok=True)
+        try:
+            seg_dir.rmdir()
+        except OSError:
+            pass
+    return output
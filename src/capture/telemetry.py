@@ -0,0 +1,255 @@
+"""
+Per-stage timing and frame counters for recording sessions.
+
+Each pipeline stage records its duration into a fixed-bucket histogram, so
+recording is O(1), needs no allocation per frame and percentiles can be
+read at any time without keeping samples. Snapshots are plain dicts that
+can be handed to QML or written as JSON lines or Prometheus text.
+"""
+import bisect
+import json
+import math
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+# Pipeline stages, in the order a frame passes through them
+GRAB = 'grab'
+TO_IMAGE = 'to_image'
+CONVERT = 'convert'
+ENCODE = 'encode'
+SLEEP = 'sleep'
+JITTER = 'jitter'
+STAGES = (GRAB, TO_IMAGE, CONVERT, ENCODE, SLEEP, JITTER)
+
+PERCENTILES = (50, 95, 99)
+
+
+def _default_bounds() -> List[float]:
+    """Bucket upper bounds from 10 us to ~10 s, eight buckets per decade."""
+    return [10 ** (exponent / 8) * 1e-5 for exponent in range(49)]
+
+
+class StageHistogram:
+    """Histogram of durations in seconds with log-spaced buckets."""
+
+    def __init__(self, bounds: Optional[Sequence[float]] = None):
+        self._bounds = list(bounds) if bounds is not None else _default_bounds()
+        self._counts = [0] * (len(self._bounds) + 1)  # Last bucket is +Inf
+        self._count = 0
+        self._sum = 0.0
+        self._max = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def bounds(self) -> List[float]:
+        return list(self._bounds)
+
+    @property
+    def count(self) -> int:
+        return self._count
+
+    @property
+    def total(self) -> float:
+        return self._sum
+
+    @property
+    def max(self) -> float:
+        return self._max
+
+    @property
+    def mean(self) -> float:
+        return self._sum / self._count if self._count else 0.0
+
+    def record(self, seconds: float):
+        seconds = max(0.0, seconds)
+        index = bisect.bisect_left(self._bounds, seconds)
+        with self._lock:
+            self._counts[index] += 1
+            self._count += 1
+            self._sum += seconds
+            if seconds > self._max:
+                self._max = seconds
+
+    def buckets(self) -> List[int]:
+        """Counts per bucket; the last entry counts values above all bounds."""
+        with self._lock:
+            return list(self._counts)
+
+    def percentile(self, p: float) -> float:
+        """Estimate the p-th percentile, interpolating inside the bucket."""
+        with self._lock:
+            counts = list(self._counts)
+            total = self._count
+            largest = self._max
+        if not total:
+            return 0.0
+        rank = p / 100.0 * total
+        seen = 0
+        for index, count in enumerate(counts):
+            if count and seen + count >= rank:
+                lower = self._bounds[index - 1] if index > 0 else 0.0
+                upper = self._bounds[index] if index < len(self._bounds) else largest
+                upper = min(upper, largest)
+                lower = min(lower, upper)
+                return lower + (upper - lower) * (rank - seen) / count
+            seen += count
+        return largest
+
+    def reset(self):
+        with self._lock:
+            self._counts = [0] * (len(self._bounds) + 1)
+            self._count = 0
+            self._sum = 0.0
+            self._max = 0.0
+
+
+class Telemetry:
+    """Stage timings and frame counters of one recording session."""
+
+    def __init__(self, fps: float, stages: Sequence[str] = STAGES,
+                 clock=time.monotonic):
+        self._fps = fps
+        self._clock = clock
+        self._stages: Dict[str, StageHistogram] = {name: StageHistogram() for name in stages}
+        self._lock = threading.Lock()
+        self._counters = {'captured': 0, 'written': 0, 'dropped': 0, 'late': 0, 'missed': 0}
+        self._start = clock()
+        self._end = None
+        self._window_start = self._start
+        self._window_written = 0
+        self._recent_fps = 0.0
+
+    @property
+    def fps(self) -> float:
+        return self._fps
+
+    def stage(self, name: str) -> StageHistogram:
+        return self._stages[name]
+
+    def record(self, stage: str, seconds: float):
+        self._stages[stage].record(seconds)
+
+    def count(self, counter: str, amount: int = 1):
+        with self._lock:
+            self._counters[counter] += amount
+
+    def set_count(self, counter: str, value: int):
+        """Mirror a counter kept elsewhere, e.g. by the queue or scheduler."""
+        with self._lock:
+            self._counters[counter] = value
+
+    def counter(self, name: str) -> int:
+        return self._counters[name]
+
+    def _now(self) -> float:
+        return self._end if self._end is not None else self._clock()
+
+    def stop(self):
+        """Freeze elapsed time and fps at the end of the session."""
+        self._end = self._clock()
+
+    def effective_fps(self) -> float:
+        """Frames written per second of wall time since the session started."""
+        elapsed = self._now() - self._start
+        return self._counters['written'] / elapsed if elapsed > 0 else 0.0
+
+    def recent_fps(self) -> float:
+        """Frames written per second since the previous call."""
+        now = self._now()
+        with self._lock:
+            elapsed = now - self._window_start
+            if elapsed >= 0.5:
+                written = self._counters['written']
+                self._recent_fps = (written - self._window_written) / elapsed
+                self._window_written = written
+                self._window_start = now
+            return self._recent_fps
+
+    def snapshot(self) -> dict:
+        """Counters, fps and per-stage statistics in milliseconds."""
+        stages = {}
+        for name, histogram in self._stages.items():
+            stats = {'count': histogram.count, 'mean_ms': histogram.mean * 1000.0,
+                     'max_ms': histogram.max * 1000.0}
+            for p in PERCENTILES:
+                stats[f'p{p}_ms'] = histogram.percentile(p) * 1000.0
+            stages[name] = stats
+        with self._lock:
+            counters = dict(self._counters)
+        return {
+            'timestamp': time.time(),
+            'elapsed': self._now() - self._start,
+            'target_fps': self._fps,
+            'effective_fps': self.effective_fps(),
+            'recent_fps': self.recent_fps(),
+            **counters,
+            'stages': stages,
+        }
+
+    def summary(self) -> str:
+        """One-line p50/p95/p99 per stage, for the log."""
+        parts = []
+        for name, histogram in self._stages.items():
+            if histogram.count:
+                p50, p95, p99 = (histogram.percentile(p) * 1000.0 for p in PERCENTILES)
+                parts.append(f"{name} {p50:.2f}/{p95:.2f}/{p99:.2f}")
+        return f"{self.effective_fps():.1f} fps, p50/p95/p99 ms: " + ", ".join(parts)
+
+    def to_prometheus(self, prefix: str = 'capturestudio') -> str:
+        """Render the session in the Prometheus text exposition format."""
+        lines = []
+        snapshot = self.snapshot()
+        for name in self._counters:
+            metric = f'{prefix}_frames_{name}_total'
+            lines += [f'# TYPE {metric} counter', f'{metric} {snapshot[name]}']
+        for name in ('effective_fps', 'recent_fps'):
+            metric = f'{prefix}_{name}'
+            lines += [f'# TYPE {metric} gauge', f'{metric} {snapshot[name]:.3f}']
+
+        metric = f'{prefix}_stage_seconds'
+        lines.append(f'# TYPE {metric} histogram')
+        for name, histogram in self._stages.items():
+            cumulative = 0
+            counts = histogram.buckets()
+            for bound, count in zip(histogram.bounds + [math.inf], counts):
+                cumulative += count
+                le = '+Inf' if math.isinf(bound) else f'{bound:.6g}'
+                lines.append(f'{metric}_bucket{{stage="{name}",le="{le}"}} {cumulative}')
+            lines.append(f'{metric}_sum{{stage="{name}"}} {histogram.total:.9f}')
+            lines.append(f'{metric}_count{{stage="{name}"}} {cumulative}')
+        return "\n".join(lines) + "\n"
+
+
+class TelemetryDump:
+    """Periodic telemetry export.
+
+    A '.prom' path is rewritten atomically with the latest Prometheus text,
+    suitable for node_exporter's textfile collector. Any other path gets one
+    JSON snapshot appended per dump.
+    """
+
+    def __init__(self, path: str):
+        self._path = Path(path)
+        self._prometheus = self._path.suffix == '.prom'
+        self._file = None if self._prometheus else open(self._path, 'a', encoding='utf-8')
+
+    @property
+    def path(self) -> str:
+        return str(self._path)
+
+    def dump(self, telemetry: Telemetry):
+        if self._prometheus:
+            tmp = self._path.with_name(self._path.name + '.tmp')
+            tmp.write_text(telemetry.to_prometheus(), encoding='utf-8')
+            os.replace(tmp, self._path)
+        else:
+            self._file.write(json.dumps(telemetry.snapshot()) + "\n")
+            self._file.flush()
+
+    def close(self):
+        if self._file:
+            self._file.close()
+            self._file = None
@@ -0,0 +1,204 @@
+"""
+Lossless tile-delta intermediate format for mostly static recordings.
+
+Each frame is split into square tiles and compared against the previous
+frame; only tiles that changed are stored, zlib-compressed. Slides and
+terminals typically change a handful of tiles per frame, so the stream is
+a small fraction of the raw size and can be transcoded later without loss.
+
+File layout (little endian):
+    header:  magic, width, height, channels, tile size, fps
+    frame:   pts, flags, tile count, payload size, payload
+    payload: zlib(uint32 tile indices + tile pixels in index order)
+
+Tiles are stored at full tile size; the right and bottom edges are padded
+with zeros and cropped again when decoding.
+"""
+import struct
+import zlib
+from pathlib import Path
+from typing import Iterator, Optional, Tuple
+
+import numpy as np
+
+from .damage import TileDiff
+
+MAGIC = b'CSTILE1\0'
+EXTENSION = '.cstile'
+HEADER = struct.Struct('<8sIIHHd')
+FRAME = struct.Struct('<dBII')
+
+FLAG_KEYFRAME = 1
+
+
+class _TileGrid:
+    """Padded canvas with a tile view over it."""
+
+    def __init__(self, width: int, height: int, channels: int, tile: int):
+        self.width = width
+        self.height = height
+        self.rows = (height + tile - 1) // tile
+        self.cols = (width + tile - 1) // tile
+        self.canvas = np.zeros((self.rows * tile, self.cols * tile, channels), dtype=np.uint8)
+        # (rows, cols, tile, tile, channels) view of the canvas
+        self.tiles = self.canvas.reshape(self.rows, tile, self.cols, tile, channels).swapaxes(1, 2)
+
+    @property
+    def visible(self) -> np.ndarray:
+        return self.canvas[:self.height, :self.width]
+
+
+class TileEncoder:
+    """Encodes frames into tile-delta records: a FRAME header plus payload.
+
+    A keyframe stores every tile and is emitted every keyframe_interval
+    frames, or on the next frame after force_keyframe().
+    """
+
+    def __init__(self, width: int, height: int, fps: float, channels: int = 3,
+                 tile_size: int = 64, keyframe_interval: Optional[int] = None, level: int = 1):
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.channels = channels
+        self.tile_size = tile_size
+        self._grid = _TileGrid(width, height, channels, tile_size)
+        self._diff = TileDiff(tile_size)
+        self._keyframe_interval = keyframe_interval or int(fps * 10)
+        self._level = level
+        self._count = 0
+        self._since_keyframe = None
+        self.raw_bytes = 0
+        self.tiles_written = 0
+
+    @property
+    def frames(self) -> int:
+        return self._count
+
+    def header(self) -> bytes:
+        return HEADER.pack(MAGIC, self.width, self.height, self.channels, self.tile_size, self.fps)
+
+    def force_keyframe(self):
+        self._since_keyframe = None
+
+    def encode(self, frame: np.ndarray, pts: Optional[float] = None) -> Tuple[bytes, bool]:
+        """Encode one frame; returns the record and whether it is a keyframe."""
+        grid = self._grid
+        if frame.shape[:2] != (grid.height, grid.width):
+            raise ValueError(
+                f"Frame size {frame.shape[1]}x{frame.shape[0]} does not match "
+                f"stream size {grid.width}x{grid.height}"
+            )
+        if pts is None:
+            pts = self._count / self.fps
+        keyframe = self._since_keyframe is None or self._since_keyframe >= self._keyframe_interval
+        if keyframe:
+            mask = np.ones((grid.rows, grid.cols), dtype=bool)
+            self._since_keyframe = 0
+        else:
+            mask = self._diff.compare(frame, grid.visible)
+        self._since_keyframe += 1
+
+        indices = np.flatnonzero(mask).astype(np.uint32)
+        if len(indices):
+            np.copyto(grid.visible, frame)
+            # Fancy indexing gathers only the changed tiles
+            pixels = grid.tiles[mask]
+            payload = zlib.compress(indices.tobytes() + pixels.tobytes(), self._level)
+        else:
+            payload = b''
+
+        flags = FLAG_KEYFRAME if keyframe else 0
+        self._count += 1
+        self.tiles_written += len(indices)
+        self.raw_bytes += frame.shape[0] * frame.shape[1] * frame.shape[2]
+        return FRAME.pack(pts, flags, len(indices), len(payload)) + payload, keyframe
+
+
+class TileStreamWriter:
+    """Writes frames as tile deltas. Same interface as cv2.VideoWriter."""
+
+    def __init__(self, path: str, width: int, height: int, fps: float,
+                 channels: int = 3, tile_size: int = 64,
+                 keyframe_interval: Optional[int] = None, level: int = 1):
+        self._path = path
+        self._encoder = TileEncoder(width, height, fps, channels, tile_size,
+                                    keyframe_interval, level)
+        self._file = open(path, 'wb')
+        self._file.write(self._encoder.header())
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    @property
+    def frames(self) -> int:
+        return self._encoder.frames
+
+    @property
+    def compression_ratio(self) -> float:
+        """Raw frame bytes written per byte on disk."""
+        size = self._file.tell() if self._file else Path(self._path).stat().st_size
+        return self._encoder.raw_bytes / size if size else 0.0
+
+    @property
+    def tiles_written(self) -> int:
+        return self._encoder.tiles_written
+
+    def isOpened(self) -> bool:
+        return self._file is not None
+
+    def write(self, frame: np.ndarray, pts: Optional[float] = None):
+        record, _ = self._encoder.encode(frame, pts)
+        self._file.write(record)
+
+    def release(self):
+        if self._file:
+            self._file.close()
+            self._file = None
+
+
+class TileStreamReader:
+    """Decodes a tile stream back into full frames."""
+
+    def __init__(self, path: str):
+        self._file = open(path, 'rb')
+        magic, width, height, channels, tile, fps = HEADER.unpack(self._file.read(HEADER.size))
+        if magic != MAGIC:
+            self._file.close()
+            raise ValueError(f"Not a tile stream: {path}")
+        self.width = width
+        self.height = height
+        self.channels = channels
+        self.tile_size = tile
+        self.fps = fps
+        self._grid = _TileGrid(width, height, channels, tile)
+
+    def __iter__(self) -> Iterator[Tuple[float, np.ndarray]]:
+        """Yield (pts, frame) pairs. Frames are views reused between iterations."""
+        grid = self._grid
+        tile_shape = (self.tile_size, self.tile_size, self.channels)
+        while True:
+            record = self._file.read(FRAME.size)
+            if len(record) < FRAME.size:
+                return
+            pts, _flags, count, size = FRAME.unpack(record)
+            payload = self._file.read(size)
+            if len(payload) < size:
+                return  # Truncated by a crash; everything before it is intact
+            if count:
+                data = zlib.decompress(payload)
+                indices = np.frombuffer(data, dtype=np.uint32, count=count)
+                pixels = np.frombuffer(data, dtype=np.uint8, offset=count * 4)
+                rows, cols = np.divmod(indices, grid.cols)
+                grid.tiles[rows, cols] = pixels.reshape((count,) + tile_shape)
+            yield pts, grid.visible
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
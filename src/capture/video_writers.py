@@ -0,0 +1,33 @@
+"""
+OpenCV video writer helpers shared by the in-process and worker encoders.
+"""
+from pathlib import Path
+from typing import Sequence, Tuple
+
+import cv2
+from loguru import logger
+
+# OpenCV codecs tried in order until one opens
+VIDEO_CODECS = ['DIVX', 'XVID', 'MJPG']
+
+
+def open_opencv_writer(output_path: str, fps: float, width: int, height: int,
+                       codecs: Sequence[str] = VIDEO_CODECS) -> Tuple[cv2.VideoWriter, str]:
+    """Open an AVI writer with the first codec that works.
+
+    Returns the writer and the path it writes to.
+    """
+    writer = None
+    path = str(Path(output_path).with_suffix('.avi'))
+    for codec in codecs:
+        try:
+            fourcc = cv2.VideoWriter_fourcc(*codec)
+            writer = cv2.VideoWriter(path, fourcc, fps, (width, height))
+            if writer.isOpened():
+                return writer, path
+        except Exception as e:
+            logger.warning(f"Codec {codec} failed: {str(e)}")
+        if writer:
+            writer.release()
+
+    raise Exception("Failed to initialize video writer with any supported codec")
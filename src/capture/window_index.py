@@ -0,0 +1,390 @@
+"""
+Background window index.
+
+A lister enumerates top-level windows (Win32 EnumWindows, or the EWMH
+_NET_CLIENT_LIST on X11). WindowIndex runs it on a worker thread, diffs
+each snapshot against the cached one and applies only the differences
+to WindowListModel, so views get row inserts, removals and dataChanged
+for the windows that actually changed instead of a full reset.
+"""
+import ctypes
+import ctypes.util
+import os
+import platform
+import threading
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from PySide6.QtCore import (
+    QAbstractListModel, QByteArray, QCoreApplication, QModelIndex, QObject, QRect, Qt, Signal, Slot
+)
+from loguru import logger
+
+Rect = Tuple[int, int, int, int]  # x, y, width, height
+
+
+class WindowInfo(NamedTuple):
+    handle: int
+    title: str
+    rect: Rect
+
+
+def diff_windows(cached: Dict[int, WindowInfo], current: Sequence[WindowInfo]):
+    """Compare a snapshot with the cache.
+
+    Returns (removed handles, added windows, changed windows); added
+    windows keep the snapshot's order.
+    """
+    current_handles = {window.handle for window in current}
+    removed = [handle for handle in cached if handle not in current_handles]
+    added = [window for window in current if window.handle not in cached]
+    changed = [window for window in current
+               if window.handle in cached and cached[window.handle] != window]
+    return removed, added, changed
+
+
+class Win32WindowLister:
+    """Visible, titled top-level windows through EnumWindows."""
+
+    def __init__(self):
+        from ctypes import wintypes
+        self._user32 = ctypes.windll.user32
+        self._callback_type = ctypes.WINFUNCTYPE(ctypes.c_bool, wintypes.HWND, wintypes.LPARAM)
+
+    def list_windows(self) -> List[WindowInfo]:
+        user32 = self._user32
+        windows = []
+
+        def callback(hwnd, _):
+            if user32.IsWindowVisible(hwnd):
+                length = user32.GetWindowTextLengthW(hwnd)
+                if length > 0:
+                    title = ctypes.create_unicode_buffer(length + 1)
+                    user32.GetWindowTextW(hwnd, title, length + 1)
+                    rect = win32_window_rect(hwnd)
+                    if rect:
+                        windows.append(WindowInfo(int(hwnd), title.value, rect))
+            return True
+
+        user32.EnumWindows(self._callback_type(callback), 0)
+        return windows
+
+
+def bind_x11():
+    """Load libX11 and declare the calls used for window listing and tracking."""
+    path = ctypes.util.find_library('X11')
+    if not path:
+        raise Exception("libX11 not found")
+    from .xshm import XErrorHandler
+    x11 = ctypes.CDLL(path)
+    p, i, u = ctypes.c_void_p, ctypes.c_int, ctypes.c_ulong
+    pu, pi = ctypes.POINTER(u), ctypes.POINTER(i)
+    pui = ctypes.POINTER(ctypes.c_uint)
+    for name, restype, argtypes in (
+        ('XOpenDisplay', p, (ctypes.c_char_p,)),
+        ('XCloseDisplay', i, (p,)),
+        ('XDefaultRootWindow', u, (p,)),
+        ('XInternAtom', u, (p, ctypes.c_char_p, i)),
+        ('XGetWindowProperty', i, (p, u, u, ctypes.c_long, ctypes.c_long, i, u,
+                                   pu, pi, pu, pu, ctypes.POINTER(p))),
+        ('XGetGeometry', i, (p, u, pu, pi, pi, pui, pui, pui, pui)),
+        ('XTranslateCoordinates', i, (p, u, u, i, i, pi, pi, pu)),
+        ('XSelectInput', i, (p, u, ctypes.c_long)),
+        ('XConnectionNumber', i, (p,)),
+        ('XPending', i, (p,)),
+        ('XNextEvent', i, (p, p)),
+        ('XSync', i, (p, i)),
+        ('XFree', i, (p,)),
+        ('XSetErrorHandler', p, (XErrorHandler,)),
+    ):
+        function = getattr(x11, name)
+        function.restype = restype
+        function.argtypes = argtypes
+    return x11
+
+
+def open_x11_display(x11, display: Optional[str] = None):
+    """Open a display connection that survives X errors for vanished windows."""
+    from .xshm import _record_x_error
+    connection = x11.XOpenDisplay(display.encode() if display else None)
+    if not connection:
+        raise Exception(f"Cannot open X display {display or os.environ.get('DISPLAY')}")
+    x11.XSetErrorHandler(_record_x_error)
+    return connection
+
+
+def x11_window_rect(x11, display, root: int, window: int) -> Optional[Rect]:
+    """Geometry of a window in root coordinates, or None if it is gone."""
+    parent = ctypes.c_ulong()
+    x, y = ctypes.c_int(), ctypes.c_int()
+    width, height = ctypes.c_uint(), ctypes.c_uint()
+    border, depth = ctypes.c_uint(), ctypes.c_uint()
+    if not x11.XGetGeometry(display, window, ctypes.byref(parent), ctypes.byref(x),
+                            ctypes.byref(y), ctypes.byref(width), ctypes.byref(height),
+                            ctypes.byref(border), ctypes.byref(depth)):
+        return None
+    root_x, root_y = ctypes.c_int(), ctypes.c_int()
+    child = ctypes.c_ulong()
+    if not x11.XTranslateCoordinates(display, window, root, 0, 0, ctypes.byref(root_x),
+                                     ctypes.byref(root_y), ctypes.byref(child)):
+        return None
+    return root_x.value, root_y.value, width.value, height.value
+
+
+def win32_window_rect(handle: int) -> Optional[Rect]:
+    """Window rect from GetWindowRect, or None if the window is gone."""
+    from ctypes import wintypes
+    rect = wintypes.RECT()
+    if not ctypes.windll.user32.GetWindowRect(handle, ctypes.byref(rect)):
+        return None
+    return rect.left, rect.top, rect.right - rect.left, rect.bottom - rect.top
+
+
+class EwmhWindowLister:
+    """Client windows of an EWMH window manager on X11.
+
+    Reads _NET_CLIENT_LIST from the root window, titles from _NET_WM_NAME
+    (falling back to WM_NAME) and geometry translated to root coordinates.
+    """
+
+    def __init__(self, display: Optional[str] = None):
+        x11 = bind_x11()
+        self._x11 = x11
+        self._display = open_x11_display(x11, display)
+        self._root = x11.XDefaultRootWindow(self._display)
+        atom = lambda name: x11.XInternAtom(self._display, name, 0)  # noqa: E731
+        self._client_list = atom(b'_NET_CLIENT_LIST')
+        self._net_wm_name = atom(b'_NET_WM_NAME')
+        self._wm_name = atom(b'WM_NAME')
+
+    def _property(self, window: int, atom: int, kind: int = 0) -> Tuple[int, int, bytes]:
+        """Raw property value: (format, item count, bytes). kind 0 is AnyPropertyType."""
+        actual_type = ctypes.c_ulong()
+        actual_format = ctypes.c_int()
+        items = ctypes.c_ulong()
+        remaining = ctypes.c_ulong()
+        data = ctypes.c_void_p()
+        status = self._x11.XGetWindowProperty(
+            self._display, window, atom, 0, 1 << 16, 0, kind,
+            ctypes.byref(actual_type), ctypes.byref(actual_format), ctypes.byref(items),
+            ctypes.byref(remaining), ctypes.byref(data)
+        )
+        if status != 0 or not data.value:
+            return 0, 0, b''
+        try:
+            # Format 32 items are stored as C longs
+            width = {8: 1, 16: 2, 32: ctypes.sizeof(ctypes.c_long)}.get(actual_format.value, 0)
+            return actual_format.value, items.value, ctypes.string_at(data, items.value * width)
+        finally:
+            self._x11.XFree(data)
+
+    def _title(self, window: int) -> str:
+        for atom in (self._net_wm_name, self._wm_name):
+            _, _, raw = self._property(window, atom)
+            if raw:
+                return raw.decode('utf-8', errors='replace')
+        return ''
+
+    def list_windows(self) -> List[WindowInfo]:
+        _, count, raw = self._property(self._root, self._client_list)
+        handles = (ctypes.c_ulong * count).from_buffer_copy(raw) if count else []
+        windows = []
+        for handle in handles:
+            title = self._title(handle)
+            rect = x11_window_rect(self._x11, self._display, self._root, handle)
+            if title and rect:
+                windows.append(WindowInfo(int(handle), title, rect))
+        return windows
+
+    def close(self):
+        if self._display:
+            self._x11.XCloseDisplay(self._display)
+            self._display = None
+
+
+def default_lister():
+    """The window lister for this platform, or None if there is none."""
+    try:
+        if platform.system() == 'Windows':
+            return Win32WindowLister()
+        if os.environ.get('DISPLAY'):
+            return EwmhWindowLister()
+    except Exception as e:
+        logger.warning(f"Window enumeration unavailable: {str(e)}")
+    return None
+
+
+class WindowListModel(QAbstractListModel):
+    """Windows as a list model with handle, title, rect, icon and windowInfo roles."""
+
+    HandleRole = Qt.UserRole + 1
+    TitleRole = Qt.UserRole + 2
+    RectRole = Qt.UserRole + 3
+    IconRole = Qt.UserRole + 4
+    WindowInfoRole = Qt.UserRole + 5
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._windows: List[WindowInfo] = []
+        self._rows: Dict[int, int] = {}
+
+    def roleNames(self):
+        return {
+            self.HandleRole: QByteArray(b'handle'),
+            self.TitleRole: QByteArray(b'title'),
+            self.RectRole: QByteArray(b'rect'),
+            self.IconRole: QByteArray(b'icon'),
+            self.WindowInfoRole: QByteArray(b'windowInfo'),
+        }
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._windows)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or not 0 <= index.row() < len(self._windows):
+            return None
+        window = self._windows[index.row()]
+        if role in (self.TitleRole, Qt.DisplayRole):
+            return window.title
+        if role == self.HandleRole:
+            return window.handle
+        if role == self.RectRole:
+            return QRect(*window.rect)
+        if role == self.IconRole:
+            return ''  # No window icons yet
+        if role == self.WindowInfoRole:
+            return as_dict(window)
+        return None
+
+    @property
+    def windows(self) -> List[WindowInfo]:
+        return list(self._windows)
+
+    def _reindex(self, start: int = 0):
+        for row in range(start, len(self._windows)):
+            self._rows[self._windows[row].handle] = row
+
+    def apply(self, removed: Sequence[int], added: Sequence[WindowInfo],
+              changed: Sequence[WindowInfo]):
+        """Apply a diff with per-row notifications."""
+        for handle in removed:
+            row = self._rows.pop(handle, None)
+            if row is None:
+                continue
+            self.beginRemoveRows(QModelIndex(), row, row)
+            del self._windows[row]
+            self.endRemoveRows()
+            self._reindex(row)
+        for window in changed:
+            row = self._rows.get(window.handle)
+            if row is None:
+                continue
+            self._windows[row] = window
+            index = self.index(row)
+            self.dataChanged.emit(index, index)
+        if added:
+            first = len(self._windows)
+            self.beginInsertRows(QModelIndex(), first, first + len(added) - 1)
+            self._windows.extend(added)
+            self._reindex(first)
+            self.endInsertRows()
+
+
+def as_dict(window: WindowInfo) -> dict:
+    """The window dict CaptureManager.set_selected_window takes."""
+    return {'handle': window.handle, 'title': window.title, 'rect': QRect(*window.rect)}
+
+
+class WindowIndex(QObject):
+    """Keeps a WindowListModel up to date from a background thread.
+
+    The lister runs on a worker thread every interval seconds. Diffs are
+    handed to the GUI thread through a queued signal, so neither
+    enumeration nor model updates ever block the other side.
+    """
+
+    windowsChanged = Signal()
+    _diffReady = Signal(object)
+
+    def __init__(self, lister=None, interval: float = 1.0, parent=None):
+        super().__init__(parent)
+        self._lister = lister
+        self._interval = interval
+        self._model = WindowListModel(self)
+        self._cache: Dict[int, WindowInfo] = {}
+        self._cache_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread = None
+        self._diffReady.connect(self._apply_diff, Qt.QueuedConnection)
+
+    @property
+    def model(self) -> WindowListModel:
+        return self._model
+
+    @property
+    def available(self) -> bool:
+        return self._lister is not None
+
+    def windows(self) -> List[WindowInfo]:
+        """Cached windows in model order."""
+        return self._model.windows
+
+    def refresh_now(self):
+        """Enumerate synchronously on the calling thread and apply the diff."""
+        diff = self._scan()
+        if diff:
+            self._apply_diff(diff)
+
+    def start(self):
+        if self._lister is None or self._thread is not None:
+            return
+        app = QCoreApplication.instance()
+        if app is not None:
+            app.aboutToQuit.connect(self.stop)
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="window-index", daemon=True)
+        self._thread.start()
+
+    @Slot()
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+
+    @Slot()
+    def refresh(self):
+        """Ask the worker to rescan now instead of at the next interval."""
+        self._wake.set()
+
+    def _scan(self):
+        if self._lister is None:
+            return None
+        try:
+            current = self._lister.list_windows()
+        except Exception as e:
+            logger.error(f"Window enumeration failed: {str(e)}")
+            return None
+        with self._cache_lock:
+            removed, added, changed = diff_windows(self._cache, current)
+            if not (removed or added or changed):
+                return None
+            for handle in removed:
+                del self._cache[handle]
+            for window in added + changed:
+                self._cache[window.handle] = window
+        return removed, added, changed
+
+    def _run(self):
+        while not self._stop.is_set():
+            diff = self._scan()
+            if diff:
+                self._diffReady.emit(diff)
+            self._wake.wait(self._interval)
+            self._wake.clear()
+
+    @Slot(object)
+    def _apply_diff(self, diff):
+        self._model.apply(*diff)
+        self.windowsChanged.emit()
@@ -0,0 +1,198 @@
+"""
+Event-driven tracking of a window's geometry.
+
+A tracker subscribes to move and resize notifications for one window
+(a WinEvent hook on Windows, ConfigureNotify on X11) on its own thread
+and keeps the latest rect cached. The capture loop reads the cached rect
+instead of querying the window system every frame, and listeners are
+told about changes as they happen.
+"""
+import ctypes
+import os
+import platform
+import select
+import threading
+from typing import Callable, List, Optional
+
+from loguru import logger
+
+from .window_index import Rect, bind_x11, open_x11_display, win32_window_rect, x11_window_rect
+
+
+class WindowTracker:
+    """Caches a window's rect; subclasses update it from window system events."""
+
+    def __init__(self, handle: int):
+        self._handle = handle
+        self._rect: Optional[Rect] = None
+        self._listeners: List[Callable[[Rect], None]] = []
+        self._thread = None
+        self._stop = threading.Event()
+        self.updates = 0
+
+    @property
+    def handle(self) -> int:
+        return self._handle
+
+    def rect(self) -> Optional[Rect]:
+        """Last known rect in desktop coordinates; a plain read, safe from any thread."""
+        return self._rect
+
+    def add_listener(self, callback: Callable[[Rect], None]):
+        """Call callback(rect) from the tracker thread whenever the rect changes."""
+        self._listeners.append(callback)
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._rect = self._query()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="window-tracker", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._interrupt()
+        if self._thread:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+
+    def _update(self, rect: Optional[Rect]):
+        if rect is None or rect == self._rect:
+            return
+        self._rect = rect
+        self.updates += 1
+        for callback in self._listeners:
+            try:
+                callback(rect)
+            except Exception as e:
+                logger.error(f"Window tracker listener failed: {str(e)}")
+
+    def _query(self) -> Optional[Rect]:
+        raise NotImplementedError
+
+    def _run(self):
+        raise NotImplementedError
+
+    def _interrupt(self):
+        """Wake the event thread so it notices the stop flag."""
+
+
+class WinEventTracker(WindowTracker):
+    """Follows a window through an out-of-context EVENT_OBJECT_LOCATIONCHANGE hook."""
+
+    EVENT_OBJECT_LOCATIONCHANGE = 0x800B
+    WINEVENT_OUTOFCONTEXT = 0
+    OBJID_WINDOW = 0
+    WM_QUIT = 0x0012
+
+    def __init__(self, handle: int):
+        super().__init__(handle)
+        from ctypes import wintypes
+        self._wintypes = wintypes
+        self._user32 = ctypes.windll.user32
+        self._thread_id = None
+        self._ready = threading.Event()
+
+    def _query(self) -> Optional[Rect]:
+        return win32_window_rect(self._handle)
+
+    def _run(self):
+        wintypes, user32 = self._wintypes, self._user32
+        self._thread_id = ctypes.windll.kernel32.GetCurrentThreadId()
+        callback_type = ctypes.WINFUNCTYPE(
+            None, wintypes.HANDLE, wintypes.DWORD, wintypes.HWND, wintypes.LONG,
+            wintypes.LONG, wintypes.DWORD, wintypes.DWORD
+        )
+
+        def on_event(hook, event, hwnd, id_object, id_child, thread, timestamp):
+            if hwnd == self._handle and id_object == self.OBJID_WINDOW:
+                self._update(self._query())
+
+        callback = callback_type(on_event)
+        process_id = wintypes.DWORD()
+        thread_id = user32.GetWindowThreadProcessId(self._handle, ctypes.byref(process_id))
+        hook = user32.SetWinEventHook(
+            self.EVENT_OBJECT_LOCATIONCHANGE, self.EVENT_OBJECT_LOCATIONCHANGE, 0, callback,
+            process_id.value, thread_id, self.WINEVENT_OUTOFCONTEXT
+        )
+        self._ready.set()
+        if not hook:
+            logger.error("SetWinEventHook failed, window position is no longer followed")
+            return
+        try:
+            # Out-of-context hooks are delivered through this thread's message queue
+            message = wintypes.MSG()
+            while not self._stop.is_set() and user32.GetMessageW(ctypes.byref(message), 0, 0, 0) > 0:
+                user32.TranslateMessage(ctypes.byref(message))
+                user32.DispatchMessageW(ctypes.byref(message))
+        finally:
+            user32.UnhookWinEvent(hook)
+
+    def _interrupt(self):
+        if self._ready.wait(timeout=1.0) and self._thread_id:
+            self._user32.PostThreadMessageW(self._thread_id, self.WM_QUIT, 0, 0)
+
+
+class X11ConfigureTracker(WindowTracker):
+    """Follows an X11 window through ConfigureNotify on its own display connection."""
+
+    STRUCTURE_NOTIFY_MASK = 1 << 17
+    DESTROY_NOTIFY = 17
+    CONFIGURE_NOTIFY = 22
+    POLL_INTERVAL = 0.1  # Seconds between checks of the stop flag
+
+    def __init__(self, handle: int, display: Optional[str] = None):
+        super().__init__(handle)
+        self._x11 = bind_x11()
+        self._display = open_x11_display(self._x11, display)
+        self._root = self._x11.XDefaultRootWindow(self._display)
+        self._x11.XSelectInput(self._display, handle, self.STRUCTURE_NOTIFY_MASK)
+        self._x11.XSync(self._display, 0)
+
+    def _query(self) -> Optional[Rect]:
+        return x11_window_rect(self._x11, self._display, self._root, self._handle)
+
+    def _run(self):
+        x11, display = self._x11, self._display
+        fd = x11.XConnectionNumber(display)
+        event = (ctypes.c_long * 24)()  # Large enough for any XEvent
+        try:
+            while not self._stop.is_set():
+                if not x11.XPending(display):
+                    select.select([fd], [], [], self.POLL_INTERVAL)
+                    continue
+                configured = False
+                # Coalesce a burst of events, e.g. an interactive resize, into one query
+                while x11.XPending(display):
+                    x11.XNextEvent(display, event)
+                    kind = ctypes.c_int.from_buffer(event).value
+                    if kind == self.CONFIGURE_NOTIFY:
+                        configured = True
+                    elif kind == self.DESTROY_NOTIFY:
+                        logger.info(f"Tracked window {self._handle:#x} was destroyed")
+                        return
+                if configured:
+                    self._update(self._query())
+        finally:
+            x11.XCloseDisplay(display)
+            self._display = None
+
+    def stop(self):
+        super().stop()
+        if self._display:
+            # Never started
+            self._x11.XCloseDisplay(self._display)
+            self._display = None
+
+
+def create_tracker(handle: int) -> Optional[WindowTracker]:
+    """A tracker for this platform, or None if events are not available."""
+    try:
+        if platform.system() == 'Windows':
+            return WinEventTracker(handle)
+        if os.environ.get('DISPLAY'):
+            return X11ConfigureTracker(handle)
+    except Exception as e:
+        logger.warning(f"Window tracking unavailable: {str(e)}")
+    return None
@@ -0,0 +1,238 @@
+"""
+X11 MIT-SHM screen grabbing through ctypes.
+
+XShmGetImage has the X server copy the requested region straight into a
+System V shared memory segment that is mapped into this process, so a
+grab costs one server-side copy and no socket transfer, QPixmap or
+QImage conversion. The segment is exposed as a reusable NumPy view.
+"""
+import ctypes
+import ctypes.util
+import os
+from typing import Optional, Tuple
+
+import numpy as np
+from loguru import logger
+
+ZPixmap = 2
+IPC_PRIVATE = 0
+IPC_CREAT = 0o1000
+IPC_RMID = 0
+ALL_PLANES = ctypes.c_ulong(-1).value
+
+
+class XShmUnavailable(Exception):
+    """The display, the MIT-SHM extension or a usable pixel format is missing."""
+
+
+class XShmSegmentInfo(ctypes.Structure):
+    _fields_ = [
+        ('shmseg', ctypes.c_ulong),
+        ('shmid', ctypes.c_int),
+        ('shmaddr', ctypes.c_void_p),
+        ('readOnly', ctypes.c_int),
+    ]
+
+
+class XImage(ctypes.Structure):
+    # Leading fields of Xlib's XImage; the function table is never touched
+    _fields_ = [
+        ('width', ctypes.c_int),
+        ('height', ctypes.c_int),
+        ('xoffset', ctypes.c_int),
+        ('format', ctypes.c_int),
+        ('data', ctypes.c_void_p),
+        ('byte_order', ctypes.c_int),
+        ('bitmap_unit', ctypes.c_int),
+        ('bitmap_bit_order', ctypes.c_int),
+        ('bitmap_pad', ctypes.c_int),
+        ('depth', ctypes.c_int),
+        ('bytes_per_line', ctypes.c_int),
+        ('bits_per_pixel', ctypes.c_int),
+        ('red_mask', ctypes.c_ulong),
+        ('green_mask', ctypes.c_ulong),
+        ('blue_mask', ctypes.c_ulong),
+    ]
+
+
+XErrorHandler = ctypes.CFUNCTYPE(ctypes.c_int, ctypes.c_void_p, ctypes.c_void_p)
+
+# Xlib's default handler exits the process, e.g. when a remote server
+# rejects XShmAttach. The handler is process-wide, so it is only swapped
+# in around the attach and the previous one is restored right after.
+_x_errors = []
+
+
+@XErrorHandler
+def _record_x_error(display, event):
+    _x_errors.append(event)
+    return 0
+
+
+def _load(name: str):
+    path = ctypes.util.find_library(name)
+    if not path:
+        raise XShmUnavailable(f"lib{name} not found")
+    return ctypes.CDLL(path)
+
+
+def _bind():
+    """Load libX11, libXext and libc and declare the calls used here."""
+    x11 = _load('X11')
+    xext = _load('Xext')
+    libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+    p, i, u = ctypes.c_void_p, ctypes.c_int, ctypes.c_ulong
+
+    def declare(lib, name, restype, *argtypes):
+        function = getattr(lib, name)
+        function.restype = restype
+        function.argtypes = argtypes
+
+    declare(x11, 'XOpenDisplay', p, ctypes.c_char_p)
+    declare(x11, 'XCloseDisplay', i, p)
+    declare(x11, 'XDefaultScreen', i, p)
+    declare(x11, 'XRootWindow', u, p, i)
+    declare(x11, 'XDefaultVisual', p, p, i)
+    declare(x11, 'XDefaultDepth', i, p, i)
+    declare(x11, 'XDisplayWidth', i, p, i)
+    declare(x11, 'XDisplayHeight', i, p, i)
+    declare(x11, 'XSync', i, p, i)
+    declare(x11, 'XFree', i, p)
+    declare(x11, 'XSetErrorHandler', p, p)
+    declare(xext, 'XShmQueryExtension', i, p)
+    declare(xext, 'XShmCreateImage', ctypes.POINTER(XImage),
+            p, p, ctypes.c_uint, i, p, ctypes.POINTER(XShmSegmentInfo),
+            ctypes.c_uint, ctypes.c_uint)
+    declare(xext, 'XShmAttach', i, p, ctypes.POINTER(XShmSegmentInfo))
+    declare(xext, 'XShmDetach', i, p, ctypes.POINTER(XShmSegmentInfo))
+    declare(xext, 'XShmGetImage', i, p, u, ctypes.POINTER(XImage), i, i, u)
+    declare(libc, 'shmget', i, i, ctypes.c_size_t, i)
+    declare(libc, 'shmat', p, i, p, i)
+    declare(libc, 'shmdt', i, p)
+    declare(libc, 'shmctl', i, i, i, p)
+    return x11, xext, libc
+
+
+class XShmGrabber:
+    """Grabs a fixed region of the root window into a shared memory image.
+
+    grab() returns a (height, width, 4) BGRA view of the segment; the next
+    grab overwrites it, so callers that keep frames must copy them.
+    """
+
+    def __init__(self, display: Optional[str] = None):
+        if os.name != 'posix':
+            raise XShmUnavailable("XShm needs an X11 platform")
+        try:
+            self._x11, self._xext, self._libc = _bind()
+        except (OSError, AttributeError) as e:
+            raise XShmUnavailable(str(e))
+        name = display.encode() if display else None
+        self._display = self._x11.XOpenDisplay(name)
+        if not self._display:
+            raise XShmUnavailable(f"Cannot open X display {display or os.environ.get('DISPLAY')}")
+        if not self._xext.XShmQueryExtension(self._display):
+            self._x11.XCloseDisplay(self._display)
+            self._display = None
+            raise XShmUnavailable("X server has no MIT-SHM extension")
+        self._screen = self._x11.XDefaultScreen(self._display)
+        self._root = self._x11.XRootWindow(self._display, self._screen)
+        self._image = None
+        self._info = XShmSegmentInfo()
+        self._view = None
+        self._region = (0, 0, 0, 0)
+
+    def screen_size(self) -> Tuple[int, int]:
+        return (self._x11.XDisplayWidth(self._display, self._screen),
+                self._x11.XDisplayHeight(self._display, self._screen))
+
+    @property
+    def region(self) -> Tuple[int, int, int, int]:
+        return self._region
+
+    def configure(self, x: int, y: int, width: int, height: int):
+        """Allocate the shared image for a region; a no-op if it is unchanged."""
+        if self._image is not None and self._region == (x, y, width, height):
+            return
+        self.release()
+        x11, xext, libc = self._x11, self._xext, self._libc
+        visual = x11.XDefaultVisual(self._display, self._screen)
+        depth = x11.XDefaultDepth(self._display, self._screen)
+        image = xext.XShmCreateImage(self._display, visual, depth, ZPixmap, None,
+                                     ctypes.byref(self._info), width, height)
+        if not image:
+            raise XShmUnavailable("XShmCreateImage failed")
+        contents = image.contents
+        if contents.bits_per_pixel != 32 or contents.red_mask != 0xFF0000 \
+                or contents.blue_mask != 0xFF:
+            x11.XFree(image)
+            raise XShmUnavailable(
+                f"Unsupported pixel format: {contents.bits_per_pixel} bpp, "
+                f"red mask {contents.red_mask:#x}"
+            )
+        size = contents.bytes_per_line * height
+        shmid = libc.shmget(IPC_PRIVATE, size, IPC_CREAT | 0o600)
+        if shmid < 0:
+            x11.XFree(image)
+            raise XShmUnavailable(f"shmget failed: {os.strerror(ctypes.get_errno())}")
+        address = libc.shmat(shmid, None, 0)
+        if address in (None, ctypes.c_void_p(-1).value):
+            libc.shmctl(shmid, IPC_RMID, None)
+            x11.XFree(image)
+            raise XShmUnavailable(f"shmat failed: {os.strerror(ctypes.get_errno())}")
+        self._info.shmid = shmid
+        self._info.shmaddr = address
+        self._info.readOnly = 0
+        contents.data = address
+        self._image = image
+        attached = self._attach()
+        # Marked for removal now, freed by the kernel once both sides detach
+        libc.shmctl(shmid, IPC_RMID, None)
+        if not attached:
+            self.release()
+            raise XShmUnavailable("XShmAttach failed (remote X server?)")
+
+        buffer = (ctypes.c_uint8 * size).from_address(address)
+        rows = np.frombuffer(buffer, dtype=np.uint8).reshape(height, contents.bytes_per_line)
+        self._view = rows[:, :width * 4].reshape(height, width, 4)
+        self._region = (x, y, width, height)
+        logger.debug(f"XShm image of {width}x{height} at {x},{y} allocated")
+
+    def _attach(self) -> bool:
+        """XShmAttach with X errors recorded instead of exiting the process."""
+        x11 = self._x11
+        del _x_errors[:]
+        previous = x11.XSetErrorHandler(ctypes.cast(_record_x_error, ctypes.c_void_p))
+        try:
+            self._xext.XShmAttach(self._display, ctypes.byref(self._info))
+            x11.XSync(self._display, 0)
+        finally:
+            x11.XSetErrorHandler(previous)
+        failed = bool(_x_errors)
+        del _x_errors[:]
+        return not failed
+
+    def grab(self) -> np.ndarray:
+        x, y = self._region[:2]
+        if not self._xext.XShmGetImage(self._display, self._root, self._image, x, y, ALL_PLANES):
+            raise Exception("XShmGetImage failed")
+        return self._view
+
+    def release(self):
+        """Free the shared image; configure() allocates a new one."""
+        if self._image is None:
+            return
+        self._view = None
+        self._xext.XShmDetach(self._display, ctypes.byref(self._info))
+        self._x11.XSync(self._display, 0)
+        self._libc.shmdt(self._info.shmaddr)
+        # data points into the segment, which XFree must not free
+        self._image.contents.data = None
+        self._x11.XFree(self._image)
+        self._image = None
+
+    def close(self):
+        self.release()
+        if self._display:
+            self._x11.XCloseDisplay(self._display)
+            self._display = None
@@ -0,0 +1,128 @@
+"""
+BGRA/BGR to planar YUV 4:2:0 conversion.
+
+Encoders work on YUV 4:2:0, so handing them 24- or 32-bit RGB means every
+stage in between moves 2 to 2.67 times more data than necessary and the
+encoder converts anyway. YuvConverter converts the captured buffer
+straight into I420 (Y plane, U plane, V plane) or NV12 (Y plane,
+interleaved UV plane), 1.5 bytes per pixel, in the same (height * 3 / 2,
+width) layout OpenCV uses.
+
+Large frames can be split into row bands converted on a thread pool;
+OpenCV releases the GIL, so bands run in parallel. Chroma is subsampled
+over 2x2 blocks, so band boundaries fall on even rows and the result is
+identical to converting the whole frame at once.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
+
+import numpy as np
+import cv2
+
+I420 = 'i420'
+NV12 = 'nv12'
+YUV_FORMATS = (I420, NV12)
+
+# GStreamer caps format for each layout
+GST_FORMATS = {I420: 'I420', NV12: 'NV12'}
+
+MIN_BAND_ROWS = 64  # Narrower bands cost more in dispatch than they save
+
+
+def yuv420_shape(width: int, height: int) -> Tuple[int, int]:
+    """Array shape of a 4:2:0 frame: the Y plane followed by the chroma planes."""
+    return height * 3 // 2, width
+
+
+def _bands(height: int, count: int):
+    """Split rows into count even-aligned (start, stop) bands."""
+    count = max(1, min(count, height // MIN_BAND_ROWS))
+    edges = [height * index // count // 2 * 2 for index in range(count)] + [height]
+    return list(zip(edges, edges[1:]))
+
+
+class YuvConverter:
+    """Converts BGRA or BGR frames of one size into I420 or NV12.
+
+    With threads > 1 the frame is converted in row bands on a thread pool.
+    convert() may be called from several threads at once. Call close() to
+    stop the pool.
+    """
+
+    def __init__(self, width: int, height: int, pixel_format: str = I420, threads: int = 1):
+        if pixel_format not in YUV_FORMATS:
+            raise ValueError(f"Unknown YUV format: {pixel_format}")
+        if width % 2 or height % 2:
+            raise ValueError(f"YUV 4:2:0 needs even dimensions, got {width}x{height}")
+        self.width = width
+        self.height = height
+        self.pixel_format = pixel_format
+        self._bands = _bands(height, threads)
+        # Whole-frame I420 goes straight into the output; everything else
+        # converts into scratch buffers first, one set per converting thread
+        self._local = threading.local()
+        self._pool = ThreadPoolExecutor(len(self._bands), thread_name_prefix="yuv") \
+            if len(self._bands) > 1 else None
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return yuv420_shape(self.width, self.height)
+
+    @property
+    def threads(self) -> int:
+        return len(self._bands)
+
+    def convert(self, frame: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """Convert a (height, width, 3 or 4) frame; out must have the shape of self.shape."""
+        if frame.shape[:2] != (self.height, self.width):
+            raise ValueError(
+                f"Frame size {frame.shape[1]}x{frame.shape[0]} does not match "
+                f"converter size {self.width}x{self.height}"
+            )
+        if out is None:
+            out = np.empty(self.shape, dtype=np.uint8)
+        code = cv2.COLOR_BGRA2YUV_I420 if frame.shape[2] == 4 else cv2.COLOR_BGR2YUV_I420
+        if self._pool is None and self.pixel_format == I420:
+            cv2.cvtColor(frame, code, dst=out)
+        elif self._pool is None:
+            self._convert_band(0, frame, code, out)
+        else:
+            list(self._pool.map(lambda band: self._convert_band(band, frame, code, out),
+                                range(len(self._bands))))
+        return out
+
+    def _scratch(self, band: int) -> np.ndarray:
+        buffers = getattr(self._local, 'buffers', None)
+        if buffers is None:
+            buffers = self._local.buffers = {}
+        if band not in buffers:
+            start, stop = self._bands[band]
+            buffers[band] = np.empty(yuv420_shape(self.width, stop - start), dtype=np.uint8)
+        return buffers[band]
+
+    def _convert_band(self, band: int, frame: np.ndarray, code: int, out: np.ndarray):
+        start, stop = self._bands[band]
+        scratch = cv2.cvtColor(frame[start:stop], code, dst=self._scratch(band))
+        rows = stop - start
+        width, height = self.width, self.height
+        quarter = rows * width // 4
+        u = scratch[rows:].reshape(-1)[:quarter]
+        v = scratch[rows:].reshape(-1)[quarter:]
+        out[start:stop] = scratch[:rows]
+        # Chroma rows start / 2 to stop / 2 of the half-size planes
+        chroma = out[height:].reshape(-1)
+        first, last = start * width // 4, stop * width // 4
+        if self.pixel_format == I420:
+            plane = height * width // 4
+            chroma[first:last] = u
+            chroma[plane + first:plane + last] = v
+        else:
+            uv = chroma[2 * first:2 * last]
+            uv[0::2] = u
+            uv[1::2] = v
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
@@ -22,62 +22,193 @@ Stability Guidelines:
    - Initialize managers and heavy objects after GUI is loaded
    - Use Qt's event system for communication
    - Keep the main thread responsive
+
+Startup order: the QML loads with captureManager and multiCaptureManager
+set to null. Once the first frame is on screen, the capture modules
+(NumPy, OpenCV and friends) are imported on a worker thread, and the
+managers are then created on the GUI thread and registered with QML.
+Run with --profile-startup to print the time spent in each phase.
 """
 
+import time
+_PROCESS_START = time.perf_counter()
+
+import argparse
+import importlib
 import sys
+import threading
 from pathlib import Path
-from PySide6.QtCore import QUrl, QDir
+from PySide6.QtCore import QObject, QTimer, QUrl, Signal
 from PySide6.QtGui import QGuiApplication
 from PySide6.QtQml import QQmlApplicationEngine
 from loguru import logger
 
-# Import our capture manager
-from capture.capture_manager import CaptureManager
-
 # Import resources
 import resources_rc
 
-def main():
+# Heavy modules imported after the first frame, in this order
+CAPTURE_MODULES = (
+    'numpy',
+    'cv2',
+    'capture.capture_manager',
+    'capture.multi_capture',
+    'capture.preview',
+)
+
+
+class StartupProfile:
+    """Wall-clock time of each startup phase."""
+
+    def __init__(self, start: float = _PROCESS_START):
+        self._start = start
+        self._last = start
+        self.phases = []
+
+    def mark(self, phase: str):
+        """Close a phase that ran from the previous mark until now."""
+        now = time.perf_counter()
+        self.phases.append((phase, now - self._last))
+        self._last = now
+
+    @property
+    def total(self) -> float:
+        return self._last - self._start
+
+    def report(self) -> str:
+        lines = [f"{'phase':<36} {'ms':>9}"]
+        lines += [f"{phase:<36} {seconds * 1000:>9.1f}" for phase, seconds in self.phases]
+        lines.append(f"{'total':<36} {self.total * 1000:>9.1f}")
+        return "\n".join(lines)
+
+
+class CaptureLoader(QObject):
+    """Imports the capture modules on a worker thread, then builds the managers."""
+
+    imported = Signal(object)  # Per-module import times, or the exception
+    ready = Signal()
+
+    def __init__(self, engine, profile: StartupProfile, parent=None):
+        super().__init__(parent)
+        self._engine = engine
+        self._profile = profile
+        self.capture_manager = None
+        self.multi_capture_manager = None
+        self.imported.connect(self._create_managers)
+
+    def start(self):
+        self._profile.mark("first frame")
+        threading.Thread(target=self._import_modules, name="startup-imports", daemon=True).start()
+
+    def _import_modules(self):
+        timings = []
+        try:
+            for name in CAPTURE_MODULES:
+                started = time.perf_counter()
+                importlib.import_module(name)
+                timings.append((f"import {name}", time.perf_counter() - started))
+        except Exception as e:
+            self.imported.emit(e)
+            return
+        self.imported.emit(timings)
+
+    def _create_managers(self, result):
+        if isinstance(result, Exception):
+            logger.error(f"Failed to import capture modules: {str(result)}")
+            QGuiApplication.exit(-1)
+            return
+        # Imports overlap the first frames, so they are listed by their own durations
+        self._profile.mark("wait for imports")
+        self._profile.phases.extend(result)
+        from capture.capture_manager import CaptureManager
+        from capture.multi_capture import MultiCaptureManager
+        from capture.preview import PreviewImageProvider
+
+        logger.info("Creating CaptureManager...")
+        self.capture_manager = CaptureManager()
+        self.multi_capture_manager = MultiCaptureManager()
+        self._profile.mark("create managers")
+
+        logger.info("Registering capture manager with QML...")
+        self._engine.addImageProvider("preview", PreviewImageProvider(self.capture_manager.preview))
+        context = self._engine.rootContext()
+        context.setContextProperty("captureManager", self.capture_manager)
+        context.setContextProperty("multiCaptureManager", self.multi_capture_manager)
+        self._profile.mark("register with QML")
+        self.ready.emit()
+
+
+def _on_first_frame(app, callback):
+    """Call callback once after the first visible window has presented a frame."""
+    windows = [window for window in app.topLevelWindows()
+               if window.isVisible() and hasattr(window, 'frameSwapped')]
+    if not windows:
+        QTimer.singleShot(0, callback)
+        return
+    window = windows[0]
+
+    def fire():
+        window.frameSwapped.disconnect(fire)
+        # Leave the swap handler before doing more work on the GUI thread
+        QTimer.singleShot(0, callback)
+
+    window.frameSwapped.connect(fire)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="CaptureStudio")
+    parser.add_argument('--profile-startup', action='store_true',
+                        help="Print per-phase startup times and exit once the managers are ready")
+    args, qt_args = parser.parse_known_args(sys.argv[1:] if argv is None else argv)
+    profile = StartupProfile()
+    profile.mark("import Qt and resources")
+
     # Set up logging
     logger.add("capturestudio.log", rotation="10 MB")
     logger.info("Starting CaptureStudio...")
-    
+
     # Create the application instance
     logger.info("Creating QGuiApplication...")
-    app = QGuiApplication(sys.argv)
+    app = QGuiApplication([sys.argv[0]] + qt_args)
     app.setApplicationName("CaptureStudio")
     app.setOrganizationName("CaptureStudio")
-    
-    # Create and register the capture manager
-    logger.info("Creating CaptureManager...")
-    capture_manager = CaptureManager()
-    
+    profile.mark("create QGuiApplication")
+
     # Create the QML engine
     logger.info("Creating QML engine...")
     engine = QQmlApplicationEngine()
-    
+
     # Set up the import paths for QML
     logger.info("Setting up QML import paths...")
     qml_dir = Path(__file__).parent / "qml"
     engine.addImportPath(str(qml_dir))
-    
-    # Register the capture manager with QML
-    logger.info("Registering capture manager with QML...")
-    engine.rootContext().setContextProperty("captureManager", capture_manager)
-    
+
+    # The managers are registered once they exist; QML treats null as not ready
+    engine.rootContext().setContextProperty("captureManager", None)
+    engine.rootContext().setContextProperty("multiCaptureManager", None)
+    profile.mark("create QML engine")
+
     # Load the main QML file
     qml_file = qml_dir / "main.qml"
     logger.info(f"Loading QML file: {qml_file}")
     engine.load(QUrl.fromLocalFile(str(qml_file)))
-    
+
     # Check if QML loaded successfully
     if not engine.rootObjects():
         logger.error("Failed to load QML")
         return -1
-    
+    profile.mark("load QML")
+
+    loader = CaptureLoader(engine, profile)
+    if args.profile_startup:
+        def report():
+            print(profile.report())
+            app.quit()
+        loader.ready.connect(report)
+    _on_first_frame(app, loader.start)
+
     logger.info("Starting event loop...")
     # Start the event loop
     return app.exec()
 
 if __name__ == "__main__":
-    sys.exit(main()) 
\ No newline at end of file
+    sys.exit(main())
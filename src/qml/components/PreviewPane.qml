@@ -0,0 +1,33 @@
+import QtQuick
+import QtQuick.Controls
+
+// Live preview of the recording, served by the "preview" image provider
+Rectangle {
+    id: root
+    color: "#CC1E1E1E"
+    radius: 6
+    width: 320
+    height: previewImage.status === Image.Ready && previewImage.implicitWidth > 0
+            ? width * previewImage.implicitHeight / previewImage.implicitWidth + 8
+            : width * 9 / 16 + 8
+
+    property int frame: 0
+
+    Image {
+        id: previewImage
+        anchors.fill: parent
+        anchors.margins: 4
+        fillMode: Image.PreserveAspectFit
+        cache: false
+        asynchronous: true
+        source: root.frame > 0 ? "image://preview/" + root.frame : ""
+    }
+
+    Label {
+        anchors.centerIn: parent
+        visible: root.frame === 0
+        color: "#A0A0A0"
+        font.pixelSize: 11
+        text: "Waiting for frames"
+    }
+}
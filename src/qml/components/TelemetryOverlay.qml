@@ -0,0 +1,59 @@
+import QtQuick
+import QtQuick.Controls
+import QtQuick.Layouts
+
+// Live recording statistics, bound to captureManager.telemetry
+Rectangle {
+    id: root
+    color: "#CC1E1E1E"
+    radius: 6
+    width: statsLayout.implicitWidth + 16
+    height: statsLayout.implicitHeight + 12
+
+    property var telemetry: ({})
+    // Adaptive quality level; highlighted while below full quality
+    property bool adaptive: false
+    property real qualityFps: 0
+    readonly property var stageNames: ["grab", "to_image", "convert", "encode", "jitter"]
+
+    function stageText(name) {
+        var stages = telemetry.stages
+        if (!stages || !stages[name])
+            return name + ": -"
+        var stage = stages[name]
+        return name + ": " + stage.p50_ms.toFixed(1) + " / "
+            + stage.p95_ms.toFixed(1) + " / " + stage.p99_ms.toFixed(1) + " ms"
+    }
+
+    ColumnLayout {
+        id: statsLayout
+        anchors.centerIn: parent
+        spacing: 2
+
+        Label {
+            color: "white"
+            font.pixelSize: 11
+            text: "fps " + (telemetry.recent_fps || 0).toFixed(1)
+                + " / " + (telemetry.target_fps || 0)
+                + "  dropped " + (telemetry.dropped || 0)
+                + "  late " + (telemetry.late || 0)
+                + "  missed " + (telemetry.missed || 0)
+        }
+
+        Label {
+            visible: root.adaptive
+            color: root.qualityFps < (telemetry.target_fps || 0) ? "#FFB74D" : "#B0B0B0"
+            font.pixelSize: 11
+            text: "quality " + root.qualityFps.toFixed(0) + " fps"
+        }
+
+        Repeater {
+            model: root.stageNames
+            Label {
+                color: "#B0B0B0"
+                font.pixelSize: 11
+                text: root.stageText(modelData)
+            }
+        }
+    }
+}
@@ -17,7 +17,7 @@ Window {
         anchors.centerIn: parent
         width: 400
         height: Math.min(contentHeight, 500)
-        model: captureManager.availableWindows
+        model: captureManager ? captureManager.windowModel : null
         spacing: 8
         clip: true
         
@@ -37,14 +37,14 @@ Window {
                 Image {
                     Layout.preferredWidth: 44
                     Layout.preferredHeight: 44
-                    source: modelData.icon || ""
+                    source: model.icon || ""
                     sourceSize.width: 44
                     sourceSize.height: 44
                 }
                 
                 Label {
                     Layout.fillWidth: true
-                    text: modelData.title || ""
+                    text: model.title || ""
                     color: "#FFFFFF"
                     elide: Text.ElideRight
                     font.pixelSize: 14
@@ -56,8 +56,8 @@ Window {
                 anchors.fill: parent
                 hoverEnabled: true
                 onClicked: {
-                    root.selectedWindow = modelData
-                    root.windowSelected(modelData)
+                    root.selectedWindow = model.windowInfo
+                    root.windowSelected(model.windowInfo)
                     root.close()
                 }
             }
@@ -11,6 +11,7 @@ Window {
     width: 1280
     height: 720
     visible: false
+    title: "CaptureStudio"
     
     Rectangle {
         id: background
@@ -20,7 +21,7 @@ Window {
     }
     
     // Properties
-    property bool isRecording: captureManager.recording
+    property bool isRecording: captureManager ? captureManager.recording : false
     
     // Floating toolbar
     FloatingToolbar {
@@ -39,12 +40,16 @@ Window {
             if (mode === "area") {
                 var selector = areaSelector.createObject(null)
                 selector.show()
-            } else if (mode === "display") {
+            } else if (mode === "display" && captureManager) {
                 captureManager.set_capture_area(null)
             }
         }
         
         onRecordingToggled: function(start) {
+            if (!captureManager) {
+                console.warn("Capture is still starting up")
+                return
+            }
             if (start) {
                 captureManager.start_recording(null)
             } else {
@@ -53,15 +58,67 @@ Window {
         }
     }
     
+    // Recording statistics
+    TelemetryOverlay {
+        anchors.top: parent.top
+        anchors.right: parent.right
+        anchors.margins: 12
+        visible: root.isRecording
+        telemetry: captureManager ? captureManager.telemetry : ({})
+        adaptive: captureManager ? captureManager.adaptiveQuality : false
+        qualityFps: captureManager ? captureManager.qualityFps : 0
+    }
+    
+    // Live preview of what is being recorded
+    PreviewPane {
+        anchors.top: parent.top
+        anchors.left: parent.left
+        anchors.margins: 12
+        visible: root.isRecording && !!captureManager && captureManager.previewEnabled
+        frame: captureManager ? captureManager.previewFrame : 0
+    }
+
+    // Shown while the last recording is flushed to disk
+    Rectangle {
+        anchors.bottom: parent.bottom
+        anchors.horizontalCenter: parent.horizontalCenter
+        anchors.margins: 12
+        width: 240
+        height: 36
+        radius: 6
+        color: "#CC1E1E1E"
+        visible: captureManager ? captureManager.finalizing : false
+        
+        ColumnLayout {
+            anchors.fill: parent
+            anchors.margins: 6
+            spacing: 2
+            
+            Label {
+                color: "white"
+                font.pixelSize: 11
+                text: "Saving recording... " + Math.round(progress.value * 100) + "%"
+            }
+            
+            ProgressBar {
+                id: progress
+                Layout.fillWidth: true
+                value: captureManager ? captureManager.finalizeProgress : 0
+            }
+        }
+    }
+
     // Area selector component
     Component {
         id: areaSelector
         AreaSelector {
             onAreaSelected: function(area) {
-                captureManager.set_capture_area(area)
+                if (captureManager)
+                    captureManager.set_capture_area(area)
             }
             onSelectionCancelled: {
-                captureManager.set_capture_area(null)
+                if (captureManager)
+                    captureManager.set_capture_area(null)
             }
         }
     }
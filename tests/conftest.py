@@ -1,6 +1,11 @@
+import sys
+from pathlib import Path
 import pytest
 from PySide6.QtGui import QGuiApplication
 
+# Make the application packages under src/ importable from the tests
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
 @pytest.fixture(scope="session")
 def qapp():
     """Create a QGuiApplication instance for the entire test session."""
@@ -0,0 +1,200 @@
+import threading
+import time
+import pytest
+import cv2
+from PySide6.QtCore import QRect
+from capture.capture_manager import CaptureManager
+from capture.frame_sources import SyntheticSource
+
+def record(manager, path, seconds=0.5):
+    manager.start_recording(str(path))
+    assert manager.recording
+    time.sleep(seconds)
+    manager.stop_recording()
+    manager._recording_thread.join(10)
+
+def test_records_headless_from_synthetic_source(qapp, tmp_path):
+    manager = CaptureManager()
+    manager.use_frame_source(SyntheticSource(160, 120))
+    errors = []
+    manager.errorOccurred.connect(errors.append)
+    record(manager, tmp_path / "synthetic.avi")
+    
+    assert not errors
+    assert manager.telemetry['written'] > 5
+    capture = cv2.VideoCapture(str(tmp_path / "synthetic.avi"))
+    assert capture.get(cv2.CAP_PROP_FRAME_WIDTH) == 160
+    assert capture.get(cv2.CAP_PROP_FRAME_COUNT) == manager.telemetry['written']
+    capture.release()
+
+def test_synthetic_source_follows_capture_area(qapp):
+    manager = CaptureManager()
+    manager.set_frame_source('synthetic')
+    manager.set_capture_area(QRect(0, 0, 320, 200))
+    assert manager._capture_size() == (320, 200)
+
+class ReusingSource(SyntheticSource):
+    """Writes every frame into the same buffer, like the XShm source."""
+    
+    fresh_buffers = False
+    
+    def __init__(self, width, height):
+        super().__init__(width, height)
+        self.buffer = None
+        
+    def grab(self):
+        frame = super().grab()
+        if self.buffer is None:
+            self.buffer = frame
+        self.buffer[:] = self._index * 4 % 256
+        return self.buffer
+
+def test_reused_source_buffers_are_copied_before_queueing(qapp, tmp_path):
+    manager = CaptureManager()
+    manager.use_frame_source(ReusingSource(64, 48))
+    manager.set_encoder_backend('tiles')
+    manager.set_catch_up_policy('skip')  # Keep one written frame per grab
+    record(manager, tmp_path / "reused")
+    
+    from capture.tile_codec import TileStreamReader
+    with TileStreamReader(manager._output_path) as reader:
+        values = [int(frame[0, 0, 0]) for _, frame in reader]
+    assert len(values) > 5
+    # Each written frame shows the value of its own grab
+    assert values == [(index + 1) * 4 % 256 for index in range(len(values))]
+
+def test_records_scaled_and_cropped_output(qapp, tmp_path):
+    manager = CaptureManager()
+    manager.use_frame_source(SyntheticSource(320, 240))
+    manager.set_crop(QRect(0, 0, 320, 180))
+    manager.set_output_size(0, 90)
+    record(manager, tmp_path / "scaled.avi")
+    
+    capture = cv2.VideoCapture(manager._output_path)
+    assert (capture.get(cv2.CAP_PROP_FRAME_WIDTH), capture.get(cv2.CAP_PROP_FRAME_HEIGHT)) == (160, 90)
+    capture.release()
+
+def test_preview_frames_are_published_while_recording(qapp, tmp_path):
+    manager = CaptureManager()
+    manager.use_frame_source(SyntheticSource(640, 360))
+    manager.set_preview_quality(160, 30)
+    record(manager, tmp_path / "preview.avi")
+    
+    assert manager.previewFrame > 3
+    assert manager.preview.image().width() == 160
+
+class SlowWriter:
+    """Delays every write and the final flush, like a slow encoder."""
+    
+    def __init__(self, writer, delay=0.02):
+        self._writer = writer
+        self._delay = delay
+        
+    def write(self, frame):
+        time.sleep(self._delay)
+        self._writer.write(frame)
+        
+    def isOpened(self):
+        return self._writer.isOpened()
+        
+    def release(self):
+        time.sleep(0.3)
+        self._writer.release()
+
+def test_stop_returns_before_the_file_is_finalized(qapp, tmp_path):
+    manager = CaptureManager()
+    manager.use_frame_source(SyntheticSource(160, 120))
+    manager.set_queue_capacity(64)
+    open_backend = manager._open_backend_writer
+    manager._open_backend_writer = lambda path, w, h: (
+        lambda opened: (SlowWriter(opened[0]), opened[1])
+    )(open_backend(path, w, h))
+    progress = []
+    manager.finalizeProgressChanged.connect(lambda: progress.append(manager.finalizeProgress))
+    finished = []
+    manager.captureComplete.connect(finished.append)
+    
+    manager.start_recording(str(tmp_path / "slow.avi"))
+    time.sleep(0.5)
+    started = time.monotonic()
+    manager.stop_recording()
+    assert time.monotonic() - started < 0.1
+    assert manager.finalizing
+    assert not manager.recording
+    manager._recording_thread.join(10)
+    qapp.processEvents()  # Signals from the capture thread are queued
+    
+    assert not manager.finalizing
+    assert finished == [manager._output_path]
+    assert progress[-1] == 1.0
+    assert progress == sorted(progress)
+
+@pytest.mark.parametrize("policy", ["drop_newest", "drop_oldest"])
+def test_dropped_frames_return_their_grab_buffers(qapp, tmp_path, policy):
+    manager = CaptureManager()
+    manager.use_frame_source(ReusingSource(64, 48))
+    manager.set_backpressure_policy(policy)
+    manager.set_queue_capacity(2)
+    open_backend = manager._open_backend_writer
+    manager._open_backend_writer = lambda path, w, h: (
+        lambda opened: (SlowWriter(opened[0], delay=0.15), opened[1])
+    )(open_backend(path, w, h))
+    
+    manager.start_recording(str(tmp_path / "dropping.avi"))
+    pool, queue = manager._grab_pool, manager._frame_queue
+    time.sleep(0.5)
+    manager.stop_recording()
+    manager._recording_thread.join(10)
+    
+    assert queue.dropped > 5
+    assert len(pool._free) == pool.count
+    assert pool.misses == 0
+
+def test_encoder_probe_never_runs_on_record(qapp, tmp_path, monkeypatch):
+    monkeypatch.setattr(CaptureManager, '_probed_encoders', None)
+    monkeypatch.setattr(CaptureManager, '_probe_error', None)
+    monkeypatch.setattr(CaptureManager, '_probe_thread', None)
+    release = threading.Event()
+    
+    def slow_probe(cls, force=False):
+        release.wait(5)
+        cls._probe_error = "no encoders"
+        
+    monkeypatch.setattr(CaptureManager, '_probe_encoders', classmethod(slow_probe))
+    manager = CaptureManager()
+    manager.use_frame_source(SyntheticSource(64, 48))
+    errors = []
+    manager.errorOccurred.connect(errors.append)
+    manager.set_encoder_backend('gstreamer')
+    
+    started = time.monotonic()
+    manager.start_recording(str(tmp_path / "early.avi"))
+    assert time.monotonic() - started < 0.5
+    assert not manager.recording
+    assert "still being probed" in errors[-1]
+    
+    release.set()
+    CaptureManager._probe_thread.join(5)
+    manager.start_recording(str(tmp_path / "failed.avi"))
+    assert not manager.recording
+    assert errors[-1] == "GStreamer encoders are not available: no encoders"
+
+def test_output_geometry_is_fixed_while_recording(qapp, tmp_path):
+    manager = CaptureManager()
+    manager.use_frame_source(SyntheticSource(320, 240))
+    errors = []
+    manager.errorOccurred.connect(errors.append)
+    manager.start_recording(str(tmp_path / "fixed.avi"))
+    shape = manager._frame_pool.shape
+    manager.set_output_size(160, 0)
+    manager.set_crop(QRect(0, 0, 100, 100))
+    assert manager._frame_pool.shape == shape
+    time.sleep(0.3)
+    manager.stop_recording()
+    manager._recording_thread.join(10)
+    
+    assert len(errors) == 2
+    assert manager._output_size == (0, 0) and manager._crop is None
+    capture = cv2.VideoCapture(manager._output_path)
+    assert capture.get(cv2.CAP_PROP_FRAME_WIDTH) == 320
+    capture.release()
@@ -0,0 +1,113 @@
+import time
+import numpy as np
+import cv2
+from capture.capture_manager import CaptureManager
+from capture.compositor import SceneCompositor, SceneSource, SourceLayer, ImageLayer, build_scene
+from capture.frame_sources import FrameSource, SyntheticSource
+
+class StillSource(FrameSource):
+    """Returns the same frame until told otherwise."""
+
+    def __init__(self, frame):
+        self.frame = frame
+
+    def size(self):
+        return self.frame.shape[1], self.frame.shape[0]
+
+    def grab(self):
+        return self.frame.copy()
+
+def solid(width, height, bgra):
+    frame = np.empty((height, width, 4), dtype=np.uint8)
+    frame[:] = bgra
+    return frame
+
+def test_alpha_blending_matches_the_reference():
+    camera = StillSource(solid(40, 30, (0, 0, 200, 255)))
+    logo = solid(20, 20, (255, 0, 0, 128))
+    scene = SceneCompositor(100, 80, [
+        ImageLayer(solid(100, 80, (10, 20, 30, 255)), (0, 0, 100, 80)),
+        SourceLayer(camera, (50, 40, 40, 30), opacity=0.5),
+        ImageLayer(logo, (40, 30, 20, 20)),
+    ])
+    frame, _ = scene.compose()
+    assert tuple(frame[5, 5]) == (10, 20, 30)
+    # Half of the camera over the background
+    assert tuple(frame[60, 85]) == (5, 10, 115)
+    # The logo at half alpha over the blended camera
+    expected = np.round(np.array([255, 0, 0]) * 128 / 255 + np.array([5, 10, 115]) * (1 - 128 / 255))
+    np.testing.assert_allclose(frame[45, 55], expected, atol=1)
+
+def test_only_changed_tiles_are_recomposited():
+    camera = StillSource(solid(64, 64, (0, 255, 0, 255)))
+    scene = SceneCompositor(256, 128, [
+        SourceLayer(SyntheticSource(256, 128, change_every=1000), (0, 0, 256, 128)),
+        SourceLayer(camera, (128, 64, 64, 64)),
+        ImageLayer(solid(32, 32, (255, 255, 255, 255)), (0, 0, 32, 32)),
+    ], tile_size=32)
+    first, rects = scene.compose()
+    assert scene.dirty_pixels == 256 * 128
+    scene.compose()
+    assert scene.dirty_pixels == 0
+
+    camera.frame[:8, :8] = (0, 0, 255, 255)
+    frame, rects = scene.compose()
+    # The camera's one source tile covers four output tiles
+    assert scene.dirty_pixels == 64 * 64
+    assert tuple(frame[64, 128]) == (0, 0, 255)
+    assert tuple(frame[10, 10]) == (255, 255, 255)
+
+    # Recompositing in part gives the same frame as in full
+    full = SceneCompositor(256, 128, scene.layers, tile_size=32, dirty_regions=False)
+    np.testing.assert_array_equal(full.compose()[0], frame)
+
+def test_scene_records_through_the_capture_manager(qapp, tmp_path):
+    logo = tmp_path / "logo.png"
+    cv2.imwrite(str(logo), solid(32, 16, (255, 255, 255, 200)))
+    manager = CaptureManager()
+    errors = []
+    manager.errorOccurred.connect(errors.append)
+    manager.set_scene({
+        'width': 320, 'height': 180,
+        'layers': [
+            {'kind': 'synthetic', 'rect': [0, 0, 320, 180]},
+            {'kind': 'synthetic', 'rect': [220, 110, 96, 64], 'opacity': 0.8},
+            {'kind': 'image', 'rect': [8, 8, 32, 16], 'path': str(logo)},
+        ],
+    })
+    assert isinstance(manager._frame_source, SceneSource)
+    manager.start_recording(str(tmp_path / "scene.avi"))
+    time.sleep(0.5)
+    manager.stop_recording()
+    manager._recording_thread.join(10)
+    qapp.processEvents()  # Errors from the capture thread are queued
+
+    assert not errors
+    assert manager.telemetry['written'] > 0
+    capture = cv2.VideoCapture(manager._output_path)
+    assert capture.get(cv2.CAP_PROP_FRAME_WIDTH) == 320
+    assert capture.get(cv2.CAP_PROP_FRAME_COUNT) > 0
+    capture.release()
+
+def test_unknown_layer_kind_is_rejected():
+    try:
+        build_scene({'width': 10, 'height': 10, 'layers': [{'kind': 'hologram', 'rect': [0, 0, 1, 1]}]})
+    except ValueError as e:
+        assert "hologram" in str(e)
+    else:
+        raise AssertionError("expected ValueError")
+
+def test_window_layers_keep_the_window_size(monkeypatch):
+    import capture.window_index
+    from capture.window_index import WindowInfo
+
+    class Lister:
+        def list_windows(self):
+            return [WindowInfo(7, "editor", (10, 20, 400, 300))]
+
+    monkeypatch.setattr(capture.window_index, 'default_lister', Lister)
+    scene = build_scene({'width': 640, 'height': 360, 'layers': [
+        {'kind': 'window', 'rect': [0, 0, 320, 240], 'handle': 7},
+        {'kind': 'window', 'rect': [320, 0, 320, 180], 'handle': 8, 'area': [0, 0, 800, 450]},
+    ]})
+    assert [layer.source.size() for layer in scene.layers] == [(400, 300), (800, 450)]
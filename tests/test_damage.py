@@ -0,0 +1,47 @@
+import numpy as np
+from capture.damage import TileDiff, changed_fraction
+
+def make_frame(height=100, width=130):
+    return np.zeros((height, width, 4), dtype=np.uint8)
+
+def test_first_frame_is_fully_dirty():
+    diff = TileDiff(tile_size=32)
+    mask = diff.update(make_frame())
+    assert mask.shape == (4, 5)
+    assert mask.all()
+
+def test_unchanged_frame_has_no_dirty_tiles():
+    diff = TileDiff(tile_size=32)
+    diff.update(make_frame())
+    assert not diff.update(make_frame()).any()
+
+def test_change_marks_only_its_tile():
+    diff = TileDiff(tile_size=32)
+    diff.update(make_frame())
+    frame = make_frame()
+    frame[40, 70, 1] = 255
+    mask = diff.update(frame)
+    assert np.argwhere(mask).tolist() == [[1, 2]]
+    assert changed_fraction(mask) == 1 / 20
+
+def test_dirty_rects_merge_runs_and_clip_edges():
+    diff = TileDiff(tile_size=32)
+    mask = np.zeros((4, 5), dtype=bool)
+    mask[0, 1:3] = True
+    mask[3, 4] = True
+    rects = diff.dirty_rects(mask, 100, 130)
+    assert rects == [(32, 0, 64, 32), (128, 96, 2, 4)]
+
+def test_keep_copy_detects_in_place_updates():
+    diff = TileDiff(tile_size=32, keep_copy=True)
+    frame = make_frame()
+    diff.update(frame)
+    frame[0, 0, 0] = 1
+    assert diff.update(frame)[0, 0]
+
+def test_strided_view_is_compared_per_pixel():
+    diff = TileDiff(tile_size=16)
+    padded = np.zeros((20, 40, 4), dtype=np.uint8)
+    view = padded[:, :30]
+    diff.update(view.copy())
+    assert not diff.update(view).any()
@@ -0,0 +1,54 @@
+from pathlib import Path
+import numpy as np
+from capture.concat import write_concat_list, concat_segments
+from capture.encode_workers import ProcessEncodeWriter
+
+def test_concat_list_is_relative_and_quoted(tmp_path):
+    segments = [tmp_path / "parts" / "a.avi", tmp_path / "parts" / "it's.avi"]
+    list_path = write_concat_list([str(p) for p in segments], str(tmp_path / "out.ffconcat"), [1.5, 2.0])
+    assert Path(list_path).read_text().splitlines() == [
+        "ffconcat version 1.0",
+        "file 'parts/a.avi'",
+        "duration 1.500000",
+        "file 'parts/it'\\''s.avi'",
+        "duration 2.000000",
+    ]
+
+def test_single_segment_is_renamed(tmp_path):
+    segment = tmp_path / "segment.avi"
+    segment.write_bytes(b"data")
+    assert concat_segments([str(segment)], str(tmp_path / "out.avi"))
+    assert (tmp_path / "out.avi").read_bytes() == b"data"
+
+def test_process_writer_encodes_all_segments(tmp_path):
+    output = tmp_path / "clip.avi"
+    writer = ProcessEncodeWriter(str(output), 64, 48, 30, workers=2, segment_frames=5)
+    for value in range(12):
+        writer.write(np.full((48, 64, 3), value * 10, dtype=np.uint8))
+    writer.release()
+    # Joined by ffmpeg when available, otherwise segments are kept with a list
+    list_file = tmp_path / "clip.ffconcat"
+    assert output.exists() or len(list_file.read_text().splitlines()) == 1 + 3
+
+def test_unjoined_segments_are_reported_not_completed(qapp, tmp_path, monkeypatch):
+    import time
+    import capture.encode_workers
+    from capture.capture_manager import CaptureManager
+    from capture.frame_sources import SyntheticSource
+    monkeypatch.setattr(capture.encode_workers, 'concat_segments', lambda segments, path: False)
+    manager = CaptureManager()
+    manager.use_frame_source(SyntheticSource(64, 48))
+    manager.set_encoder_backend('processes')
+    manager.set_encode_processes(1)
+    errors, finished = [], []
+    manager.errorOccurred.connect(errors.append)
+    manager.captureComplete.connect(finished.append)
+    manager.start_recording(str(tmp_path / "clip.avi"))
+    time.sleep(0.5)
+    manager.stop_recording()
+    manager._recording_thread.join(30)
+    qapp.processEvents()
+    
+    assert not finished
+    assert not (tmp_path / "clip.avi").exists()
+    assert len(errors) == 1 and "segments kept in" in errors[0]
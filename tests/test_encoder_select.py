@@ -0,0 +1,25 @@
+import pytest
+
+pytest.importorskip("gi")
+from capture.encoder_select import EncoderProfile, select_encoder, PROBE_WIDTH, PROBE_HEIGHT
+
+def test_picks_fastest_encoder():
+    probed = {'x264enc': 400.0, 'vp8enc': 150.0, 'nvh264enc': 900.0}
+    assert select_encoder(probed).element == 'nvh264enc'
+
+def test_respects_codec_preference():
+    probed = {'x264enc': 400.0, 'vp9enc': 200.0}
+    profile = EncoderProfile(codecs=('vp9',))
+    assert select_encoder(probed, profile).element == 'vp9enc'
+
+def test_scales_probe_speed_to_target_resolution():
+    # 100 fps at the probe size is only ~11 fps at 4K
+    probed = {'vp8enc': 100.0}
+    profile = EncoderProfile(width=3840, height=2160, fps=30)
+    spec = select_encoder(probed, profile)
+    assert spec.element == 'vp8enc'
+    assert 100.0 * (PROBE_WIDTH * PROBE_HEIGHT) / (3840 * 2160) < profile.fps
+
+def test_no_usable_encoder():
+    with pytest.raises(Exception):
+        select_encoder({})
@@ -0,0 +1,42 @@
+import numpy as np
+from PySide6.QtGui import QImage, qRgb
+from capture.frame_convert import qimage_to_bgra, bgra_to_bgr, qimage_to_bgr
+
+def make_padded_image(width, height, padding=12):
+    """An RGB32 image whose scanlines carry extra padding bytes."""
+    stride = width * 4 + padding
+    buffer = bytearray(stride * height)
+    image = QImage(buffer, width, height, stride, QImage.Format_RGB32)
+    image.fill(qRgb(0, 0, 0))
+    return image, buffer
+
+def test_view_matches_pixels_with_padded_stride():
+    image, _buffer = make_padded_image(5, 3)
+    image.setPixel(4, 2, qRgb(10, 20, 30))
+    view = qimage_to_bgra(image)
+    assert view.shape == (3, 5, 4)
+    assert view.strides[0] == image.bytesPerLine()
+    assert tuple(view[2, 4, :3]) == (30, 20, 10)
+    assert not view[:, :4, :3].any()
+
+def test_view_is_zero_copy():
+    image, _buffer = make_padded_image(4, 4)
+    view = qimage_to_bgra(image)
+    image.setPixel(1, 1, qRgb(1, 2, 3))
+    assert tuple(view[1, 1, :3]) == (3, 2, 1)
+
+def test_bgr_conversion_reuses_output_buffer():
+    image, _buffer = make_padded_image(6, 2)
+    image.setPixel(0, 1, qRgb(255, 128, 0))
+    out = np.empty((2, 6, 3), dtype=np.uint8)
+    result = bgra_to_bgr(qimage_to_bgra(image), out)
+    assert result is out
+    assert out.flags['C_CONTIGUOUS']
+    assert tuple(out[1, 0]) == (0, 128, 255)
+
+def test_other_formats_are_converted():
+    image = QImage(3, 2, QImage.Format_RGB888)
+    image.fill(qRgb(7, 8, 9))
+    frame = qimage_to_bgr(image)
+    assert frame.shape == (2, 3, 3)
+    assert tuple(frame[0, 0]) == (9, 8, 7)
@@ -0,0 +1,41 @@
+import numpy as np
+from capture.frame_pool import FramePool
+from capture.memory import PeakMemory
+
+def test_buffers_are_recycled():
+    pool = FramePool(8, 4, count=2)
+    first = pool.acquire()
+    assert first.shape == (4, 8, 3)
+    pool.release(first)
+    assert pool.acquire() is first
+
+def test_exhausted_pool_allocates_temporary_buffers():
+    pool = FramePool(8, 4, count=1)
+    pool.acquire()
+    extra = pool.acquire()
+    assert extra.shape == (4, 8, 3)
+    assert pool.misses == 1
+    pool.release(extra)
+    assert pool.acquire() is not extra
+
+def test_resize_only_reallocates_on_change():
+    pool = FramePool(8, 4, count=2)
+    old = pool.acquire()
+    assert not pool.resize(8, 4)
+    assert pool.allocations == 1
+    assert pool.resize(16, 8)
+    assert pool.allocations == 2
+    pool.release(old)
+    assert pool.acquire().shape == (8, 16, 3)
+    assert pool.nbytes == 16 * 8 * 3 * 2
+
+def test_fits_checks_frame_size():
+    pool = FramePool(8, 4)
+    assert pool.fits(np.zeros((4, 8, 4), dtype=np.uint8))
+    assert not pool.fits(np.zeros((8, 4, 4), dtype=np.uint8))
+
+def test_peak_memory_tracks_maximum():
+    peak = PeakMemory()
+    peak.reset()
+    assert peak.peak >= peak.baseline
+    assert peak.sample() <= peak.peak
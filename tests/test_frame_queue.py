@@ -0,0 +1,64 @@
+import threading
+import pytest
+from capture.frame_queue import FrameQueue, BLOCK, DROP_OLDEST, DROP_NEWEST
+
+def test_fifo_order():
+    queue = FrameQueue(capacity=4)
+    for i in range(3):
+        assert queue.put(i)
+    assert queue.depth == 3
+    assert [queue.get(), queue.get(), queue.get()] == [0, 1, 2]
+
+def test_drop_oldest_keeps_latest_frames():
+    queue = FrameQueue(capacity=2, policy=DROP_OLDEST)
+    for i in range(5):
+        assert queue.put(i)
+    assert queue.dropped == 3
+    assert [queue.get(), queue.get()] == [3, 4]
+
+def test_drop_oldest_hands_evicted_frames_back():
+    evicted = []
+    queue = FrameQueue(capacity=2, policy=DROP_OLDEST, on_drop=evicted.append)
+    for i in range(4):
+        queue.put(i)
+    assert evicted == [0, 1]
+
+def test_drop_newest_rejects_when_full():
+    queue = FrameQueue(capacity=2, policy=DROP_NEWEST)
+    assert queue.put(0)
+    assert queue.put(1)
+    assert not queue.put(2)
+    assert queue.dropped == 1
+    assert [queue.get(), queue.get()] == [0, 1]
+
+def test_block_waits_for_consumer():
+    queue = FrameQueue(capacity=1, policy=BLOCK)
+    queue.put(0)
+    assert not queue.put(1, timeout=0.01)
+    
+    consumer = threading.Timer(0.05, queue.get)
+    consumer.start()
+    assert queue.put(2, timeout=2.0)
+    consumer.join()
+    assert queue.get() == 2
+
+def test_close_drains_then_returns_none():
+    queue = FrameQueue(capacity=4)
+    queue.put(0)
+    queue.close()
+    assert not queue.put(1)
+    assert queue.get() == 0
+    assert queue.get() is None
+
+def test_close_wakes_blocked_consumer():
+    queue = FrameQueue(capacity=4)
+    result = []
+    consumer = threading.Thread(target=lambda: result.append(queue.get()))
+    consumer.start()
+    queue.close()
+    consumer.join(timeout=2.0)
+    assert result == [None]
+
+def test_rejects_unknown_policy():
+    with pytest.raises(ValueError):
+        FrameQueue(capacity=2, policy="spill")
@@ -0,0 +1,63 @@
+import pytest
+from capture.frame_scheduler import FrameScheduler, TimecodeWriter, SKIP, DUPLICATE
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+        self.slept = []
+        
+    def __call__(self):
+        return self.now
+        
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+def make_scheduler(fps=10, catch_up=DUPLICATE):
+    clock = FakeClock()
+    return FrameScheduler(fps, catch_up, clock=clock, sleep=clock.sleep), clock
+
+def test_deadlines_do_not_drift():
+    scheduler, clock = make_scheduler(fps=10)
+    scheduler.start()
+    for expected in range(5):
+        tick = scheduler.wait_next()
+        assert tick.index == expected
+        assert tick.missed == 0
+        clock.now += 0.03  # grab + encode time
+    # Absolute deadlines absorb the work time instead of adding to it
+    assert clock.now == pytest.approx(100.0 + 0.4 + 0.03)
+
+def test_late_frames_report_missed_slots():
+    scheduler, clock = make_scheduler(fps=10)
+    scheduler.start()
+    scheduler.wait_next()
+    clock.now += 0.35  # stalled for three and a half slots
+    tick = scheduler.wait_next()
+    assert tick.index == 3
+    assert tick.missed == 2
+    assert tick.pts == pytest.approx(0.3)
+    assert scheduler.missed_frames == 2
+    assert scheduler.wait_next().index == 4
+
+def test_late_within_slot_is_not_missed():
+    scheduler, clock = make_scheduler(fps=10, catch_up=SKIP)
+    scheduler.start()
+    scheduler.wait_next()
+    clock.now += 0.15
+    tick = scheduler.wait_next()
+    assert tick.index == 1
+    assert tick.missed == 0
+
+def test_rejects_unknown_policy():
+    with pytest.raises(ValueError):
+        FrameScheduler(30, "rewind")
+
+def test_timecode_file(tmp_path):
+    path = tmp_path / "rec.timecodes.txt"
+    writer = TimecodeWriter(str(path))
+    for pts in (0.0, 1 / 30, 2 / 30):
+        writer.write(pts)
+    writer.close()
+    lines = path.read_text().splitlines()
+    assert lines == ["# timecode format v2", "0.000", "33.333", "66.667"]
@@ -0,0 +1,112 @@
+import numpy as np
+import cv2
+import pytest
+from PySide6.QtCore import QRect
+from capture.frame_sources import (
+    SyntheticSource, VideoFileSource, XImageSource, SourceExhausted, create_source, SYNTHETIC,
+    screen_at
+)
+
+def test_synthetic_source_is_deterministic():
+    first = SyntheticSource(320, 240, seed=3)
+    second = SyntheticSource(320, 240, seed=3)
+    frames = [first.grab() for _ in range(5)]
+    assert frames[0].shape == (240, 320, 4)
+    assert np.array_equal(frames[4], second.frame(4))
+    assert not np.array_equal(frames[0], frames[1])
+    # Every grab is a new buffer
+    assert not np.shares_memory(frames[0], frames[1])
+
+def test_synthetic_source_changes_every_n_frames():
+    source = SyntheticSource(160, 120, change_every=3)
+    frames = [source.grab() for _ in range(4)]
+    assert np.array_equal(frames[0], frames[2])
+    assert not np.array_equal(frames[2], frames[3])
+
+def test_create_source_uses_area_size():
+    source = create_source(SYNTHETIC, area=QRect(10, 10, 200, 100))
+    assert source.size() == (200, 100)
+    with pytest.raises(ValueError):
+        create_source('webcam')
+
+def test_ximage_source_size_is_the_selected_screen(qapp):
+    geometry = screen_at(0).geometry()
+    assert XImageSource(screen=0).size() == (geometry.width(), geometry.height())
+    assert XImageSource(QRect(5, 5, 120, 80), screen=0).size() == (120, 80)
+
+def test_video_file_source_replays(tmp_path):
+    path = str(tmp_path / "clip.avi")
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'MJPG'), 10, (64, 48))
+    for value in (0, 100, 200):
+        writer.write(np.full((48, 64, 3), value, dtype=np.uint8))
+    writer.release()
+    
+    looping = VideoFileSource(path)
+    assert looping.size() == (64, 48)
+    values = [int(looping.grab().mean()) for _ in range(4)]
+    assert values[3] == pytest.approx(values[0], abs=3)
+    looping.close()
+    
+    once = VideoFileSource(path, loop=False)
+    for _ in range(3):
+        once.grab()
+    with pytest.raises(SourceExhausted):
+        once.grab()
+    once.close()
+
+def test_xshm_falls_back_to_qt_without_display(monkeypatch):
+    monkeypatch.delenv('DISPLAY', raising=False)
+    source = create_source('xshm', area=QRect(0, 0, 100, 80))
+    assert source.name == 'qt'
+    assert source.size() == (100, 80)
+
+def test_xshm_source_closes_its_display_connection(monkeypatch):
+    import capture.xshm
+    from capture.frame_sources import XShmSource
+    grabbers = []
+    
+    class FakeGrabber:
+        def __init__(self, display):
+            self.closed = False
+            grabbers.append(self)
+            
+        def screen_size(self):
+            return 64, 48
+            
+        def configure(self, x, y, width, height):
+            pass
+            
+        def close(self):
+            self.closed = True
+            
+    monkeypatch.setattr(capture.xshm, 'XShmGrabber', FakeGrabber)
+    source = XShmSource()
+    source.open()
+    source.close()
+    assert grabbers[0].closed
+    # A closed source reconnects when it is opened again
+    source.open()
+    assert len(grabbers) == 2 and not grabbers[1].closed
+    source.close()
+
+def test_xshm_attach_restores_the_previous_error_handler():
+    from types import SimpleNamespace
+    import capture.xshm as xshm
+    handlers = ['previous']
+    
+    def set_handler(handler):
+        handlers.append(handler)
+        return handlers[-2]
+        
+    def sync(display, discard):
+        # The server rejects the attach
+        xshm._record_x_error(None, None)
+        
+    grabber = xshm.XShmGrabber.__new__(xshm.XShmGrabber)
+    grabber._x11 = SimpleNamespace(XSetErrorHandler=set_handler, XSync=sync)
+    grabber._xext = SimpleNamespace(XShmAttach=lambda display, info: 1)
+    grabber._display = None
+    grabber._info = xshm.XShmSegmentInfo()
+    assert not grabber._attach()
+    assert handlers[-1] == 'previous'
+    assert xshm._x_errors == []
@@ -0,0 +1,93 @@
+import time
+import cv2
+import numpy as np
+import pytest
+from capture.capture_manager import CaptureManager
+from capture.frame_sources import SyntheticSource
+from capture.frame_spool import SpoolWriter, SpoolReader, encode_spool
+
+def frames(count, width=64, height=48):
+    rng = np.random.default_rng(5)
+    return [rng.integers(0, 256, (height, width, 3), dtype=np.uint8) for _ in range(count)]
+
+@pytest.mark.parametrize("level", [0, 1])
+def test_round_trip_across_chunks(tmp_path, level):
+    source = frames(40)
+    # Chunks smaller than a few frames force the data window to be remapped
+    writer = SpoolWriter(str(tmp_path / "clip"), 64, 48, 30, level=level, chunk_mb=0.01)
+    for index, frame in enumerate(source):
+        writer.write(frame, index / 30)
+    writer.release()
+    assert writer.path.endswith(".csspool")
+
+    with SpoolReader(writer.path) as reader:
+        assert len(reader) == 40
+        for index, (pts, frame) in enumerate(reader):
+            assert pts == index / 30
+            np.testing.assert_array_equal(frame, source[index])
+
+def test_release_trims_preallocated_space(tmp_path):
+    writer = SpoolWriter(str(tmp_path / "clip"), 64, 48, 30, max_seconds=10)
+    for frame in frames(3):
+        writer.write(frame)
+    writer.release()
+    size = (tmp_path / "clip.csspool").stat().st_size
+    assert size - writer.nbytes < 64 * 1024
+    assert writer.nbytes == 3 * 64 * 48 * 3
+
+def test_truncated_spool_reads_complete_frames(tmp_path):
+    writer = SpoolWriter(str(tmp_path / "cut"), 64, 48, 30)
+    for frame in frames(3):
+        writer.write(frame)
+    writer.release()
+    path = tmp_path / "cut.csspool"
+    path.write_bytes(path.read_bytes()[:-5])
+    with SpoolReader(str(path)) as reader:
+        assert len(reader) == 2
+
+def test_full_spool_raises(tmp_path):
+    writer = SpoolWriter(str(tmp_path / "short"), 64, 48, 10, max_seconds=0.2)
+    source = frames(3)
+    writer.write(source[0])
+    writer.write(source[1])
+    with pytest.raises(Exception, match="full"):
+        writer.write(source[2])
+    writer.release()
+
+def test_parallel_encode_keeps_every_frame(tmp_path):
+    writer = SpoolWriter(str(tmp_path / "clip"), 64, 48, 10)
+    for frame in frames(60):
+        writer.write(frame)
+    writer.release()
+    output = encode_spool(writer.path, str(tmp_path / "clip.avi"), workers=2)
+    if output is None:
+        # No ffmpeg to join the ranges: the segments are kept with a list
+        assert len((tmp_path / "clip.ffconcat").read_text().splitlines()) == 1 + 3
+        assert (tmp_path / "clip.csspool").exists()
+    else:
+        capture = cv2.VideoCapture(output)
+        assert capture.get(cv2.CAP_PROP_FRAME_COUNT) == 60
+        capture.release()
+        assert not (tmp_path / "clip.csspool").exists()
+
+def test_spool_backend_encodes_after_stopping(qapp, tmp_path):
+    manager = CaptureManager()
+    manager.use_frame_source(SyntheticSource(160, 120))
+    manager.set_encoder_backend('spool')
+    manager.set_encode_processes(1)
+    completed, errors = [], []
+    manager.captureComplete.connect(completed.append)
+    manager.errorOccurred.connect(errors.append)
+    manager.start_recording(str(tmp_path / "spooled.avi"))
+    time.sleep(0.5)
+    manager.stop_recording()
+    manager._recording_thread.join(10)
+    assert manager.wait_spool_encodes(30)
+    qapp.processEvents()
+
+    assert not errors
+    assert completed == [str(tmp_path / "spooled.avi")]
+    assert not (tmp_path / "spooled.csspool").exists()
+    capture = cv2.VideoCapture(completed[0])
+    assert capture.get(cv2.CAP_PROP_FRAME_COUNT) == manager.telemetry['written']
+    capture.release()
@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+from capture.frame_transform import FrameTransform, scaled_size, GRAY
+
+def bgra(width, height):
+    frame = np.zeros((height, width, 4), dtype=np.uint8)
+    frame[:, :, 0] = 10
+    frame[:, :, 1] = 20
+    frame[:, :, 2] = 30
+    frame[:, width // 2:, 2] = 200
+    return frame
+
+def test_scaled_size_keeps_aspect_and_even_dimensions():
+    assert scaled_size((3840, 2160), (0, 0)) == (3840, 2160)
+    assert scaled_size((3840, 2160), (0, 1080)) == (1920, 1080)
+    assert scaled_size((3840, 2160), (1280, 0)) == (1280, 720)
+    assert scaled_size((1366, 768), (0, 541)) == (962, 542)
+
+def test_identity_is_a_plain_copy():
+    transform = FrameTransform((64, 48))
+    assert transform.identity
+    frame = bgra(64, 48)
+    out = np.empty((48, 64, 3), dtype=np.uint8)
+    assert transform.apply(frame, out) is out
+    assert np.array_equal(out, frame[:, :, :3])
+
+@pytest.mark.parametrize("interpolation", ["nearest", "linear", "area", "cubic", "lanczos"])
+def test_downscale_into_buffer(interpolation):
+    transform = FrameTransform((640, 360), (320, 0), interpolation=interpolation)
+    assert transform.output_size == (320, 180)
+    out = np.empty((180, 320, 3), dtype=np.uint8)
+    result = transform.apply(bgra(640, 360), out)
+    assert result is out
+    assert tuple(out[0, 0]) == (10, 20, 30)
+    assert tuple(out[0, -1]) == (10, 20, 200)
+
+def test_crop_upscale_and_gray():
+    transform = FrameTransform((100, 100), (40, 40), crop=(50, 0, 20, 20))
+    frame = transform.apply(bgra(100, 100))
+    assert frame.shape == (40, 40, 3)
+    assert tuple(frame[10, 10]) == (10, 20, 200)
+    gray = FrameTransform((100, 100), colorspace=GRAY).apply(bgra(100, 100))
+    assert gray.shape == (100, 100, 3)
+    assert gray[0, 0, 0] == gray[0, 0, 1] == gray[0, 0, 2]
+
+def test_crop_outside_frame_is_rejected():
+    with pytest.raises(ValueError):
+        FrameTransform((100, 100), crop=(120, 0, 10, 10))
+    with pytest.raises(ValueError):
+        FrameTransform((100, 100), interpolation='bogus')
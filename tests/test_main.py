@@ -12,6 +12,9 @@ def app(qapp):
 @pytest.fixture
 def engine(app):
     engine = QQmlApplicationEngine()
+    # main.py registers the managers as null until they are created
+    engine.rootContext().setContextProperty("captureManager", None)
+    engine.rootContext().setContextProperty("multiCaptureManager", None)
     yield engine
     engine.deleteLater()
 
@@ -41,4 +44,29 @@ def test_window_properties(app, engine):
     assert root_object.height() == 720
     
     # Test visibility
-    assert root_object.isVisible() == True 
\ No newline at end of file
+    assert root_object.isVisible() == True
+
+
+def test_managers_are_created_after_qml_loads(app, engine):
+    import time
+    from main import CaptureLoader, StartupProfile
+    qml_file = Path(__file__).parent.parent / "src" / "qml" / "main.qml"
+    engine.load(QUrl.fromLocalFile(str(qml_file)))
+    assert engine.rootObjects()
+    
+    profile = StartupProfile()
+    loader = CaptureLoader(engine, profile)
+    ready = []
+    loader.ready.connect(lambda: ready.append(True))
+    loader.start()
+    deadline = time.monotonic() + 30
+    while not ready and time.monotonic() < deadline:
+        app.processEvents()
+        time.sleep(0.01)
+    
+    assert ready
+    assert engine.rootContext().contextProperty("captureManager") is loader.capture_manager
+    phases = [phase for phase, _ in profile.phases]
+    assert "import capture.capture_manager" in phases
+    assert "create managers" in phases
+    assert "total" in profile.report()
@@ -0,0 +1,87 @@
+import time
+from pathlib import Path
+from capture.multi_capture import MultiCaptureManager
+from capture.frame_sources import SyntheticSource
+
+def test_streams_share_one_clock(qapp, tmp_path):
+    multi = MultiCaptureManager()
+    multi.add_source(SyntheticSource(160, 120), "left")
+    multi.add_source(SyntheticSource(96, 64, seed=1), "right")
+    paths = []
+    multi.captureComplete.connect(paths.extend)
+    errors = []
+    multi.errorOccurred.connect(errors.append)
+    
+    multi.start_recording(str(tmp_path / "desk.avi"))
+    assert multi.recording
+    time.sleep(0.8)
+    multi.stop_recording()
+    assert not multi.recording
+    deadline = time.monotonic() + 10
+    while not paths and time.monotonic() < deadline:
+        qapp.processEvents()  # captureComplete is queued from the finalizing thread
+        time.sleep(0.05)
+    
+    assert not errors
+    assert sorted(Path(p).name for p in paths) == ["desk_left.avi", "desk_right.avi"]
+    timecodes = [
+        (tmp_path / name).read_text().splitlines()[1:]
+        for name in ("desk_left.timecodes.txt", "desk_right.timecodes.txt")
+    ]
+    common = min(len(t) for t in timecodes)
+    assert common > 5
+    assert abs(len(timecodes[0]) - len(timecodes[1])) <= 1
+    assert timecodes[0][:common] == timecodes[1][:common]
+    # Each stream ran its own capture thread
+    threads = {manager._recording_thread.ident for manager in multi.managers}
+    assert len(threads) == 2
+
+class SlowRelease:
+    """Takes a while to flush, like an encoder with frames in flight."""
+    
+    def __init__(self, writer):
+        self._writer = writer
+        
+    def write(self, frame):
+        self._writer.write(frame)
+        
+    def isOpened(self):
+        return self._writer.isOpened()
+        
+    def release(self):
+        time.sleep(0.5)
+        self._writer.release()
+
+def test_completes_only_after_every_stream_is_written(qapp, tmp_path):
+    multi = MultiCaptureManager()
+    multi.STOP_TIMEOUT = 0.05
+    multi.add_source(SyntheticSource(160, 120), "slow")
+    make_manager = multi._make_manager
+    
+    def slow_manager(stream):
+        manager = make_manager(stream)
+        open_backend = manager._open_backend_writer
+        manager._open_backend_writer = lambda path, w, h: (
+            lambda opened: (SlowRelease(opened[0]), opened[1])
+        )(open_backend(path, w, h))
+        return manager
+        
+    multi._make_manager = slow_manager
+    finished = []
+    multi.captureComplete.connect(
+        lambda paths: finished.append(all(manager.wait(0) for manager in multi.managers))
+    )
+    multi.start_recording(str(tmp_path / "slow.avi"))
+    time.sleep(0.3)
+    multi.stop_recording()
+    time.sleep(0.2)
+    assert multi.finalizing
+    multi.start_recording(str(tmp_path / "again.avi"))
+    assert not multi.recording
+    deadline = time.monotonic() + 10
+    while not finished and time.monotonic() < deadline:
+        qapp.processEvents()
+        time.sleep(0.05)
+    
+    assert finished == [True]
+    assert not multi.finalizing
@@ -0,0 +1,52 @@
+import numpy as np
+from PySide6.QtCore import QSize
+from capture.preview import PreviewTap, PreviewImageProvider
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def frame(width, height, value=0):
+    pixels = np.full((height, width, 4), value, dtype=np.uint8)
+    pixels[:, :, 2] = 200
+    return pixels
+
+def test_preview_is_downscaled_and_rate_limited():
+    clock = Clock()
+    published = []
+    tap = PreviewTap(max_width=320, fps=10, on_frame=published.append, clock=clock)
+    assert tap.offer(frame(1920, 1080))
+    assert not tap.offer(frame(1920, 1080))  # Within 100 ms of the last one
+    clock.now = 0.1
+    assert tap.offer(frame(1920, 1080))
+    assert published == [1, 2]
+    image = tap.image()
+    assert (image.width(), image.height()) == (320, 180)
+    assert image.pixelColor(0, 0).red() == 200
+
+def test_preview_drops_instead_of_waiting_for_the_reader():
+    tap = PreviewTap(fps=1000, clock=Clock())
+    with tap._lock:
+        assert not tap.offer(frame(64, 48))
+    assert tap.dropped == 1
+    assert tap.image().isNull()
+    tap.enabled = False
+    assert not tap.offer(frame(64, 48))
+
+def test_preview_does_not_alias_captured_pixels():
+    tap = PreviewTap(max_width=64, clock=Clock())
+    pixels = frame(64, 48, value=10)
+    tap.offer(pixels)
+    pixels[:] = 99
+    assert tap.image().pixelColor(0, 0).blue() == 10
+
+def test_image_provider_serves_latest_frame(qapp):
+    tap = PreviewTap(max_width=100, clock=Clock())
+    provider = PreviewImageProvider(tap)
+    assert not provider.requestImage("0", QSize(), QSize()).isNull()
+    tap.offer(frame(200, 100))
+    image = provider.requestImage("1", QSize(), QSize())
+    assert (image.width(), image.height()) == (100, 50)
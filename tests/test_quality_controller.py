@@ -0,0 +1,99 @@
+import threading
+import time
+from types import SimpleNamespace
+from capture.capture_manager import CaptureManager
+from capture.frame_sources import SyntheticSource
+from capture.quality_controller import (
+    QualityController, QualityBounds, QualityLevel, PipelineLoad, CpuMeter, quality_ladder
+)
+
+OVERLOAD = PipelineLoad(encode=1.5, queue=0.8, cpu=0.5)
+IDLE = PipelineLoad(encode=0.1, queue=0.0, cpu=0.1)
+STEADY = PipelineLoad(encode=0.7, queue=0.2, cpu=0.5)
+
+def test_ladder_lowers_fps_in_whole_divisions():
+    assert quality_ladder(30, QualityBounds(min_fps=10)) == [
+        QualityLevel(30), QualityLevel(15), QualityLevel(10),
+    ]
+    assert quality_ladder(5, QualityBounds(min_fps=10)) == [QualityLevel(5)]
+
+def test_steps_down_on_sustained_load_and_back_up_with_hysteresis():
+    controller = QualityController(30)
+    assert controller.sample(OVERLOAD) is None
+    assert controller.sample(OVERLOAD) == QualityLevel(15)
+    # A load between the thresholds holds the level
+    for _ in range(10):
+        assert controller.sample(STEADY) is None
+    for _ in range(4):
+        assert controller.sample(IDLE) is None
+    assert controller.sample(IDLE) == QualityLevel(30)
+    assert controller.changes == 2
+
+def test_never_leaves_the_bounds():
+    controller = QualityController(30, QualityBounds(min_fps=15))
+    for _ in range(20):
+        controller.sample(OVERLOAD)
+    assert controller.level == QualityLevel(15)
+    for _ in range(50):
+        controller.sample(IDLE)
+    assert controller.level == QualityLevel(30)
+
+def test_cpu_meter_reports_the_busiest_thread():
+    threads = [SimpleNamespace(ident=1), SimpleNamespace(ident=2)]
+    spent = {1: 0.0, 2: 0.0}
+    now = [0.0]
+    meter = CpuMeter(lambda: threads, clock=lambda: now[0], process_time=lambda: 0.0,
+                     thread_time=lambda ident: spent[ident])
+    assert meter.sample() == 0.0
+    now[0] = 2.0
+    spent[1], spent[2] = 1.8, 0.2
+    assert meter.sample() == 0.9
+
+def test_cpu_meter_without_thread_clocks_spreads_process_time():
+    threads = [SimpleNamespace(ident=1), SimpleNamespace(ident=2)]
+    now = [0.0, 0.0]
+    meter = CpuMeter(lambda: threads, clock=lambda: now[0], process_time=lambda: now[1],
+                     thread_time=None)
+    now[:] = [1.0, 1.5]
+    assert meter.sample() == 0.75
+
+def test_saturated_thread_counts_as_overload():
+    busy = threading.Event()
+
+    def spin():
+        while not busy.is_set():
+            pass
+
+    worker = threading.Thread(target=spin)
+    worker.start()
+    try:
+        meter = CpuMeter(lambda: [worker])
+        meter.sample()
+        time.sleep(0.3)
+        assert meter.sample() > 0.5
+    finally:
+        busy.set()
+        worker.join()
+
+def test_overloaded_recording_captures_fewer_frames(qapp, tmp_path):
+    manager = CaptureManager()
+    manager.use_frame_source(SyntheticSource(160, 120))
+    manager.set_adaptive_quality(True)
+    manager.QUALITY_INTERVAL = 0.1
+    changes = []
+    manager.qualityChanged.connect(lambda: changes.append(manager.qualityFps))
+    manager.start_recording(str(tmp_path / "adaptive.avi"))
+    manager._quality.sample = lambda load, sample=manager._quality.sample: sample(OVERLOAD)
+    deadline = time.monotonic() + 5
+    while manager._quality.level != QualityLevel(10) and time.monotonic() < deadline:
+        time.sleep(0.05)
+    time.sleep(0.3)
+    manager.stop_recording()
+    manager._recording_thread.join(10)
+    qapp.processEvents()
+
+    assert manager._quality.level == QualityLevel(10)
+    assert changes[-1] == 10
+    telemetry = manager.telemetry
+    # Every slot is still written, but most are repeats of fewer captures
+    assert telemetry['captured'] < telemetry['written']
@@ -0,0 +1,84 @@
+import time
+import numpy as np
+from capture.capture_manager import CaptureManager
+from capture.frame_sources import SyntheticSource
+from capture.replay_buffer import ReplayBuffer
+from capture.tile_codec import TileStreamReader
+
+def noise(rng):
+    return rng.integers(0, 256, (64, 64, 3), dtype=np.uint8)
+
+def test_evicts_whole_gops_beyond_the_window():
+    rng = np.random.default_rng(2)
+    buffer = ReplayBuffer(64, 64, 10, max_seconds=3, gop_seconds=1)
+    for index in range(100):
+        buffer.write(noise(rng), index / 10)
+    # Three seconds are always kept, plus the GOP being filled
+    assert 3.0 <= buffer.duration <= 4.0
+    assert buffer.frames % 10 == 0
+    assert buffer.evicted_gops > 0
+
+def test_memory_cap_is_hard(tmp_path):
+    rng = np.random.default_rng(3)
+    frame_bytes = len(ReplayBuffer(64, 64, 30)._encoder.encode(noise(rng))[0])
+    cap_mb = 20 * frame_bytes / (1024 * 1024)
+    buffer = ReplayBuffer(64, 64, 30, max_seconds=60, max_mb=cap_mb)
+    for index in range(200):
+        buffer.write(noise(rng), index / 30)
+        assert buffer.nbytes <= 21 * frame_bytes
+    assert buffer.frames < 200
+
+def test_save_starts_at_a_keyframe_and_decodes(tmp_path):
+    rng = np.random.default_rng(4)
+    frames = [noise(rng) for _ in range(25)]
+    buffer = ReplayBuffer(64, 64, 10, max_seconds=1, gop_seconds=1)
+    for index, frame in enumerate(frames):
+        buffer.write(frame, index / 10)
+    path = buffer.save(str(tmp_path / "replay"))
+    assert path.endswith(".cstile")
+
+    with TileStreamReader(path) as reader:
+        decoded = [(pts, frame.copy()) for pts, frame in reader]
+    first = len(frames) - len(decoded)
+    assert first % 10 == 0
+    for offset, (pts, frame) in enumerate(decoded):
+        assert pts == (first + offset) / 10
+        np.testing.assert_array_equal(frame, frames[first + offset])
+
+def test_save_replay_while_recording(qapp, tmp_path):
+    manager = CaptureManager()
+    manager.use_frame_source(SyntheticSource(160, 120))
+    manager.set_replay_buffer(5, 64)
+    saved, errors = [], []
+    manager.replaySaved.connect(saved.append)
+    manager.errorOccurred.connect(errors.append)
+    manager.start_recording(str(tmp_path / "unused.avi"))
+    assert manager.replayBuffering
+    time.sleep(0.5)
+    manager.save_replay(str(tmp_path / "replay.cstile"))
+    deadline = time.monotonic() + 10
+    while not saved and time.monotonic() < deadline:
+        qapp.processEvents()
+        time.sleep(0.01)
+    # Capture keeps running after the save
+    assert manager.recording
+    manager.stop_recording()
+    manager._recording_thread.join(10)
+
+    assert not errors
+    assert saved == [str(tmp_path / "replay.cstile")]
+    assert not (tmp_path / "unused.avi").exists()
+    with TileStreamReader(saved[0]) as reader:
+        assert (reader.width, reader.height) == (160, 120)
+        assert len(list(reader)) > 0
+
+    # The last replay can still be saved after stopping
+    assert not manager.replayBuffering
+    manager.save_replay(str(tmp_path / "after.cstile"))
+    deadline = time.monotonic() + 10
+    while len(saved) < 2 and time.monotonic() < deadline:
+        qapp.processEvents()
+        time.sleep(0.01)
+    assert saved[1] == str(tmp_path / "after.cstile")
+    with TileStreamReader(saved[1]) as reader:
+        assert len(list(reader)) > 0
@@ -0,0 +1,82 @@
+import json
+from pathlib import Path
+from capture.segmented_writer import SegmentedWriter, load_manifest, join_segments
+
+class ByteWriter:
+    """Stand-in segment writer that stores one byte per frame."""
+    
+    def __init__(self, path):
+        self.path = path + ".bin"
+        self.file = open(self.path, "wb")
+        
+    def isOpened(self):
+        return self.file is not None
+        
+    def write(self, frame):
+        self.file.write(bytes([frame]))
+        
+    def release(self):
+        self.file.close()
+        self.file = None
+
+def open_byte_writer(path):
+    writer = ByteWriter(path)
+    return writer, writer.path
+
+def test_rolls_over_by_duration(tmp_path):
+    finished = []
+    writer = SegmentedWriter(str(tmp_path / "rec.avi"), 10, open_byte_writer,
+                             segment_seconds=1.0, on_segment=finished.append)
+    for value in range(25):
+        writer.write(value)
+    assert len(finished) == 2
+    writer.release()
+    
+    manifest = load_manifest(writer.manifest)
+    assert manifest["complete"]
+    assert [s["frames"] for s in manifest["segments"]] == [10, 10, 5]
+    assert [s["start"] for s in manifest["segments"]] == [0.0, 1.0, 2.0]
+    assert all(s["complete"] for s in manifest["segments"])
+    assert writer.path == str(tmp_path / "rec.bin")
+    assert Path(finished[1]).read_bytes() == bytes(range(10, 20))
+
+def test_rolls_over_by_size(tmp_path):
+    writer = SegmentedWriter(str(tmp_path / "rec.avi"), 4, open_byte_writer,
+                             segment_seconds=0, segment_mb=8 / (1024 * 1024))
+    for value in range(20):
+        writer.write(value)
+        writer._writer.file.flush()
+    writer.release()
+    frames = [s["frames"] for s in load_manifest(writer.manifest)["segments"]]
+    assert sum(frames) == 20
+    assert max(frames) == 8
+
+def test_crash_leaves_finished_segments_usable(tmp_path):
+    writer = SegmentedWriter(str(tmp_path / "rec.avi"), 10, open_byte_writer, segment_seconds=1.0)
+    for value in range(15):
+        writer.write(value)
+    # No release(): the session died while writing the second segment
+    manifest = load_manifest(writer.manifest)
+    assert not manifest["complete"]
+    assert [s["complete"] for s in manifest["segments"]] == [True, False]
+    concat_list = (tmp_path / "rec.ffconcat").read_text()
+    assert "rec_00000.bin" in concat_list
+    assert "rec_00001.bin" not in concat_list
+    
+    joined = join_segments(writer.manifest, str(tmp_path / "recovered.bin"))
+    assert Path(joined).read_bytes() == bytes(range(10))
+
+def test_process_backend_is_not_rolled_over(qapp, tmp_path):
+    from capture.capture_manager import CaptureManager
+    from capture.encode_workers import ProcessEncodeWriter
+    manager = CaptureManager()
+    manager.set_encoder_backend('processes')
+    manager.set_encode_processes(1)
+    manager.set_segmenting(1, 0)
+    writer, path = manager._open_video_writer(str(tmp_path / "rec.avi"), 64, 48)
+    try:
+        # One process pool for the whole recording, which it segments itself
+        assert isinstance(writer, ProcessEncodeWriter)
+        assert path == str(tmp_path / "rec.avi")
+    finally:
+        writer.release()
@@ -0,0 +1,71 @@
+import json
+import pytest
+from capture.telemetry import StageHistogram, Telemetry, TelemetryDump, GRAB, ENCODE
+
+class FakeClock:
+    def __init__(self):
+        self.now = 50.0
+        
+    def __call__(self):
+        return self.now
+
+def test_histogram_percentiles():
+    histogram = StageHistogram()
+    for ms in range(1, 101):
+        histogram.record(ms / 1000.0)
+    assert histogram.count == 100
+    assert histogram.max == pytest.approx(0.1)
+    # Log buckets are ~33% wide, so estimates stay within one bucket
+    assert histogram.percentile(50) == pytest.approx(0.050, rel=0.35)
+    assert histogram.percentile(95) == pytest.approx(0.095, rel=0.35)
+    assert histogram.percentile(99) <= histogram.max
+    assert histogram.percentile(50) < histogram.percentile(95) <= histogram.percentile(99)
+
+def test_histogram_outliers_land_in_overflow_bucket():
+    histogram = StageHistogram(bounds=[0.001, 0.01])
+    histogram.record(5.0)
+    assert histogram.buckets() == [0, 0, 1]
+    assert histogram.percentile(100) == pytest.approx(5.0)
+    assert 0.01 < histogram.percentile(50) < 5.0
+
+def test_counters_and_effective_fps():
+    clock = FakeClock()
+    telemetry = Telemetry(30, clock=clock)
+    clock.now += 2.0
+    telemetry.count('written', 50)
+    telemetry.count('late')
+    telemetry.set_count('dropped', 3)
+    telemetry.stop()
+    clock.now += 10.0  # Frozen after stop()
+    snapshot = telemetry.snapshot()
+    assert snapshot['effective_fps'] == pytest.approx(25.0)
+    assert snapshot['late'] == 1
+    assert snapshot['dropped'] == 3
+    assert snapshot['stages'][GRAB]['count'] == 0
+
+def test_prometheus_histogram_is_cumulative():
+    telemetry = Telemetry(30)
+    for seconds in (0.001, 0.002, 0.5):
+        telemetry.record(ENCODE, seconds)
+    text = telemetry.to_prometheus()
+    assert 'capturestudio_stage_seconds_bucket{stage="encode",le="+Inf"} 3' in text
+    assert 'capturestudio_stage_seconds_count{stage="encode"} 3' in text
+    counts = [int(line.rsplit(' ', 1)[1]) for line in text.splitlines()
+              if line.startswith('capturestudio_stage_seconds_bucket{stage="encode"')]
+    assert counts == sorted(counts)
+
+def test_dump_formats(tmp_path):
+    telemetry = Telemetry(30)
+    telemetry.record(GRAB, 0.004)
+    lines = TelemetryDump(str(tmp_path / "stats.jsonl"))
+    lines.dump(telemetry)
+    lines.dump(telemetry)
+    lines.close()
+    records = [json.loads(line) for line in (tmp_path / "stats.jsonl").read_text().splitlines()]
+    assert len(records) == 2
+    assert records[0]['stages'][GRAB]['count'] == 1
+    
+    prometheus = TelemetryDump(str(tmp_path / "stats.prom"))
+    prometheus.dump(telemetry)
+    prometheus.close()
+    assert "# TYPE capturestudio_frames_written_total counter" in (tmp_path / "stats.prom").read_text()
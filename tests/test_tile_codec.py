@@ -0,0 +1,46 @@
+import numpy as np
+from capture.tile_codec import TileStreamWriter, TileStreamReader
+
+def test_round_trip_is_lossless(tmp_path):
+    path = str(tmp_path / "clip.cstile")
+    rng = np.random.default_rng(1)
+    frames = [rng.integers(0, 256, (70, 100, 3), dtype=np.uint8)]
+    for _ in range(5):
+        frame = frames[-1].copy()
+        frame[rng.integers(0, 70), rng.integers(0, 100)] = rng.integers(0, 256, 3)
+        frames.append(frame)
+    frames.append(frames[-1].copy())
+    
+    writer = TileStreamWriter(path, 100, 70, 30, tile_size=32)
+    for frame in frames:
+        writer.write(frame)
+    # Keyframe writes every tile, then one tile per change, none for the repeat
+    assert writer.tiles_written == 12 + 5
+    writer.release()
+    
+    with TileStreamReader(path) as reader:
+        decoded = [(pts, frame.copy()) for pts, frame in reader]
+    assert len(decoded) == len(frames)
+    for index, (pts, frame) in enumerate(decoded):
+        assert pts == index / 30
+        np.testing.assert_array_equal(frame, frames[index])
+
+def test_static_content_compresses(tmp_path):
+    path = str(tmp_path / "static.cstile")
+    frame = np.full((256, 256, 3), 40, dtype=np.uint8)
+    writer = TileStreamWriter(path, 256, 256, 30)
+    for _ in range(30):
+        writer.write(frame)
+    assert writer.compression_ratio > 100
+    writer.release()
+
+def test_truncated_stream_yields_complete_frames(tmp_path):
+    path = tmp_path / "cut.cstile"
+    writer = TileStreamWriter(str(path), 64, 64, 30)
+    for value in range(3):
+        writer.write(np.full((64, 64, 3), value, dtype=np.uint8))
+    writer.release()
+    data = path.read_bytes()
+    path.write_bytes(data[:-5])
+    with TileStreamReader(str(path)) as reader:
+        assert len(list(reader)) == 2
@@ -0,0 +1,80 @@
+import time
+from PySide6.QtCore import QRect
+from capture.window_index import WindowIndex, WindowInfo, WindowListModel, diff_windows
+
+class FakeLister:
+    def __init__(self, windows):
+        self.windows = list(windows)
+        self.calls = 0
+
+    def list_windows(self):
+        self.calls += 1
+        return list(self.windows)
+
+A = WindowInfo(1, "Editor", (0, 0, 800, 600))
+B = WindowInfo(2, "Terminal", (100, 100, 640, 480))
+C = WindowInfo(3, "Browser", (0, 0, 1280, 720))
+
+def test_diff_windows():
+    cached = {A.handle: A, B.handle: B}
+    moved = B._replace(rect=(120, 100, 640, 480))
+    removed, added, changed = diff_windows(cached, [moved, C])
+    assert removed == [A.handle]
+    assert added == [C]
+    assert changed == [moved]
+    assert diff_windows(cached, [A, B]) == ([], [], [])
+
+def test_model_applies_fine_grained_changes(qapp):
+    model = WindowListModel()
+    events = []
+    model.modelReset.connect(lambda: events.append('reset'))
+    model.rowsInserted.connect(lambda parent, first, last: events.append(('insert', first, last)))
+    model.rowsRemoved.connect(lambda parent, first, last: events.append(('remove', first, last)))
+    model.dataChanged.connect(lambda top, bottom, roles: events.append(('change', top.row())))
+
+    model.apply([], [A, B, C], [])
+    renamed = C._replace(title="Browser - docs")
+    model.apply([A.handle], [], [renamed])
+
+    assert events == [('insert', 0, 2), ('remove', 0, 0), ('change', 1)]
+    assert [w.handle for w in model.windows] == [B.handle, C.handle]
+    index = model.index(1)
+    assert model.data(index, WindowListModel.TitleRole) == "Browser - docs"
+    assert model.data(index, WindowListModel.RectRole) == QRect(0, 0, 1280, 720)
+    assert model.data(index, WindowListModel.WindowInfoRole)['handle'] == C.handle
+
+def test_index_only_emits_on_change(qapp):
+    lister = FakeLister([A, B])
+    index = WindowIndex(lister)
+    changes = []
+    index.windowsChanged.connect(lambda: changes.append(1))
+    index.refresh_now()
+    index.refresh_now()
+    assert len(changes) == 1
+    assert index.windows() == [A, B]
+
+    lister.windows = [B, C]
+    index.refresh_now()
+    assert index.windows() == [B, C]
+    assert index.model.rowCount() == 2
+
+def test_index_polls_in_background(qapp):
+    lister = FakeLister([A])
+    index = WindowIndex(lister, interval=0.01)
+    index.start()
+    try:
+        deadline = time.monotonic() + 2.0
+        while index.model.rowCount() == 0 and time.monotonic() < deadline:
+            qapp.processEvents()
+            time.sleep(0.01)
+        assert index.windows() == [A]
+    finally:
+        index.stop()
+    assert lister.calls >= 1
+
+def test_index_without_lister_is_empty(qapp):
+    index = WindowIndex(None)
+    index.start()
+    index.refresh_now()
+    assert not index.available
+    assert index.windows() == []
@@ -0,0 +1,69 @@
+import threading
+import numpy as np
+from PySide6.QtCore import QRect
+from capture.frame_sources import QtScreenSource
+from capture.window_tracker import WindowTracker, create_tracker
+
+class FakeTracker(WindowTracker):
+    """Replays queued rects from its event thread."""
+
+    def __init__(self, handle, rects):
+        super().__init__(handle)
+        self._rects = list(rects)
+        self.queries = 0
+        self.done = threading.Event()
+
+    def _query(self):
+        self.queries += 1
+        return self._rects.pop(0) if self._rects else self._rect
+
+    def _run(self):
+        while self._rects:
+            self._update(self._query())
+        self.done.set()
+
+def test_tracker_caches_rect_and_notifies_changes():
+    tracker = FakeTracker(7, [(0, 0, 100, 100), (10, 0, 100, 100), (10, 0, 100, 100), (10, 0, 200, 150)])
+    seen = []
+    tracker.add_listener(seen.append)
+    tracker.start()
+    assert tracker.done.wait(2.0)
+    tracker.stop()
+    # The initial rect comes from start(); repeats are not reported
+    assert seen == [(10, 0, 100, 100), (10, 0, 200, 150)]
+    assert tracker.rect() == (10, 0, 200, 150)
+    assert tracker.updates == 2
+    queries = tracker.queries
+    for _ in range(10):
+        tracker.rect()
+    assert tracker.queries == queries
+
+def test_create_tracker_without_window_system(monkeypatch):
+    monkeypatch.delenv('DISPLAY', raising=False)
+    assert create_tracker(1) is None
+
+def test_resized_window_frames_keep_the_output_size(qapp):
+    source = QtScreenSource(QRect(0, 0, 64, 48), window_handle=1)
+    source._grabbed_size = source.size()
+    frame = np.zeros((48, 64, 4), dtype=np.uint8)
+    assert source._fit(frame) is frame
+    larger = np.full((96, 128, 4), 200, dtype=np.uint8)
+    scaled = source._fit(larger)
+    assert scaled.shape == (48, 64, 4)
+    assert int(scaled[0, 0, 0]) == 200
+
+def test_window_rect_follows_tracker_relative_to_screen(qapp, monkeypatch):
+    import capture.window_tracker as window_tracker
+    tracker = FakeTracker(3, [(0, 0, 64, 48), (40, 30, 64, 48)])
+    monkeypatch.setattr(window_tracker, 'create_tracker', lambda handle: tracker)
+    source = QtScreenSource(QRect(0, 0, 64, 48), window_handle=3)
+    source.open()
+    assert tracker.done.wait(2.0)
+    assert source._window_area == QRect(40, 30, 64, 48)
+    source.close()
+    assert tracker.updates == 1
+    
+    # Desktop coordinates become relative to the grabbed screen
+    source._origin = (1920, 0)
+    source._follow_window((2000, 100, 300, 200))
+    assert source._window_area == QRect(80, 100, 300, 200)
@@ -0,0 +1,76 @@
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import cv2
+import pytest
+from capture.capture_manager import CaptureManager
+from capture.frame_sources import SyntheticSource
+from capture.frame_transform import FrameTransform
+from capture.yuv_convert import YuvConverter, I420, NV12
+
+def frame(width, height, channels=4):
+    return np.random.default_rng(6).integers(0, 256, (height, width, channels), dtype=np.uint8)
+
+@pytest.mark.parametrize("channels", [3, 4])
+def test_bands_match_whole_frame_conversion(channels):
+    pixels = frame(96, 300, channels)
+    code = cv2.COLOR_BGRA2YUV_I420 if channels == 4 else cv2.COLOR_BGR2YUV_I420
+    expected = cv2.cvtColor(pixels, code)
+    converter = YuvConverter(96, 300, I420, threads=4)
+    assert converter.threads == 4
+    np.testing.assert_array_equal(converter.convert(pixels), expected)
+    converter.close()
+
+@pytest.mark.parametrize("threads", [1, 3])
+def test_nv12_interleaves_the_i420_chroma(threads):
+    pixels = frame(64, 256)
+    i420 = cv2.cvtColor(pixels, cv2.COLOR_BGRA2YUV_I420)
+    converter = YuvConverter(64, 256, NV12, threads=threads)
+    nv12 = converter.convert(pixels)
+    converter.close()
+    quarter = 64 * 256 // 4
+    chroma = i420[256:].reshape(-1)
+    np.testing.assert_array_equal(nv12[:256], i420[:256])
+    np.testing.assert_array_equal(nv12[256:].reshape(-1)[0::2], chroma[:quarter])
+    np.testing.assert_array_equal(nv12[256:].reshape(-1)[1::2], chroma[quarter:])
+
+@pytest.mark.parametrize("pixel_format,threads", [(NV12, 1), (NV12, 3), (I420, 3)])
+def test_concurrent_conversions_do_not_share_scratch(pixel_format, threads):
+    frames = [np.random.default_rng(seed).integers(0, 256, (240, 320, 4), dtype=np.uint8)
+              for seed in range(8)]
+    converter = YuvConverter(320, 240, pixel_format, threads=threads)
+    expected = [converter.convert(pixels).copy() for pixels in frames]
+
+    def convert_all(_):
+        return [np.array_equal(converter.convert(pixels), want)
+                for _ in range(10) for pixels, want in zip(frames, expected)]
+
+    with ThreadPoolExecutor(4) as pool:
+        results = [ok for batch in pool.map(convert_all, range(4)) for ok in batch]
+    converter.close()
+    assert all(results)
+
+def test_odd_sizes_are_rejected():
+    with pytest.raises(ValueError):
+        YuvConverter(63, 48)
+
+def test_transform_scales_into_pooled_yuv_buffer():
+    transform = FrameTransform((321, 241), output=(160, 0), colorspace=I420, threads=2)
+    assert transform.output_size == (160, 120)
+    assert transform.output_shape == (180, 160)
+    buffer = np.empty((180, 160, 1), dtype=np.uint8)
+    transform.apply(frame(321, 241), buffer)
+    assert buffer[:120].std() > 0
+    # Unscaled odd sizes drop the last row and column
+    transform = FrameTransform((321, 241), colorspace=NV12)
+    assert transform.output_size == (320, 240)
+    assert transform.apply(frame(321, 241)).shape == (360, 320)
+
+def test_yuv_output_needs_the_gstreamer_backend(qapp, tmp_path):
+    manager = CaptureManager()
+    manager.use_frame_source(SyntheticSource(160, 120))
+    manager.set_colorspace('i420')
+    errors = []
+    manager.errorOccurred.connect(errors.append)
+    manager.start_recording(str(tmp_path / "yuv.avi"))
+    assert not manager.recording
+    assert errors and "gstreamer" in errors[0]